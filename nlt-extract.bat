@@ -0,0 +1,3 @@
+@echo off
+:: nlt-extract ratios | statements | leadschedules | scan | portfolio | summaries | packs | publish
+python "%~dp0scripts\nlt_extract.py" %*
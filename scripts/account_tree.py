@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Account hierarchy for the Leadschedules and TaxLeadschedules grids.
+
+Leadschedules is a pivot table whose outline level is the column holding the
+label: column 0 the account class (1 ASSETS), column 1 the group (CURRENT
+ASSETS) or its code, column 2 the account (Cash), its code (10000) and the
+detail lines that carry amounts. TaxLeadschedules is the compact layout:
+every label sits in column 0 and a heading opens a level. In both, each open
+level is closed by a "<name> Total" row with the workbook's reported totals.
+
+build_account_tree() turns the rows into a tree of AccountNode. Detail lines
+are the leaves and, because both layouts are in outline order, every node
+covers a contiguous run of leaves. So all subtotals come from one prefix sum
+over the leaf x period matrix: node total = cumsum[end] - cumsum[start]. With
+numpy this is one vectorized cumsum and one fancy-indexed subtraction;
+without it, the same prefix sums are computed per period column in Python.
+
+Each node's computed totals are compared with its reported total row
+(tie-out), so the dashboard can drill into any node and flag any that does
+not tie, without recomputing anything.
+"""
+
+PIVOT_LABEL_HEADER = 'Row Labels'
+COMPACT_LABEL_HEADER = 'Current Period'
+CLASS_COL, GROUP_COL, ACCOUNT_COL = 0, 1, 2
+PIVOT_FIRST_VALUE_COL = 3
+COMPACT_FIRST_VALUE_COL = 1
+TOTAL_SUFFIX = ' total'
+GRAND_TOTAL = 'grand total'
+TIE_OUT_TOLERANCE = 0.01
+# Value columns that are not amounts: percentages and the pivot's activity flag
+NON_ADDITIVE_LABELS = ('Activity',)
+
+# Outline depth of each pivot row kind; compact headings nest one below the open node
+PIVOT_DEPTHS = {'class': 1, 'group': 2, 'account': 3}
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_total(label):
+    return label.lower().rstrip().endswith(TOTAL_SUFFIX)
+
+
+def classify_pivot_row(cells):
+    """
+    Outline level of one Leadschedules pivot row: returns (kind, code, name)
+    where kind is 'class', 'group', 'account', 'detail', 'total',
+    'group_code', 'account_code' or None for rows that carry nothing.
+    """
+    class_cell = cells[CLASS_COL] if len(cells) > CLASS_COL else ''
+    group_cell = cells[GROUP_COL] if len(cells) > GROUP_COL else ''
+    account_cell = cells[ACCOUNT_COL] if len(cells) > ACCOUNT_COL else ''
+    has_values = any(v not in ('', None) for v in cells[PIVOT_FIRST_VALUE_COL:])
+
+    if _is_number(class_cell) and isinstance(group_cell, str) and group_cell:
+        return 'class', class_cell, group_cell.strip()
+    if isinstance(group_cell, str) and group_cell:
+        return ('total' if _is_total(group_cell) else 'group'), None, group_cell.strip()
+    if isinstance(account_cell, str) and account_cell:
+        if _is_total(account_cell):
+            return 'total', None, account_cell.strip()
+        if has_values:
+            return 'detail', None, account_cell.strip()
+        return 'account', group_cell if _is_number(group_cell) else None, account_cell.strip()
+    if _is_number(account_cell):
+        return 'account_code', account_cell, None
+    if _is_number(group_cell):
+        return 'group_code', group_cell, None
+    return None, None, None
+
+
+def classify_compact_row(cells):
+    """Compact layout: (kind, None, name) with kind 'heading', 'detail', 'total' or None."""
+    label = cells[0] if cells else ''
+    if not isinstance(label, str) or not label.strip():
+        return None, None, None
+    if _is_total(label):
+        return 'total', None, label.strip()
+    if any(v not in ('', None) for v in cells[COMPACT_FIRST_VALUE_COL:]):
+        return 'detail', None, label.strip()
+    return 'heading', None, label.strip()
+
+
+class AccountNode:
+    """One outline level (or detail line) with its computed and reported totals."""
+
+    __slots__ = ('name', 'kind', 'depth', 'code', 'row', 'children', 'leaf_start', 'leaf_end',
+                 'values', 'totals', 'reported', 'total_row')
+
+    def __init__(self, name, kind, depth, code=None, row=None):
+        self.name = name
+        self.kind = kind
+        self.depth = depth
+        self.code = code
+        self.row = row
+        self.children = []
+        self.leaf_start = 0
+        self.leaf_end = 0
+        self.values = None      # detail lines: their own amounts
+        self.totals = None      # computed subtotal per additive column
+        self.reported = None    # amounts on the "<name> Total" row
+        self.total_row = None
+
+    @property
+    def is_leaf(self):
+        return self.kind == 'detail'
+
+    def tie_out(self, tolerance=TIE_OUT_TOLERANCE):
+        """{column: computed - reported} for columns that do not tie; empty when it ties."""
+        if self.reported is None or self.totals is None:
+            return {}
+        return {
+            label: round(total - self.reported.get(label, 0), 2)
+            for label, total in self.totals.items()
+            if abs(total - self.reported.get(label, 0)) > tolerance
+        }
+
+    def to_dict(self):
+        node = {'name': self.name, 'kind': self.kind, 'row': self.row}
+        if self.code is not None:
+            node['code'] = self.code
+        if self.is_leaf:
+            node['values'] = self.values
+            return node
+        node['totals'] = {label: round(v, 2) for label, v in (self.totals or {}).items()}
+        node['leafCount'] = self.leaf_end - self.leaf_start
+        if self.reported is not None:
+            differences = self.tie_out()
+            node['reported'] = self.reported
+            node['totalRow'] = self.total_row
+            node['tiesOut'] = not differences
+            if differences:
+                node['differences'] = differences
+        node['children'] = [child.to_dict() for child in self.children]
+        return node
+
+
+class AccountTree:
+    """Root of the outline, the value column layout and the leaves in outline order."""
+
+    def __init__(self, layout, labels):
+        self.layout = layout
+        self.labels = labels
+        self.additive_labels = [label for label in labels
+                                if label and '%' not in label and label not in NON_ADDITIVE_LABELS]
+        self.root = AccountNode('ALL', 'root', 0)
+        self.leaves = []
+        self.unmatched_totals = []
+
+    def iter_nodes(self):
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def mismatches(self):
+        """Nodes whose computed totals do not tie to their reported total row."""
+        return [node for node in self.iter_nodes() if node.tie_out()]
+
+    def to_dict(self):
+        return {
+            'layout': self.layout,
+            'columns': self.additive_labels,
+            'totals': {label: round(v, 2) for label, v in (self.root.totals or {}).items()},
+            'tree': [child.to_dict() for child in self.root.children],
+            'tieOut': {
+                'checked': sum(1 for node in self.iter_nodes() if node.reported is not None),
+                'mismatched': [node.name for node in self.mismatches()],
+                'unmatchedTotals': self.unmatched_totals,
+            }
+        }
+
+
+def _number(value):
+    return value if _is_number(value) else 0
+
+
+def _assign_leaf_ranges(tree):
+    """
+    Leaves are in outline order, so each node spans leaves[leaf_start:leaf_end].
+    A running cursor gives nodes without leaves (an account with only a total
+    row) the empty range [cursor, cursor) instead of a stale one.
+    """
+    cursor = 0
+
+    def visit(node):
+        nonlocal cursor
+        node.leaf_start = cursor
+        if node.is_leaf:
+            cursor += 1
+        else:
+            for child in node.children:
+                visit(child)
+        node.leaf_end = cursor
+
+    visit(tree.root)
+
+
+def _compute_subtotals(tree):
+    """Fill node.totals for every non-leaf node from prefix sums over the leaf matrix."""
+    labels = tree.additive_labels
+    nodes = [node for node in tree.iter_nodes() if not node.is_leaf]
+    try:
+        # Imported here so callers that never build a tree do not pay numpy's import
+        import numpy as np
+    except ImportError:  # optional: pure-Python prefix sums are used instead
+        np = None
+    if np is not None:
+        matrix = np.array([[leaf.values[label] for label in labels] for leaf in tree.leaves],
+                          dtype=float).reshape(len(tree.leaves), len(labels))
+        prefix = np.vstack([np.zeros((1, len(labels))), np.cumsum(matrix, axis=0)])
+        starts = np.fromiter((node.leaf_start for node in nodes), dtype=np.intp, count=len(nodes))
+        ends = np.fromiter((node.leaf_end for node in nodes), dtype=np.intp, count=len(nodes))
+        for node, row in zip(nodes, (prefix[ends] - prefix[starts]).tolist()):
+            node.totals = dict(zip(labels, row))
+        return
+
+    prefix = {}
+    for label in labels:
+        running = [0.0]
+        for leaf in tree.leaves:
+            running.append(running[-1] + leaf.values[label])
+        prefix[label] = running
+    for node in nodes:
+        node.totals = {
+            label: prefix[label][node.leaf_end] - prefix[label][node.leaf_start]
+            for label in labels
+        }
+
+
+def _detect_layout(cells):
+    """(layout, labels, first value column) if cells is a header row, else None."""
+    if not cells:
+        return None
+    if cells[CLASS_COL] == PIVOT_LABEL_HEADER:
+        return 'pivot', [str(v).lstrip(':') for v in cells[PIVOT_FIRST_VALUE_COL:]], PIVOT_FIRST_VALUE_COL
+    if len(cells) > COMPACT_FIRST_VALUE_COL and cells[COMPACT_FIRST_VALUE_COL] == COMPACT_LABEL_HEADER:
+        labels = [str(v) if v not in ('', None) else '' for v in cells[COMPACT_FIRST_VALUE_COL:]]
+        return 'compact', labels, COMPACT_FIRST_VALUE_COL
+    return None
+
+
+def build_account_tree(rows):
+    """
+    Build the account tree from grid rows (lists of cell values).
+    Rows before the header ('Row Labels' for the pivot, 'Current Period' for
+    the compact layout) are skipped; the header names the value columns and
+    every amount column is summed. Returns None if no header is found.
+    """
+    tree = None
+    stack = []
+    pending_code = None
+
+    for position, cells in enumerate(rows):
+        if tree is None:
+            header = _detect_layout(cells)
+            if header:
+                layout, labels, first_value_col = header
+                classify = classify_pivot_row if layout == 'pivot' else classify_compact_row
+                tree = AccountTree(layout, labels)
+                stack = [tree.root]
+            continue
+
+        kind, code, name = classify(cells)
+        if kind is None:
+            continue
+        if kind == 'group_code':
+            pending_code = code
+            continue
+        if kind == 'account_code':
+            if stack[-1].kind == 'account':
+                stack[-1].code = code
+            continue
+
+        amounts = {label: _number(value)
+                   for label, value in zip(labels, cells[first_value_col:])
+                   if label in tree.additive_labels}
+
+        if kind == 'total':
+            # Close the innermost open node of that name (names repeat across levels)
+            if name.lower() == GRAND_TOTAL:
+                tree.root.reported = amounts
+                tree.root.total_row = position
+                del stack[1:]
+                continue
+            base = name[:-len(TOTAL_SUFFIX)].strip().lower()
+            match = next((i for i in range(len(stack) - 1, 0, -1)
+                          if stack[i].name.lower() == base and stack[i].reported is None), None)
+            if match is None:
+                tree.unmatched_totals.append(name)
+                continue
+            stack[match].reported = amounts
+            stack[match].total_row = position
+            del stack[match:]
+            continue
+
+        if kind == 'detail':
+            node = AccountNode(name, kind, stack[-1].depth + 1, None, position)
+            node.values = amounts
+            stack[-1].children.append(node)
+            tree.leaves.append(node)
+            continue
+
+        if kind == 'heading':
+            depth = stack[-1].depth + 1
+        else:
+            depth = PIVOT_DEPTHS[kind]
+            # Close open nodes at this depth or deeper whose total row was missing
+            while len(stack) > 1 and stack[-1].depth >= depth:
+                stack.pop()
+            if kind == 'group' and code is None:
+                code, pending_code = pending_code, None
+        node = AccountNode(name, kind, depth, code, position)
+        stack[-1].children.append(node)
+        stack.append(node)
+
+    if tree is None:
+        return None
+    _assign_leaf_ranges(tree)
+    _compute_subtotals(tree)
+    return tree
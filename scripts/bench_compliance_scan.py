@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Synthetic document-tree benchmark for the compliance scanner.
+
+Generates an NLTS-PR style tree (clients / years / Planillas folders, PDFs with
+known first-page text, spreadsheets with revision-style names) and reports
+files/sec, syscall counts, subprocess count and peak memory for scan_documents in
+cold-cache and warm-cache modes.
+
+Each measurement runs in a fresh worker process so peak memory is not polluted
+by tree generation or earlier runs. With --extractor stub the PDF text comes
+from the generated manifest instead of pdftotext, so runs are deterministic.
+
+"r/w calls" are the read/write syscall counters from /proc/self/io for the
+measured scan only: they exclude open, stat, getdents, mmap and every other
+syscall, and the pdftotext children. The full syscall total is reported only
+with --strace (Linux, strace on PATH), where the worker runs under
+`strace -f -c`; otherwise the syscalls column is "-".
+
+Usage:
+    python scripts/bench_compliance_scan.py --files 20000
+    python scripts/bench_compliance_scan.py --root /tmp/nlts-bench --keep --extractor pdftotext
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MANIFEST_NAME = 'bench_manifest.json'
+
+CLIENTS = ['NLTS-PR', 'Reyes Contractor', 'National Lift Truck', 'Caribe Rentals', 'Isla Services']
+SUBFOLDERS = ['', 'Planillas', 'Auditoria', 'Correspondencia', 'Nomina']
+
+# (filename template, first-page text) pairs; {m} {d} {y} {r} {v} are filled per file
+PDF_TEMPLATES = [
+    ('{c} Financial Statement December 31 {y}-{v}.pdf',
+     'Independent Auditor\'s Report. Financial Statements as of December 31, {y}.'),
+    ('Form 480.6 {y}-{v}.pdf', 'Departamento de Hacienda. Form 480.6 Contribucion sobre ingresos {y}.'),
+    ('Planilla Municipal {y}-{v}.pdf', 'Declaracion de volumen de negocios. Planilla municipal {y}.'),
+    ('CRIM {y}-{v}.pdf', 'Planilla inmueble. Contribucion sobre propiedad para el ano {y}.'),
+    ('Engagement {m} {d} {y}-{v}.pdf',
+     '{m}/{d}/{y}. We are pleased to confirm our understanding of the services we are to provide.'),
+    ('Representation {y}-{v}.pdf',
+     'Management representation letter. We confirm to the best of our knowledge, December 31, {y}.'),
+    ('Scan {y} {v}.pdf', ''),
+]
+SHEET_TEMPLATES = [
+    '{c} FS {m} {d} {y} Rev{r}-{v}.xlsm',
+    'Depreciation Schedule {y}-{v}.xlsx',
+    'IVU Report {m}-{d}-{y}-{v}.xls',
+    'Wage Report {y} Rev{r}-{v}.xlsx',
+]
+
+
+def make_pdf(text):
+    """Build a minimal one-page PDF whose text layer is exactly text."""
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    stream = f'BT /F1 10 Tf 40 750 Td ({escaped}) Tj ET'.encode('latin-1', 'replace')
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        b'/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Length ' + str(len(stream)).encode() + b' >>\nstream\n' + stream + b'\nendstream',
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f'{i} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    for offset in offsets:
+        out += f'{offset:010d} 00000 n \n'.encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return bytes(out)
+
+
+def generate_tree(root, total_files, seed=0, pdf_ratio=0.6):
+    """
+    Write a synthetic tree of total_files documents under root.
+    Returns the manifest {relative path: first-page text} also saved as MANIFEST_NAME.
+    """
+    rng = random.Random(seed)
+    manifest = {}
+    for i in range(total_files):
+        client = CLIENTS[i % len(CLIENTS)]
+        year = 2015 + rng.randrange(10)
+        folder = os.path.join(root, client, str(year), rng.choice(SUBFOLDERS))
+        os.makedirs(folder, exist_ok=True)
+        fields = {
+            'c': client, 'y': year, 'm': rng.randint(1, 12), 'd': rng.randint(1, 28),
+            'r': 150 + rng.randrange(10), 'v': i,
+        }
+        if rng.random() < pdf_ratio:
+            name_tpl, text_tpl = rng.choice(PDF_TEMPLATES)
+            name, text = name_tpl.format(**fields), text_tpl.format(**fields)
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(make_pdf(text))
+            manifest[os.path.relpath(os.path.join(folder, name), root)] = text
+        else:
+            name = rng.choice(SHEET_TEMPLATES).format(**fields)
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(b'PK\x03\x04')
+    with open(os.path.join(root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def make_stub_extractor(root):
+    """Return an extract_text replacement that serves first-page text from the manifest."""
+    with open(os.path.join(root, MANIFEST_NAME), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    def extract_text(filepath):
+        return manifest.get(os.path.relpath(filepath, root), '').lower()[:2000]
+
+    return extract_text
+
+
+def drop_file_cache(root):
+    """Best-effort eviction of the tree from the OS page cache (cold-cache mode)."""
+    try:
+        with open('/proc/sys/vm/drop_caches', 'w') as f:
+            f.write('3\n')
+        return 'drop_caches'
+    except OSError:
+        pass
+    if not hasattr(os, 'posix_fadvise'):
+        return 'none'
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            try:
+                fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return 'fadvise'
+
+
+def read_proc_io():
+    """Sum of this process's read and write syscall counters (Linux only); other syscalls are not counted."""
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+        return int(fields['syscr']) + int(fields['syscw'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def run_worker(root, mode, extractor):
+    """Measure one scan_documents() run in this process and return the metrics."""
+    import io
+    import contextlib
+    import scan_compliance_docs
+
+    extract_text = make_stub_extractor(root) if extractor == 'stub' else None
+    counts = {'subprocess.Popen': 0, 'open': 0, 'os.scandir': 0, 'os.listdir': 0}
+
+    def audit(event, args):
+        if event in counts:
+            counts[event] += 1
+
+    cache = 'warm'
+    if mode == 'cold':
+        cache = drop_file_cache(root)
+    else:
+        # Warm-up pass populates the page cache and dentry cache
+        with contextlib.redirect_stdout(io.StringIO()):
+            scan_compliance_docs.scan_documents(directory=root, extract_text=extract_text)
+
+    sys.addaudithook(audit)
+    io_before = read_proc_io()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = scan_compliance_docs.scan_documents(directory=root, extract_text=extract_text)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    io_after = read_proc_io()
+    snapshot = dict(counts)
+
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        max_rss = None
+
+    return {
+        'mode': mode,
+        'cache': cache,
+        'extractor': extractor,
+        'files': result['totalFiles'],
+        'seconds': round(elapsed, 3),
+        'filesPerSec': round(result['totalFiles'] / elapsed, 1) if elapsed else None,
+        'rwCalls': (io_after - io_before) if io_before is not None and io_after is not None else None,
+        'syscalls': None,
+        'fsCalls': snapshot['open'] + snapshot['os.scandir'] + snapshot['os.listdir'],
+        'subprocesses': snapshot['subprocess.Popen'],
+        'peakTracedBytes': peak,
+        'maxRssBytes': max_rss,
+    }
+
+
+def parse_strace_total(path):
+    """Return the total call count from an `strace -c` summary file."""
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if parts and parts[-1] == 'total':
+                return int(parts[3])
+    return None
+
+
+def spawn_worker(root, mode, extractor, use_strace=False):
+    """Run run_worker() in a fresh interpreter and parse its JSON line."""
+    cmd = [sys.executable, os.path.abspath(__file__), '--worker', mode,
+           '--root', root, '--extractor', extractor]
+    summary = None
+    if use_strace:
+        summary = os.path.join(tempfile.gettempdir(), f'nlts-bench-strace-{os.getpid()}-{mode}.txt')
+        cmd = ['strace', '-f', '-c', '-o', summary] + cmd
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    if summary:
+        # Whole-process count: includes interpreter startup and the warm-up pass
+        result['syscalls'] = parse_strace_total(summary)
+        os.remove(summary)
+    return result
+
+
+def print_report(results):
+    print(f"\n{'mode':<6} {'cache':<12} {'files':>8} {'sec':>8} {'files/s':>10} "
+          f"{'r/w calls':>10} {'syscalls':>10} {'fs calls':>9} {'subproc':>8} {'peak MB':>8} {'rss MB':>8}")
+    for r in results:
+        rss = f"{r['maxRssBytes'] / 1e6:.1f}" if r['maxRssBytes'] else '-'
+        rw_calls = r['rwCalls'] if r['rwCalls'] is not None else '-'
+        syscalls = r['syscalls'] if r['syscalls'] is not None else '-'
+        print(f"{r['mode']:<6} {r['cache']:<12} {r['files']:>8} {r['seconds']:>8.2f} {r['filesPerSec']:>10} "
+              f"{rw_calls:>10} {syscalls:>10} {r['fsCalls']:>9} {r['subprocesses']:>8} "
+              f"{r['peakTracedBytes'] / 1e6:>8.1f} {rss:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scan_documents on a synthetic NLTS-PR tree.')
+    parser.add_argument('--files', type=int, default=10000, help='Number of documents to generate')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for tree generation')
+    parser.add_argument('--root', help='Tree location (default: a temporary directory)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated tree after the run')
+    parser.add_argument('--extractor', choices=['stub', 'pdftotext'], default='stub',
+                        help='PDF text extractor: manifest stub (deterministic) or real pdftotext')
+    parser.add_argument('--modes', default='cold,warm', help='Comma-separated modes to run (cold, warm)')
+    parser.add_argument('--strace', action='store_true', help='Count all syscalls with strace -f -c')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    parser.add_argument('--worker', choices=['cold', 'warm'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.root, args.worker, args.extractor)))
+        return
+
+    root = args.root or tempfile.mkdtemp(prefix='nlts-bench-')
+    try:
+        if not os.path.exists(os.path.join(root, MANIFEST_NAME)):
+            print(f"Generating {args.files} documents under {root}...")
+            start = time.perf_counter()
+            generate_tree(root, args.files, seed=args.seed)
+            print(f"Generated in {time.perf_counter() - start:.1f}s")
+        else:
+            print(f"Reusing existing tree at {root}")
+
+        use_strace = args.strace and shutil.which('strace') is not None
+        if args.strace and not use_strace:
+            print("strace not found on PATH; only /proc/self/io read/write calls are reported")
+        results = [spawn_worker(root, mode.strip(), args.extractor, use_strace)
+                   for mode in args.modes.split(',')]
+        print_report(results)
+
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"\nResults written to: {args.json}")
+    finally:
+        if not args.keep and not args.root:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Grid extraction benchmark: dict-per-cell rows vs GridStore.
+
+Builds a synthetic leadschedule-shaped sheet (mostly empty cells, a pivot
+label column, amounts in the value columns, a handful of number formats) and
+runs both the previous extract_grid_data / extract_table_sheet loops and the
+GridStore path over it, reporting time and tracemalloc peak for:
+
+    read      rows held in memory after reading the sheet
+    read+out  the same plus building the output rows for JSON
+
+The sheet object mimics openpyxl's iter_rows(min_row, max_row, max_col) and
+cells expose .value and .number_format, so the loops are the extractors' own.
+
+Usage:
+    python scripts/bench_grid_extract.py --rows 500 --cols 15 --sheets 2
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from grid_store import GridStore, KEEP_TRUTHY, KEEP_NOT_NONE
+
+FORMATS = [
+    'General',
+    '#,##0.00_);[Red](#,##0.00)',
+    '_(* #,##0.00_);_(* \\(#,##0.00\\);_(* "-"??_);_(@_)',
+    '0.00%',
+]
+LABELS = ['Cash', 'Accounts Receivable Trade', 'Inventory', 'Prepaid Taxes', 'Accounts Payable',
+          'Accrued Expenses', 'Revenue', 'Labor', 'Rent', 'Utilities', 'Interest Expense']
+
+
+class SheetCell:
+    __slots__ = ('value', 'number_format')
+
+    def __init__(self, value, number_format):
+        self.value = value
+        self.number_format = number_format
+
+
+class SyntheticSheet:
+    """Leadschedule-shaped sheet: a label row, an account code row, detail and total rows."""
+
+    def __init__(self, n_rows, n_cols, seed=0):
+        rng = random.Random(seed)
+        self.rows = []
+        for r in range(n_rows):
+            kind = r % 4
+            row = []
+            for c in range(n_cols):
+                fmt = FORMATS[0] if c < 3 else FORMATS[1 + (c % 3)]
+                value = None
+                if kind == 0 and c == 2:
+                    value = rng.choice(LABELS)
+                elif kind == 1 and c == 2:
+                    value = rng.randrange(10000, 99999, 100)
+                elif kind in (2, 3) and c == 2:
+                    value = rng.choice(LABELS) + (' Total' if kind == 3 else '')
+                elif kind in (2, 3) and 3 <= c < 10:
+                    value = round(rng.uniform(-1e6, 1e6), 2) if rng.random() < 0.8 else 0
+                elif rng.random() < 0.02:
+                    # Stray blank rows and spacer cells, like real exports
+                    value = ''
+                row.append(SheetCell(value, fmt))
+            self.rows.append(tuple(row))
+
+    def iter_rows(self, min_row=1, max_row=None, max_col=None):
+        for row in self.rows[min_row - 1:max_row]:
+            yield row[:max_col]
+
+
+def _legacy_cell_value(cell):
+    if cell is None or cell.value is None:
+        return ""
+    return cell.value
+
+
+def _legacy_cell_format(cell):
+    try:
+        return cell.number_format or "General"
+    except AttributeError:
+        return "General"
+
+
+def legacy_grid_rows(ws, max_rows, max_cols):
+    """extract_grid_data before GridStore: a dict per cell, rows kept if any value is truthy."""
+    rows = []
+    for row in ws.iter_rows(min_row=1, max_row=max_rows, max_col=max_cols):
+        row_data = []
+        has_value = False
+        for cell in row:
+            value = _legacy_cell_value(cell)
+            if value:
+                has_value = True
+            row_data.append({"v": value, "f": _legacy_cell_format(cell)})
+        if has_value:
+            rows.append(row_data)
+    return rows
+
+
+def legacy_table_rows(ws, max_rows, max_cols):
+    """extract_table_sheet before GridStore: a dict per cell, rows kept if any cell is not None."""
+    table_data = []
+    for row in ws.iter_rows(min_row=1, max_row=max_rows, max_col=max_cols):
+        row_data = []
+        has_data = False
+        for cell in row:
+            val = cell.value
+            if val is not None:
+                has_data = True
+            json_val = "" if val is None else (val if isinstance(val, (int, float, str)) else str(val))
+            row_data.append({"v": json_val, "f": cell.number_format})
+        if has_data:
+            table_data.append(row_data)
+    return table_data
+
+
+def store_rows(ws, max_rows, max_cols, keep):
+    grid = GridStore(max_cols)
+    for row_idx, row in enumerate(ws.iter_rows(min_row=1, max_row=max_rows, max_col=max_cols), 1):
+        grid.add_row(row, row_idx, keep=keep)
+    return grid
+
+
+def measure(fn, repeat):
+    """Best wall time over repeat runs, and the tracemalloc peak of one run."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+        del result
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark grid extraction storage.')
+    parser.add_argument('--rows', type=int, default=500, help='Rows per sheet (extract_grid_data reads up to 500)')
+    parser.add_argument('--cols', type=int, default=15, help='Columns per sheet')
+    parser.add_argument('--sheets', type=int, default=2, help='Sheets held at once (Lead + TaxLead)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sheets = [SyntheticSheet(args.rows, args.cols, seed=args.seed + i) for i in range(args.sheets)]
+    cells = args.rows * args.cols * args.sheets
+    print(f"{args.sheets} sheet(s) x {args.rows} rows x {args.cols} cols = {cells:,} cells")
+
+    cases = [
+        ('grid  legacy  read', lambda: [legacy_grid_rows(ws, args.rows, args.cols) for ws in sheets]),
+        ('grid  store   read', lambda: [store_rows(ws, args.rows, args.cols, KEEP_TRUTHY) for ws in sheets]),
+        ('grid  store   read+out', lambda: [store_rows(ws, args.rows, args.cols, KEEP_TRUTHY).to_rows() for ws in sheets]),
+        ('table legacy  read', lambda: [legacy_table_rows(ws, args.rows, args.cols) for ws in sheets]),
+        ('table store   read', lambda: [store_rows(ws, args.rows, args.cols, KEEP_NOT_NONE) for ws in sheets]),
+        ('table store   read+out', lambda: [store_rows(ws, args.rows, args.cols, KEEP_NOT_NONE).to_rows() for ws in sheets]),
+    ]
+    results = {}
+    print(f"{'case':<24}{'time (ms)':>12}{'peak (KiB)':>14}")
+    for name, fn in cases:
+        elapsed, peak, result = measure(fn, args.repeat)
+        results[name] = result
+        print(f"{name:<24}{elapsed * 1000:>12.2f}{peak / 1024:>14.1f}")
+
+    # Both paths must produce identical output
+    for kind in ('grid', 'table'):
+        legacy = results[f'{kind:<5} legacy  read']
+        store = results[f'{kind:<5} store   read+out']
+        print(f"{kind} output identical: {legacy == store}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the nlt-extract commands.
+
+Runs `python -X importtime scripts/nlt_extract.py <command> --help` for each
+command and reports the wall time, the number of modules imported and their
+cumulative import time (from the importtime report on stderr), plus the
+slowest top-level imports. A regression here usually means a heavy module
+(openpyxl, numpy, the OCR pool) went back to a module-level import.
+
+Usage:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py ratios scan --repeat 5 --json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ENTRY_POINT = os.path.join(SCRIPTS_DIR, 'nlt_extract.py')
+DEFAULT_COMMANDS = ('ratios', 'statements', 'leadschedules', 'scan')
+HEAVY_MODULES = ('openpyxl', 'numpy', 'concurrent.futures.process', 'pytesseract', 'fitz', 'PIL')
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us, depth)] from an -X importtime report."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = (part for part in line[len('import time:'):].split('|', 2))
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def measure(command, repeat):
+    """Best-of-repeat wall time and the import report of the fastest run."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-X', 'importtime', ENTRY_POINT, command, '--help'],
+                              capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, proc)
+    elapsed, proc = best
+    imports = parse_importtime(proc.stderr)
+    names = {name for name, _, _, _ in imports}
+    top_level = sorted((i for i in imports if i[3] == 1), key=lambda i: i[2], reverse=True)
+    return {
+        'command': command,
+        'exitCode': proc.returncode,
+        'wallMs': round(elapsed * 1000, 1),
+        'modules': len(imports),
+        'importMs': round(sum(i[1] for i in imports) / 1000, 1),
+        'heavyLoaded': [m for m in HEAVY_MODULES if m in names],
+        'slowest': [{'module': name, 'ms': round(cumulative / 1000, 1)} for name, _, cumulative, _ in top_level[:5]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure nlt-extract startup time.')
+    parser.add_argument('commands', nargs='*', default=list(DEFAULT_COMMANDS), help='Commands to measure')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per command (fastest is reported)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = [measure(command, args.repeat) for command in args.commands]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'command':<15}{'wall (ms)':>11}{'imports (ms)':>14}{'modules':>9}  heavy")
+    for r in results:
+        heavy = ', '.join(r['heavyLoaded']) or '-'
+        print(f"{r['command']:<15}{r['wallMs']:>11.1f}{r['importMs']:>14.1f}{r['modules']:>9}  {heavy}")
+    for r in results:
+        slowest = ', '.join(f"{s['module']} {s['ms']}" for s in r['slowest'])
+        print(f"  {r['command']}: {slowest}")
+
+
+if __name__ == '__main__':
+    main()
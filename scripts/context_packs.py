@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Precompiled context packs for notebook chat.
+
+The extraction outputs (financial_statements.json, dynamic_ratios.json and
+compliance_docs.json) are condensed into short per-topic texts:
+
+    liquidity       current/quick ratios, working capital, current assets and liabilities
+    leverage        debt to equity, coverage, Z-score, debt, leases and equity
+    profitability   margins, returns, break-even, revenue and income lines
+    tax             tax lines of the statements and the latest tax filings
+    compliance      compliance documents on file, per type, with the latest one
+
+Each pack is trimmed to --budget tokens (estimated at 4 characters per
+token, whole lines only) and carries a keyword pattern (English and Spanish,
+matched without accents) used to pick the packs relevant to a question.
+
+The packs file records the data version, a hash of the three inputs without
+their volatile timestamps. A run whose inputs, budget and pack format are
+unchanged leaves the file alone; server/index.js keeps the parsed packs in
+memory until the file's mtime changes, so attaching context to a question
+costs a stat and a few regex tests.
+
+Usage:
+    python scripts/context_packs.py
+    python scripts/context_packs.py --budget 250 --force
+    python scripts/context_packs.py --question "¿Cómo está la liquidez?"
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import unicodedata
+from datetime import datetime
+
+from publish_stage import canonical_json, publish_json, split_volatile
+import nlt_config
+
+PACKS_VERSION = 1
+DEFAULT_BUDGET = 400
+DEFAULT_MAX_TOKENS = 1200
+CHARS_PER_TOKEN = 4
+
+TAX_DOCUMENT_TYPES = ('Tax Returns', 'Municipal Taxes', 'Property Tax (CRIM)', 'Sales Tax Reports')
+
+# topic: (title, keywords, ratio name patterns, statement line patterns)
+TOPICS = {
+    'liquidity': (
+        'Liquidity',
+        ['liquid', 'cash', 'efectivo', 'current ratio', 'razon corriente', 'quick', 'working capital',
+         'capital de trabajo', 'receivable', 'cuentas por cobrar', 'cobro', 'collection', 'payable',
+         'cuentas por pagar', 'inventor', 'short-term', 'corto plazo'],
+        r'current ratio|quick|working capital|collection|payable|inventory turnover \(days\)',
+        r'^(BS) (CURRENT ASSETS|CURRENT LIABILITIES)\b(?!.*(LONG-TERM|Less Current Portion|Long-Term))',
+    ),
+    'leverage': (
+        'Leverage and solvency',
+        ['leverage', 'apalancamiento', 'debt', 'deuda', 'solven', 'equity', 'patrimonio', 'capital contable',
+         'loan', 'prestamo', 'lease', 'arrendamiento', 'interest', 'interes', 'z-score', 'bankrupt', 'quiebra'],
+        r'debt to equity|interest coverage|z-score|sustainable growth|retained earnings to total assets',
+        r'^(BS .*(LONG-TERM|Lease|LEASE|TOTAL LIABILITIES(?! AND)|Total Current Liabilities|Shareholders|Retained))'
+        r'|^(IS .*Interest)',
+    ),
+    'profitability': (
+        'Profitability',
+        ['profit', 'ganancia', 'rentab', 'margin', 'margen', 'revenue', 'ingreso', 'venta', 'sales',
+         'income', 'expense', 'gasto', 'ebitda', 'return on', 'rendimiento', 'break-even', 'punto de equilibrio'],
+        r'margin|return on|ebitda|break-even|contribution|variable cost|sales to assets',
+        r'^IS .*(Revenue|Cost of Revenue|Gross Profit|Total General|Income from Operations|Before Income Tax|Net Income)',
+    ),
+    'tax': (
+        'Taxes',
+        ['tax', 'impuesto', 'contribucion', 'hacienda', 'suri', 'crim', 'ivu', 'sales tax', 'municipal',
+         'patente', 'planilla', '480', '1120', 'retencion', 'withholding'],
+        None,
+        r'^(BS|IS) .*[Tt]ax',
+    ),
+    'compliance': (
+        'Compliance documents',
+        ['complian', 'cumplimiento', 'document', 'audit', 'auditor', 'license', 'licencia', 'permiso',
+         'insurance', 'seguro', 'payroll', 'nomina', 'engagement', 'representation', 'filing', 'radicad'],
+        None,
+        None,
+    ),
+}
+
+
+def strip_accents(text):
+    return ''.join(c for c in unicodedata.normalize('NFD', text) if unicodedata.category(c) != 'Mn')
+
+
+def keyword_pattern(keywords):
+    """One case-insensitive alternation, matched at word starts, over accent-stripped text."""
+    return r'\b(?:' + '|'.join(re.escape(strip_accents(k.lower())) for k in keywords) + ')'
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def trim_to_budget(lines, budget):
+    """The leading lines that fit in budget tokens (the header always stays)."""
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if kept and used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def load_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def data_version(*documents):
+    """Short hash of the inputs, ignoring extractedAt-style timestamps."""
+    digest = hashlib.sha256()
+    for document in documents:
+        stable, _ = split_volatile(document) if isinstance(document, dict) else (document, None)
+        digest.update(hashlib.sha256(canonical_json(stable)).digest())
+    return digest.hexdigest()[:16]
+
+
+def fmt_amount(value):
+    if not isinstance(value, (int, float)):
+        return str(value)
+    return f"{value:,.0f}" if abs(value) >= 100 or value == 0 else f"{value:,.2f}"
+
+
+def fmt_ratio(value):
+    if isinstance(value, (int, float)):
+        return f"{value:,.2f}" if abs(value) < 1000 else f"{value:,.0f}"
+    return str(value)
+
+
+def ratio_lines(ratios, name_pattern):
+    if not ratios or not name_pattern:
+        return []
+    pattern = re.compile(name_pattern, re.IGNORECASE)
+    lines = []
+    for category in ('solvencyRatios', 'safetyRatios', 'profitabilityRatios', 'assetManagementRatios', 'leadingIndicators'):
+        for ratio in ratios.get(category) or []:
+            if not pattern.search(ratio.get('name', '')):
+                continue
+            parts = [f"prior {fmt_ratio(ratio['prior'])}"] if ratio.get('prior') not in (None, 'N/A', '') else []
+            if ratio.get('industryBenchmark') is not None:
+                parts.append(f"benchmark {fmt_ratio(ratio['industryBenchmark'])}")
+            if ratio.get('status'):
+                parts.append(ratio['status'])
+            suffix = f" ({'; '.join(parts)})" if parts else ''
+            lines.append(f"- {ratio['name']}: {fmt_ratio(ratio.get('current'))}{suffix}")
+    return lines
+
+
+def statement_lines(statements, line_pattern):
+    """Visible BS/IS lines whose 'SHEET SECTION NAME' matches, with the latest two years."""
+    if not statements or not line_pattern:
+        return []
+    pattern = re.compile(line_pattern)
+    lines = []
+    for sheet in ('BS', 'IS'):
+        for item in statements.get(sheet) or []:
+            if item.get('row_hidden') or not item.get('name'):
+                continue
+            if not pattern.search(f"{sheet} {item.get('section', '')} {item['name']}"):
+                continue
+            years = sorted((k for k in item if k.isdigit() and len(k) == 4), reverse=True)[:2]
+            values = [(y, item[y]) for y in years if isinstance(item[y], (int, float))]
+            if not values or all(v == 0 for _, v in values):
+                continue
+            latest = f"{values[0][0]}: {fmt_amount(values[0][1])}"
+            prior = f", {values[1][0]}: {fmt_amount(values[1][1])}" if len(values) > 1 and values[1][1] else ''
+            lines.append(f"- {item['name']} ({latest}{prior})")
+    return lines
+
+
+def latest_documents(compliance, types=None):
+    """(type, count, latest document) per document type, most documents first."""
+    documents = (compliance or {}).get('documents') or {}
+    rows = []
+    for doc_type, docs in documents.items():
+        if types is not None and doc_type not in types:
+            continue
+        if not docs:
+            continue
+        latest = max(docs, key=lambda d: d.get('recencyScore') or 0)
+        rows.append((doc_type, len(docs), latest))
+    rows.sort(key=lambda row: (-row[1], row[0]))
+    return rows
+
+
+def document_lines(compliance, types=None):
+    return [f"- {doc_type}: {count} on file; latest {latest.get('filename')} ({latest.get('documentPeriodFormatted', 'Unknown period')})"
+            for doc_type, count, latest in latest_documents(compliance, types)]
+
+
+def build_packs(statements, ratios, compliance, budget=DEFAULT_BUDGET):
+    """Every topic's pack: title, keyword pattern, trimmed text and its token estimate."""
+    company = (ratios or {}).get('company') or nlt_config.COMPANY_NAME
+    as_of = (ratios or {}).get('asOf') or ''
+    source = (ratios or {}).get('source') or ((statements or {}).get('Metadata') or {}).get('SourceFile') or ''
+    packs = {}
+    for topic, (title, keywords, ratio_names, line_pattern) in TOPICS.items():
+        header = f"{title} - {company}" + (f", as of {as_of}" if as_of else '') + (f" ({source})" if source else '')
+        lines = ratio_lines(ratios, ratio_names) + statement_lines(statements, line_pattern)
+        if topic == 'tax':
+            lines += document_lines(compliance, TAX_DOCUMENT_TYPES)
+        elif topic == 'compliance':
+            lines += document_lines(compliance)
+        if not lines:
+            continue
+        text = '\n'.join(trim_to_budget([header] + lines, budget))
+        packs[topic] = {
+            'title': title,
+            'pattern': keyword_pattern(keywords),
+            'tokens': estimate_tokens(text),
+            'lines': len(lines),
+            'text': text,
+        }
+    return packs
+
+
+def select_packs(packs_doc, question, max_tokens=DEFAULT_MAX_TOKENS, compiled=None):
+    """Packs whose keywords occur in question, in topic order, within max_tokens."""
+    normalized = strip_accents(question.lower())
+    selected, used = [], 0
+    for topic, pack in packs_doc['packs'].items():
+        pattern = compiled[topic] if compiled else re.compile(pack['pattern'])
+        if pattern.search(normalized) and used + pack['tokens'] <= max_tokens:
+            selected.append(topic)
+            used += pack['tokens']
+    return selected
+
+
+def compile_packs(statements_path=None, ratios_path=None, compliance_path=None, output=None,
+                  budget=DEFAULT_BUDGET, force=False):
+    """Build and publish the packs if their inputs or settings changed; returns (doc, rebuilt)."""
+    output = output or nlt_config.CONTEXT_PACKS_JSON
+    statements = load_json(statements_path or nlt_config.STATEMENTS_JSON)
+    ratios = load_json(ratios_path or nlt_config.RATIOS_JSON)
+    compliance = load_json(compliance_path or nlt_config.COMPLIANCE_DOCS_JSON)
+    version = data_version(statements, ratios, compliance)
+
+    existing = load_json(output)
+    if (not force and existing and existing.get('dataVersion') == version
+            and existing.get('budget') == budget and existing.get('version') == PACKS_VERSION):
+        return existing, False
+
+    doc = {
+        'version': PACKS_VERSION,
+        'dataVersion': version,
+        'budget': budget,
+        'generatedAt': datetime.now().isoformat(),
+        'packs': build_packs(statements, ratios, compliance, budget),
+    }
+    publish_json(doc, output, compress=False)
+    return doc, True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Precompile token-budgeted context packs for notebook chat.')
+    parser.add_argument('--budget', type=int, default=DEFAULT_BUDGET, help='Token budget per pack')
+    parser.add_argument('--output', default=None, help='Packs file (default: context_packs.json next to the ratios)')
+    parser.add_argument('--statements', default=None, help='financial_statements.json')
+    parser.add_argument('--ratios', default=None, help='dynamic_ratios.json')
+    parser.add_argument('--compliance', default=None, help='compliance_docs.json')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the data version is unchanged')
+    parser.add_argument('--question', default=None, help='Show which packs a question would get')
+    parser.add_argument('--max-tokens', type=int, default=DEFAULT_MAX_TOKENS, help='Context budget per question')
+    args = parser.parse_args(argv)
+
+    doc, rebuilt = compile_packs(args.statements, args.ratios, args.compliance, args.output, args.budget, args.force)
+    state = 'built' if rebuilt else 'up to date'
+    print(f"Context packs {state} (data version {doc['dataVersion']}, budget {doc['budget']} tokens)")
+    for topic, pack in doc['packs'].items():
+        print(f"  {topic:<14} {pack['tokens']:>4} tokens  {pack['lines']} lines")
+
+    if args.question:
+        compiled = {topic: re.compile(pack['pattern']) for topic, pack in doc['packs'].items()}
+        repeat = 10000
+        started = time.perf_counter()
+        for _ in range(repeat):
+            selected = select_packs(doc, args.question, args.max_tokens, compiled)
+        per_question_us = (time.perf_counter() - started) / repeat * 1e6
+        print(f"\nQuestion: {args.question}")
+        print(f"Selected: {', '.join(selected) or 'none'} ({per_question_us:.1f} µs per selection)")
+        for topic in selected:
+            print('\n' + doc['packs'][topic]['text'])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+JSON-Patch (RFC 6902) delta feed between successive extractions.
+
+A feed directory holds:
+    latest.json           full current document
+    v0007.patch.json      patch from version 6 to version 7
+    v0005.json            periodic full snapshot (chain reset point)
+    versions.json         version chain index
+
+Clients holding version N >= baseVersion fetch versions.json and apply the
+patches N+1..current in order; anyone older loads latest.json. A snapshot is
+taken every SNAPSHOT_EVERY versions, or when the pending patches outweigh
+the full document, and older patches are pruned so chains stay short.
+"""
+
+import os
+import json
+import hashlib
+
+from publish_stage import canonical_json, split_volatile, write_atomic
+
+SNAPSHOT_EVERY = 10
+INDEX_NAME = 'versions.json'
+LATEST_NAME = 'latest.json'
+
+
+def _escape(token):
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _same(a, b):
+    """Deep equality that also compares types, so 1 and True (or 0 and False) differ as they do in JSON."""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(value, b[key]) for key, value in a.items())
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def make_patch(old, new, path=''):
+    """
+    Build an RFC 6902 patch turning old into new.
+    Objects are diffed key by key; arrays trim their common head and tail
+    and diff the rest index by index, so a single edited cell in a grid
+    becomes a single 'replace' and an inserted row a single 'add'.
+    """
+    if type(old) is not type(new):
+        return [{'op': 'replace', 'path': path, 'value': new}]
+
+    if isinstance(old, dict):
+        ops = []
+        for key, value in old.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in new:
+                ops.append({'op': 'remove', 'path': child})
+            else:
+                ops.extend(make_patch(value, new[key], child))
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': f"{path}/{_escape(key)}", 'value': value})
+        return ops
+
+    if isinstance(old, list):
+        # Skip the unchanged head and tail so an inserted or deleted row does
+        # not turn into a replace of every row after it
+        start = 0
+        limit = min(len(old), len(new))
+        while start < limit and _same(old[start], new[start]):
+            start += 1
+        end_old, end_new = len(old), len(new)
+        while end_old > start and end_new > start and _same(old[end_old - 1], new[end_new - 1]):
+            end_old -= 1
+            end_new -= 1
+
+        ops = []
+        common = min(end_old, end_new) - start
+        for i in range(start, start + common):
+            ops.extend(make_patch(old[i], new[i], f"{path}/{i}"))
+        pos = start + common
+        for _ in range(end_old - pos):
+            ops.append({'op': 'remove', 'path': f"{path}/{pos}"})
+        for i in range(pos, end_new):
+            ops.append({'op': 'add', 'path': f"{path}/{i}", 'value': new[i]})
+        return ops
+
+    if old != new:
+        return [{'op': 'replace', 'path': path, 'value': new}]
+    return []
+
+
+def apply_patch(doc, patch):
+    """Apply an add/remove/replace RFC 6902 patch; returns the new document."""
+    for op in patch:
+        if op['path'] == '':
+            doc = op.get('value')
+            continue
+        tokens = [_unescape(t) for t in op['path'].split('/')[1:]]
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        last = tokens[-1]
+        if isinstance(parent, list):
+            if op['op'] == 'add':
+                if last == '-':
+                    parent.append(op['value'])
+                else:
+                    parent.insert(int(last), op['value'])
+            elif op['op'] == 'remove':
+                del parent[int(last)]
+            else:
+                parent[int(last)] = op['value']
+        else:
+            if op['op'] == 'remove':
+                del parent[last]
+            else:
+                parent[last] = op['value']
+    return doc
+
+
+def _load_json(path, default=None):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def publish_delta(data, feed_dir, snapshot_every=SNAPSHOT_EVERY):
+    """
+    Add data as a new version in feed_dir if it changed (volatile metadata ignored).
+    Returns the version entry written, or None if the data was unchanged.
+    """
+    os.makedirs(feed_dir, exist_ok=True)
+    index = _load_json(os.path.join(feed_dir, INDEX_NAME)) or {
+        'current': 0, 'baseVersion': 0, 'versions': []
+    }
+    stable, _ = split_volatile(data)
+    content_hash = hashlib.sha256(canonical_json(stable)).hexdigest()
+    previous_entry = index['versions'][-1] if index['versions'] else None
+    if previous_entry and previous_entry['contentHash'] == content_hash:
+        return None
+
+    previous = _load_json(os.path.join(feed_dir, LATEST_NAME))
+    version = index['current'] + 1
+    latest_bytes = canonical_json(data)
+    entry = {
+        'version': version,
+        'contentHash': content_hash,
+        'parentHash': previous_entry['contentHash'] if previous_entry else None,
+        'size': len(latest_bytes),
+        'patch': None,
+        'snapshot': None,
+    }
+
+    if previous is not None and previous_entry:
+        patch_bytes = canonical_json(make_patch(previous, data))
+        entry['patch'] = f"v{version:04d}.patch.json"
+        entry['patchSize'] = len(patch_bytes)
+        write_atomic(os.path.join(feed_dir, entry['patch']), patch_bytes)
+
+    # Snapshot when the chain gets long or its patches outweigh a full download
+    chain = [v for v in index['versions'] if v['version'] > index['baseVersion']] + [entry]
+    chain_bytes = sum(v.get('patchSize', 0) for v in chain)
+    if entry['patch'] is None or len(chain) >= snapshot_every or chain_bytes >= len(latest_bytes):
+        entry['snapshot'] = f"v{version:04d}.json"
+        write_atomic(os.path.join(feed_dir, entry['snapshot']), latest_bytes)
+        for old in index['versions']:
+            for key in ('patch', 'snapshot'):
+                if old.get(key):
+                    old_path = os.path.join(feed_dir, old[key])
+                    if os.path.exists(old_path):
+                        os.remove(old_path)
+        index['versions'] = []
+        # The new version's own patch is kept, so holders of the previous version can still apply it
+        index['baseVersion'] = version - 1 if entry['patch'] else version
+
+    write_atomic(os.path.join(feed_dir, LATEST_NAME), latest_bytes)
+    index['versions'].append(entry)
+    index['current'] = version
+    write_atomic(os.path.join(feed_dir, INDEX_NAME), canonical_json(index))
+    return entry
@@ -9,19 +9,28 @@ Author: Auto-generated for NLT-PR Dashboard
 Version: 1.0.0
 """
 
+import sys
 import json
-import openpyxl
+import argparse
 import warnings
 from pathlib import Path
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from grid_store import GridStore, KEEP_TRUTHY
+from sheet_pool import open_sheet, run_sheet_jobs
+from account_tree import build_account_tree
+from publish_stage import publish_json
+from file_catalog import open_catalog
+import progress
+import nlt_config
+
 # Suppress openpyxl warnings
 warnings.filterwarnings('ignore')
 
 # Configuration
-EXCEL_FILE = Path("D:/NLTS-PR/NLTS-PR FS 12 31 2024 Rev156-3.xlsm")
-OUTPUT_DIR = Path("c:/Users/cpari/.gemini/antigravity/NLT_PR_Dashboard/src/data")
+SOURCE_DIR = nlt_config.NLTS_PR_DIR
+OUTPUT_DIR = Path(nlt_config.DATA_DIR)
 
 # Sheet mappings for financial statements
 SHEET_CONFIG = {
@@ -118,28 +127,29 @@ def get_cell_format(cell) -> str:
         return "General"
 
 
-def extract_grid_data(ws, max_rows: int = 500, max_cols: int = 15) -> List[List[Dict]]:
-    """Extract grid data from a worksheet."""
-    rows = []
+def extract_grid_data(ws, max_rows: int = 500, max_cols: int = 15) -> GridStore:
+    """
+    Extract grid data from a worksheet into compact storage.
+    Rows without any truthy value are dropped; call to_rows() for the output format.
+    """
+    grid = GridStore(max_cols)
     for row_idx, row in enumerate(ws.iter_rows(min_row=1, max_row=max_rows, max_col=max_cols), 1):
-        row_data = []
-        has_value = False
-        for cell in row:
-            value = get_cell_value(cell)
-            if value:
-                has_value = True
-            row_data.append({
-                "v": value,
-                "f": get_cell_format(cell)
-            })
-        if has_value:
-            rows.append(row_data)
-    return rows
+        grid.add_row(row, row_idx, keep=KEEP_TRUTHY)
+    return grid
+
 
+def grid_sheet_job(path, sheet_name: str) -> Optional[GridStore]:
+    """Worker job: open the workbook read-only and extract one grid sheet."""
+    wb, ws = open_sheet(path, sheet_name)
+    try:
+        return extract_grid_data(ws) if ws is not None else None
+    finally:
+        wb.close()
 
-def categorize_row(row: List[Dict], sections: Dict) -> str:
-    """Categorize a row based on its content."""
-    first_cell = str(row[0].get("v", "")).lower() if row else ""
+
+def categorize_row(row: List[Any], sections: Dict) -> str:
+    """Categorize a row (list of cell values) based on its first cell."""
+    first_cell = str(row[0]).lower() if row else ""
     
     for section_key, section_info in sections.items():
         for keyword in section_info["keywords"]:
@@ -149,29 +159,24 @@ def categorize_row(row: List[Dict], sections: Dict) -> str:
     return "other"
 
 
-def extract_leadschedules_by_section(ws, sections: Dict) -> Dict[str, List[List[Dict]]]:
-    """Extract leadschedule data organized by section."""
-    all_rows = extract_grid_data(ws)
-    
+def extract_leadschedules_by_section(grid: GridStore, sections: Dict,
+                                     rows: Optional[List[List[Dict]]] = None) -> Dict[str, List[List[Dict]]]:
+    """
+    Extract leadschedule data organized by section.
+    rows, if given, are the grid's already-built output rows and are shared
+    instead of converted again.
+    """
+    if rows is None:
+        rows = grid.to_rows()
     categorized = {key: [] for key in sections.keys()}
-    header_rows = []
     
     # First few rows are typically headers
-    for i, row in enumerate(all_rows[:5]):
-        header_rows.append(row)
+    header_rows = rows[:5]
     
-    # Categorize remaining rows
-    current_section = None
-    for row in all_rows[5:]:
-        first_cell = str(row[0].get("v", "")) if row else ""
-        
-        # Check if this is a section header
-        section = categorize_row(row, sections)
-        
-        # If row has content, add to appropriate section
-        if any(cell.get("v", "") for cell in row):
-            categorized[section].append(row)
-            current_section = section
+    # Categorize remaining rows (every kept row has content)
+    for row_idx in range(len(header_rows), len(grid)):
+        section = categorize_row([grid.value(row_idx, 0)], sections)
+        categorized[section].append(rows[row_idx])
     
     # Add headers to each section that has data
     for section_key, rows in categorized.items():
@@ -214,26 +219,57 @@ def extract_standard_statement(ws, start_row: int = 4, end_row: int = 100) -> Li
     return items
 
 
-def main():
+def find_workbook(source_dir=None):
+    """(latest FS workbook path, whether its PDF exists) from the catalog, or (None, False)."""
+    try:
+        latest, latest_pdf = open_catalog(source_dir or SOURCE_DIR).latest_with_pdf()
+    except FileNotFoundError as e:
+        print(e)
+        return None, False
+    if not latest:
+        print("No Excel files found.")
+        return None, False
+    return Path(latest['filepath']), bool(latest_pdf)
+
+
+def main(argv=None):
     """Main extraction function."""
-    print(f"📊 Loading workbook: {EXCEL_FILE}")
-    wb = openpyxl.load_workbook(EXCEL_FILE, data_only=True)
+    parser = argparse.ArgumentParser(description="Extract leadschedules from the FS workbook")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Sheet extraction processes (default: one per sheet, up to the CPU count; 1 = sequential)")
+    args = parser.parse_args(argv)
+
+    excel_file, pdf_available = find_workbook()
+    if excel_file is None:
+        progress.emit('error', message='No FS workbook found')
+        return 1
+
+    print(f"📊 Reading workbook: {excel_file}")
+    progress.emit('workbook', file=excel_file.name)
     
     output_data = {
         "Metadata": {
-            "SourceFile": EXCEL_FILE.name,
+            "SourceFile": excel_file.name,
             "ExtractedAt": datetime.now().isoformat(),
-            "PdfAvailable": True,
+            "PdfAvailable": pdf_available,
             "Version": "2.0.0"
         },
         "Sections": {}
     }
     
+    # Each grid sheet is read once into compact storage and converted once;
+    # the sections and the full grid share the output rows
+    # (each sheet in its own process, streaming only that sheet)
+    jobs = {name: (grid_sheet_job, (str(excel_file), name)) for name in ("Leadschedules", "TaxLeadschedules")}
+    results = run_sheet_jobs(jobs, args.workers, on_result=lambda name, grid: progress.emit(
+        'sheet', sheet=name, found=grid is not None, rows=len(grid) if grid is not None else 0))
+    grids = {name: grid for name, grid in results.items() if grid is not None}
+    grid_rows = {name: grid.to_rows() for name, grid in grids.items()}
+    
     # Extract Leadschedules by section
     print("📋 Extracting Leadschedules...")
-    if "Leadschedules" in wb.sheetnames:
-        ws = wb["Leadschedules"]
-        lead_sections = extract_leadschedules_by_section(ws, LEADSCHEDULE_SECTIONS)
+    if "Leadschedules" in grids:
+        lead_sections = extract_leadschedules_by_section(grids["Leadschedules"], LEADSCHEDULE_SECTIONS, grid_rows["Leadschedules"])
         output_data["LeadSections"] = {}
         for section_key, rows in lead_sections.items():
             if rows:
@@ -248,9 +284,8 @@ def main():
     
     # Extract Tax Leadschedules by section    
     print("🏦 Extracting Tax Leadschedules...")
-    if "TaxLeadschedules" in wb.sheetnames:
-        ws = wb["TaxLeadschedules"]
-        tax_lead_sections = extract_leadschedules_by_section(ws, LEADSCHEDULE_SECTIONS)
+    if "TaxLeadschedules" in grids:
+        tax_lead_sections = extract_leadschedules_by_section(grids["TaxLeadschedules"], LEADSCHEDULE_SECTIONS, grid_rows["TaxLeadschedules"])
         output_data["TaxLeadSections"] = {}
         for section_key, rows in tax_lead_sections.items():
             if rows:
@@ -263,35 +298,58 @@ def main():
                 }
                 print(f"  ✓ {section_info['name_en']}: {len(rows)} rows")
     
+    # Account hierarchy with precomputed subtotals and tie-out against the reported totals
+    print("🌳 Building account trees...")
+    for sheet_name, tree_key in (("Leadschedules", "LeadTree"), ("TaxLeadschedules", "TaxLeadTree")):
+        if sheet_name not in grids:
+            continue
+        grid = grids[sheet_name]
+        tree = build_account_tree(grid.row_values(i) for i in range(len(grid)))
+        if tree is None:
+            print(f"  ⚠ {sheet_name}: no header row found, tree skipped")
+            continue
+        output_data[tree_key] = tree.to_dict()
+        tie_out = output_data[tree_key]["tieOut"]
+        progress.emit('tree', tree=tree_key, lines=len(tree.leaves), checked=tie_out['checked'],
+                      mismatched=tie_out['mismatched'])
+        status = "✓" if not tie_out["mismatched"] else "⚠"
+        print(f"  {status} {tree_key}: {len(tree.leaves)} lines, {tie_out['checked']} totals checked, "
+              f"{len(tie_out['mismatched'])} not tying")
+    
     # Also keep the full grid for backward compatibility
     print("📄 Extracting full grids...")
-    if "Leadschedules" in wb.sheetnames:
-        output_data["Lead"] = extract_grid_data(wb["Leadschedules"])
+    if "Leadschedules" in grids:
+        output_data["Lead"] = grid_rows["Leadschedules"]
         print(f"  ✓ Lead: {len(output_data['Lead'])} rows")
         
-    if "TaxLeadschedules" in wb.sheetnames:
-        output_data["TaxLead"] = extract_grid_data(wb["TaxLeadschedules"])
+    if "TaxLeadschedules" in grids:
+        output_data["TaxLead"] = grid_rows["TaxLeadschedules"]
         print(f"  ✓ TaxLead: {len(output_data['TaxLead'])} rows")
     
-    # Keep existing BS, IS, CF data if present in current file
+    # Keep what extract_financial_statements.py writes to the same file (BS, IS, CF, Analytics, ...)
     print("📊 Preserving standard statements from existing file...")
     existing_file = OUTPUT_DIR / "financial_statements.json"
     if existing_file.exists():
         with open(existing_file, 'r', encoding='utf-8') as f:
             existing = json.load(f)
-            for key in ["BS", "IS", "CF"]:
-                if key in existing:
-                    output_data[key] = existing[key]
+            for key, value in existing.items():
+                if key not in output_data:
+                    output_data[key] = value
                     print(f"  ✓ {key}: preserved")
     
     # Save output
     output_file = OUTPUT_DIR / "financial_statements.json"
     print(f"\n💾 Saving to: {output_file}")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    # ExtractedAt is volatile metadata: the file is only rewritten when the data changed
+    if not publish_json(output_data, str(output_file), compress=False):
+        print("  ✓ Data unchanged, file not rewritten")
+
+    # The statements delta feed is published by extract_financial_statements.py,
+    # which owns financial_statements.json; one shape per feed keeps patches small
     
     print("✅ Extraction complete!")
+    progress.emit('done', source=excel_file.name, output=str(output_file))
     
     # Print summary
     print("\n📊 Summary:")
@@ -302,4 +360,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
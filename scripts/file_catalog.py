@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Persistent catalog of the NLTS-PR source documents.
+
+The extractors need the latest FS workbook (by period, then revision) and the
+PDF with the same base name, which may sit in any subfolder. Instead of
+listing the root and globbing the whole tree on every run, the catalog keeps,
+per directory, its mtime, its subdirectories, the FS workbooks it holds and
+its PDFs, in a JSON file under the run state directory.
+
+refresh() stats each known directory and rescans only those whose mtime
+changed (a directory's mtime changes when entries are added, removed or
+renamed in it), so an unchanged tree costs one stat per directory and no
+listing. Lookups then come from in-memory indexes:
+
+    workbooks   sorted by (period, rev major, rev minor), latest first
+    pdfs        base name (lowercase) -> paths, root first
+
+Hidden directories (.runs, .ocr_cache) are not cataloged.
+
+Usage:
+    python scripts/file_catalog.py            # refresh and print the latest workbook and PDF
+    python scripts/file_catalog.py --rebuild  # rescan every directory
+"""
+
+import os
+import re
+import json
+import argparse
+from datetime import datetime
+
+from publish_stage import write_atomic
+import nlt_config
+
+CATALOG_VERSION = 1
+
+
+def fs_workbook_pattern(prefix):
+    """<prefix> FS MM DD YYYY RevXXX-Y.xlsm, e.g. NLTS-PR FS 12 31 2024 Rev156-3.xlsm."""
+    return re.compile(re.escape(prefix) + r' FS (\d{1,2}) (\d{1,2}) (\d{4}) Rev(\d+)-(\d+)\.xlsm$', re.IGNORECASE)
+
+
+FS_WORKBOOK_PATTERN = fs_workbook_pattern(nlt_config.FS_WORKBOOK_PREFIX)
+
+
+def parse_fs_workbook(filename, pattern=FS_WORKBOOK_PATTERN):
+    """(period date, rev major, rev minor) of an FS workbook name, or None."""
+    match = pattern.match(filename)
+    if not match:
+        return None
+    month, day, year, rev_major, rev_minor = (int(g) for g in match.groups())
+    try:
+        return datetime(year, month, day), rev_major, rev_minor
+    except ValueError:
+        return None
+
+
+class FileCatalog:
+    """Directory-mtime catalog of FS workbooks (root only) and PDFs (whole tree)."""
+
+    def __init__(self, root=None, path=None, prefix=None):
+        self.root = root or nlt_config.NLTS_PR_DIR
+        self.path = path or nlt_config.FILE_CATALOG_JSON
+        self.prefix = prefix or nlt_config.FS_WORKBOOK_PREFIX
+        self.pattern = fs_workbook_pattern(self.prefix)
+        self.dirs = {}
+        self.rescanned = 0
+        self._dirty = False
+        self._workbooks = None
+        self._pdfs = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if (data.get('version') == CATALOG_VERSION and data.get('root') == self.root
+                and data.get('prefix') == self.prefix):
+            self.dirs = data.get('dirs', {})
+
+    def save(self):
+        """Write the catalog if a refresh changed it; returns True if written."""
+        if not self._dirty:
+            return False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        data = {'version': CATALOG_VERSION, 'root': self.root, 'prefix': self.prefix, 'dirs': self.dirs}
+        write_atomic(self.path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        self._dirty = False
+        return True
+
+    def _scan_dir(self, rel, mtime_ns):
+        subdirs, workbooks, pdfs = [], [], []
+        with os.scandir(os.path.join(self.root, rel)) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                lower = entry.name.lower()
+                if lower.endswith('.pdf'):
+                    pdfs.append(entry.name)
+                elif not rel and parse_fs_workbook(entry.name, self.pattern):
+                    workbooks.append(entry.name)
+        return {'mtime': mtime_ns, 'subdirs': sorted(subdirs), 'workbooks': sorted(workbooks), 'pdfs': sorted(pdfs)}
+
+    def refresh(self, rebuild=False):
+        """Bring the catalog up to date; returns the number of directories rescanned."""
+        if not os.path.isdir(self.root):
+            raise FileNotFoundError(f"Source folder not found: {self.root}")
+        seen = {}
+        pending = ['']
+        self.rescanned = 0
+        while pending:
+            rel = pending.pop()
+            try:
+                mtime_ns = os.stat(os.path.join(self.root, rel)).st_mtime_ns
+            except OSError:
+                continue
+            entry = self.dirs.get(rel)
+            if rebuild or entry is None or entry['mtime'] != mtime_ns:
+                try:
+                    entry = self._scan_dir(rel, mtime_ns)
+                except OSError:
+                    continue
+                self.rescanned += 1
+            seen[rel] = entry
+            pending.extend(os.path.join(rel, name) if rel else name for name in entry['subdirs'])
+        if self.rescanned or seen.keys() != self.dirs.keys():
+            self.dirs = seen
+            self._dirty = True
+            self._workbooks = self._pdfs = None
+        return self.rescanned
+
+    def _index(self):
+        if self._workbooks is not None:
+            return
+        workbooks = []
+        for name in self.dirs.get('', {}).get('workbooks', []):
+            period, rev_major, rev_minor = parse_fs_workbook(name, self.pattern)
+            workbooks.append({
+                'date': period, 'rev_major': rev_major, 'rev_minor': rev_minor,
+                'filepath': os.path.join(self.root, name), 'filename': name
+            })
+        workbooks.sort(key=lambda w: (w['date'], w['rev_major'], w['rev_minor']), reverse=True)
+        pdfs = {}
+        # Shallowest directories first, so a PDF in the root wins over copies in subfolders
+        for rel in sorted(self.dirs, key=lambda d: (d.count(os.sep) + bool(d), d)):
+            for name in self.dirs[rel]['pdfs']:
+                pdfs.setdefault(os.path.splitext(name)[0].lower(), []).append(os.path.join(self.root, rel, name))
+        self._workbooks = workbooks
+        self._pdfs = pdfs
+
+    def workbooks(self):
+        """FS workbooks, latest (period, rev major, rev minor) first."""
+        self._index()
+        return self._workbooks
+
+    def latest_workbook(self):
+        """The latest FS workbook's entry (date, rev_major, rev_minor, filepath, filename) or None."""
+        workbooks = self.workbooks()
+        return workbooks[0] if workbooks else None
+
+    def find_pdf(self, base_name):
+        """Path of the PDF named base_name (without extension), preferring the shallowest copy."""
+        self._index()
+        paths = self._pdfs.get(base_name.lower())
+        return paths[0] if paths else None
+
+    def latest_with_pdf(self):
+        """(latest workbook entry, matching PDF path or None)."""
+        latest = self.latest_workbook()
+        if latest is None:
+            return None, None
+        return latest, self.find_pdf(os.path.splitext(latest['filename'])[0])
+
+
+def open_catalog(root=None, path=None, prefix=None):
+    """Load, refresh and persist the catalog in one call."""
+    catalog = FileCatalog(root, path, prefix)
+    catalog.refresh()
+    catalog.save()
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh the NLTS-PR source document catalog.')
+    parser.add_argument('--rebuild', action='store_true', help='Rescan every directory')
+    args = parser.parse_args()
+
+    catalog = FileCatalog()
+    rescanned = catalog.refresh(rebuild=args.rebuild)
+    catalog.save()
+    print(f"Catalog: {len(catalog.dirs)} directories, {rescanned} rescanned ({catalog.path})")
+    latest, pdf = catalog.latest_with_pdf()
+    if latest is None:
+        print("No FS workbooks found.")
+        return
+    print(f"Latest workbook: {latest['filename']} (Rev{latest['rev_major']}-{latest['rev_minor']})")
+    print(f"Matching PDF: {pdf or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Indexed in-memory model of the extracted financial statements.
+
+Built from financial_statements.json (BS/IS/CF lines and the Leadschedules
+pivot), it answers lookups like "total current assets 2024" without walking
+lists of dicts:
+
+- line items and lead rows are slotted records;
+- a hash index maps normalized account names to their lines;
+- a word-prefix trie serves fuzzy lookups ("curr ass" -> Total Current Assets);
+- section subtotals of the detail lines are precomputed per statement;
+- a join index links each Leadschedules account total to its statement line.
+
+Usage:
+    python scripts/financial_model.py "total current assets"
+    python scripts/financial_model.py --search "accounts rec"
+"""
+
+import re
+import json
+import argparse
+from collections import defaultdict
+
+import nlt_config
+from account_tree import classify_pivot_row, PIVOT_LABEL_HEADER
+
+STATEMENT_KEYS = ('BS', 'IS', 'CF')
+LEAD_KEYS = ('Lead', 'TaxLead')
+
+# Lead pivot columns (see account_tree.classify_pivot_row for the outline levels)
+LEAD_CLASS_COL, LEAD_GROUP_COL = 0, 1
+LEAD_FIRST_VALUE_COL = 3
+
+# Subtotal lines: 'Total ...', '... Total', 'Net ...' and computed '... - Net' lines.
+# A comma-qualified account ('Right-of-Use Assets ..., Net') is a detail line.
+# statement_analytics uses the same rule for its sectionTotals.
+TOTAL_LINE_PATTERN = re.compile(r'^\s*(total|net)\b|\btotal\s*$|-\s*net\s*$', re.IGNORECASE)
+
+
+def is_total_line(name):
+    """True for subtotal/total statement lines, which section subtotals skip."""
+    return bool(TOTAL_LINE_PATTERN.search(str(name)))
+
+
+def normalize_account_name(name):
+    """Lowercase, drop punctuation and collapse whitespace: 'Accounts Receivable - Trade' -> 'accounts receivable trade'."""
+    return ' '.join(re.sub(r"[^\w%]+", ' ', str(name).lower()).split())
+
+
+def _strip_total_suffix(key):
+    return key[:-len(' total')] if key.endswith(' total') else key
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+class LineItem:
+    """One statement line (BS/IS/CF)."""
+
+    __slots__ = ('statement', 'position', 'name', 'key', 'section', 'current', 'prior',
+                 'indent', 'hidden', 'is_total', 'lead_rows')
+
+    def __init__(self, statement, position, name, section, current, prior, indent, hidden):
+        self.statement = statement
+        self.position = position
+        self.name = name
+        self.key = normalize_account_name(name)
+        self.section = section
+        self.current = current
+        self.prior = prior
+        self.indent = indent
+        self.hidden = hidden
+        self.is_total = is_total_line(name)
+        self.lead_rows = ()
+
+    def __repr__(self):
+        return f"LineItem({self.statement}:{self.name!r} {self.current} / {self.prior})"
+
+
+class LeadRow:
+    """One Leadschedules pivot row with its values keyed by the sheet's column labels."""
+
+    __slots__ = ('sheet', 'position', 'level', 'code', 'name', 'key', 'group', 'values', 'statement_line')
+
+    def __init__(self, sheet, position, level, code, name, group, values):
+        self.sheet = sheet
+        self.position = position
+        self.level = level
+        self.code = code
+        self.name = name
+        self.key = normalize_account_name(name) if name else ''
+        self.group = group
+        self.values = values
+        self.statement_line = None
+
+    def value(self, label):
+        return self.values.get(label, 0)
+
+    def __repr__(self):
+        return f"LeadRow({self.sheet}:{self.level}:{self.name!r})"
+
+
+def _words_match(words, query_words):
+    """True if the query words are prefixes of consecutive name words ('curr ass' ~ 'total current assets')."""
+    span = len(query_words)
+    return any(all(word.startswith(query) for word, query in zip(words[start:start + span], query_words))
+               for start in range(len(words) - span + 1))
+
+
+class PrefixTrie:
+    """
+    Word-prefix trie: every word suffix of a name is inserted, so a query can
+    match mid-name. A multi-word query walks the trie with its first word and
+    keeps the items whose following words start with the other query words.
+    """
+
+    __slots__ = ('root',)
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, key, item):
+        words = key.split()
+        for start in range(len(words)):
+            node = self.root
+            for char in ' '.join(words[start:]):
+                node = node.setdefault(char, {})
+                node.setdefault('$', []).append((words, item))
+
+    def search(self, prefix):
+        query_words = prefix.split()
+        if not query_words:
+            return []
+        node = self.root
+        for char in query_words[0]:
+            node = node.get(char)
+            if node is None:
+                return []
+        # Each node holds every item below it; de-duplicate names matched by several suffixes
+        seen = set()
+        return [item for words, item in node.get('$', [])
+                if not (id(item) in seen or seen.add(id(item)))
+                and (len(query_words) == 1 or _words_match(words, query_words))]
+
+
+class FinancialModel:
+    """Statement lines, lead rows and their indexes."""
+
+    def __init__(self, data):
+        self.metadata = data.get('Metadata', {})
+        self.years = self._detect_years(data)
+        self.lines = {}
+        self.lead = {}
+        self.lead_labels = {}
+        self._by_key = defaultdict(list)
+        self._by_statement_key = {}
+        self._trie = PrefixTrie()
+        self.subtotals = {}
+
+        for statement in STATEMENT_KEYS:
+            self._load_statement(statement, data.get(statement) or [])
+        for sheet in LEAD_KEYS:
+            self._load_lead(sheet, data.get(sheet) or [])
+        self._compute_subtotals()
+        self._join_lead_to_statements()
+
+    @classmethod
+    def from_json(cls, path=None):
+        with open(path or nlt_config.STATEMENTS_JSON, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _detect_years(data):
+        for statement in STATEMENT_KEYS:
+            for item in data.get(statement) or []:
+                years = sorted((k for k in item if k.isdigit()), reverse=True)
+                if years:
+                    return tuple(years[:2]) if len(years) > 1 else (years[0], None)
+        return ('2024', '2023')
+
+    def _load_statement(self, statement, items):
+        current_year, prior_year = self.years
+        lines = []
+        for position, item in enumerate(items):
+            line = LineItem(
+                statement, position, str(item.get('name', '')).strip(), item.get('section', 'General'),
+                _number(item.get(current_year)), _number(item.get(prior_year)) if prior_year else 0,
+                item.get('indent', 0) or 0, bool(item.get('row_hidden'))
+            )
+            lines.append(line)
+            self._by_key[line.key].append(line)
+            # First occurrence wins, matching how the statements are read top-down
+            self._by_statement_key.setdefault((statement, line.key), line)
+            self._trie.insert(line.key, line)
+        self.lines[statement] = lines
+
+    def _load_lead(self, sheet, rows):
+        labels = None
+        parsed = []
+        group = None
+        account = None
+        for position, row in enumerate(rows):
+            cells = [cell.get('v', '') if isinstance(cell, dict) else cell for cell in row]
+            if len(cells) <= LEAD_FIRST_VALUE_COL:
+                continue
+            group_cell = cells[LEAD_GROUP_COL]
+
+            if labels is None:
+                if cells[LEAD_CLASS_COL] == PIVOT_LABEL_HEADER:
+                    labels = [str(v).lstrip(':') for v in cells[LEAD_FIRST_VALUE_COL:]]
+                continue
+
+            values = {label: _number(v) for label, v in zip(labels, cells[LEAD_FIRST_VALUE_COL:]) if label}
+
+            kind, code, name = classify_pivot_row(cells)
+            if kind == 'account_code':
+                if account is not None:
+                    account.code = code
+                continue
+            if kind in (None, 'group_code'):
+                continue
+            if kind == 'total':
+                # Totals of accounts are in the account column, of groups and classes in the group column
+                level = 'group_total' if isinstance(group_cell, str) and group_cell else 'account_total'
+                row = LeadRow(sheet, position, level, account.code if account and level == 'account_total' else None,
+                              name, group, values)
+            elif kind == 'class':
+                row = LeadRow(sheet, position, 'class', code, name, None, values)
+            elif kind == 'group':
+                group = name
+                row = LeadRow(sheet, position, 'group', None, name, group, values)
+            elif kind == 'detail':
+                row = LeadRow(sheet, position, 'detail', account and account.code, name, group, values)
+            else:
+                row = account = LeadRow(sheet, position, 'account', code, name, group, values)
+            parsed.append(row)
+        self.lead[sheet] = parsed
+        self.lead_labels[sheet] = labels or []
+
+    def _compute_subtotals(self):
+        """Sum of the detail (non-total) lines of each statement section."""
+        for statement, lines in self.lines.items():
+            sections = {}
+            for line in lines:
+                if line.is_total:
+                    continue
+                totals = sections.setdefault(line.section, [0, 0])
+                totals[0] += line.current
+                totals[1] += line.prior
+            self.subtotals[statement] = {section: tuple(totals) for section, totals in sections.items()}
+
+    def _join_lead_to_statements(self):
+        """Link lead account totals to the statement line of the same account (BS first, then IS)."""
+        joined = defaultdict(list)
+        for sheet, rows in self.lead.items():
+            for row in rows:
+                if row.level != 'account_total':
+                    continue
+                key = _strip_total_suffix(row.key)
+                for statement in ('BS', 'IS'):
+                    line = self._by_statement_key.get((statement, key))
+                    if line is not None:
+                        row.statement_line = line
+                        joined[id(line)].append(row)
+                        break
+        for lines in self.lines.values():
+            for line in lines:
+                line.lead_rows = tuple(joined.get(id(line), ()))
+
+    # -- queries -------------------------------------------------------------
+
+    def get(self, name, statement=None):
+        """Exact lookup by account name (normalized); first match across statements if none given."""
+        key = normalize_account_name(name)
+        if statement:
+            return self._by_statement_key.get((statement, key))
+        matches = self._by_key.get(key)
+        return matches[0] if matches else None
+
+    def match(self, pattern, statement=None):
+        """First line whose normalized name matches the compiled pattern, in statement order."""
+        statements = (statement,) if statement else STATEMENT_KEYS
+        for key in statements:
+            for line in self.lines.get(key, ()):
+                if pattern.search(line.key):
+                    return line
+        return None
+
+    def value(self, name, year=None, statement=None):
+        """Amount of an account for year (defaults to the current year); None if the account or year is not found."""
+        line = self.get(name, statement)
+        if line is None:
+            return None
+        if year is None or str(year) == self.years[0]:
+            return line.current
+        if str(year) == self.years[1]:
+            return line.prior
+        return None
+
+    def search(self, prefix, statement=None, limit=10):
+        """Fuzzy lookup: lines whose consecutive words start with the prefix's words, shortest names first."""
+        matches = self._trie.search(normalize_account_name(prefix))
+        if statement:
+            matches = [line for line in matches if line.statement == statement]
+        return sorted(matches, key=lambda line: (len(line.key), line.statement, line.position))[:limit]
+
+    def lookup(self, name, statement=None):
+        """Exact match if there is one, else the best fuzzy match."""
+        line = self.get(name, statement)
+        if line is not None:
+            return line
+        matches = self.search(name, statement, limit=1)
+        return matches[0] if matches else None
+
+    def subtotal(self, statement, section):
+        """(current, prior) sum of the detail lines in a statement section."""
+        return self.subtotals.get(statement, {}).get(section, (0, 0))
+
+    def drill_down(self, name, statement=None):
+        """Lead rows (account totals) behind a statement line."""
+        line = self.lookup(name, statement)
+        return line.lead_rows if line is not None else ()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the extracted financial statements')
+    parser.add_argument('name', help='Account name (exact or prefix)')
+    parser.add_argument('--json', dest='json_path', default=nlt_config.STATEMENTS_JSON,
+                        help=f'financial_statements.json to load (default: {nlt_config.STATEMENTS_JSON})')
+    parser.add_argument('--statement', choices=STATEMENT_KEYS, help='Restrict to one statement')
+    parser.add_argument('--search', action='store_true', help='List every prefix match instead of the best one')
+    args = parser.parse_args()
+
+    model = FinancialModel.from_json(args.json_path)
+    current_year, prior_year = model.years
+    lines = model.search(args.name, args.statement) if args.search else [model.lookup(args.name, args.statement)]
+    lines = [line for line in lines if line is not None]
+    if not lines:
+        print(f"No account matching '{args.name}'")
+        return
+
+    for line in lines:
+        print(f"[{line.statement}] {line.name} ({line.section}): "
+              f"{current_year} {line.current:,.2f} | {prior_year} {line.prior:,.2f}")
+        for row in line.lead_rows:
+            print(f"    {row.sheet} {row.code}: {row.name} -> Current {row.value('Current'):,.2f}")
+
+
+if __name__ == '__main__':
+    main()
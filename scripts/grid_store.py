@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Compact cell storage for the grid extractors (Leadschedules, TaxLeadschedules).
+
+A sheet read cell by cell into {"v": ..., "f": ...} dicts costs a dict, a
+value and a format string reference per cell, including the empty ones, and
+most of a leadschedule grid is empty. GridStore keeps a whole grid in a few
+flat arrays instead:
+
+- one interned format id (array 'H') per cell, in row-major order;
+- for non-empty cells only, CSR-style: column index, a type tag, and the
+  value in a typed array (floats and ints in array 'd', strings in a list).
+
+Rows failing the keep test are truncated back off the arrays, so nothing
+outlives them. The output dicts are only built by to_rows() when the
+extractor assembles its JSON.
+"""
+
+from array import array
+from datetime import datetime
+
+KIND_FLOAT, KIND_INT, KIND_BOOL, KIND_STR = 0, 1, 2, 3
+DEFAULT_FORMAT = 'General'
+
+# Row keep tests: any truthy value (extract_grid_data) or any non-None cell (extract_table_sheet)
+KEEP_TRUTHY = 'truthy'
+KEEP_NOT_NONE = 'not_none'
+
+# Integers beyond this lose precision as doubles and are stored as strings
+MAX_EXACT_INT = 2 ** 53
+
+
+class GridStore:
+    """Row-major grid of (value, format) cells with nothing allocated for empty cells."""
+
+    __slots__ = ('n_cols', 'formats', '_format_ids', 'cell_formats', 'row_ends',
+                 'row_widths', 'cols', 'kinds', 'slots', 'nums', 'strs', 'source_rows')
+
+    def __init__(self, n_cols):
+        self.n_cols = n_cols
+        self.formats = [DEFAULT_FORMAT]
+        self._format_ids = {DEFAULT_FORMAT: 0}
+        self.cell_formats = array('H')   # n_rows * n_cols format ids
+        self.row_ends = array('I')       # end offset of each row's non-empty cells
+        self.row_widths = array('B')     # cells the sheet yielded for each row
+        self.cols = array('B')           # column of each non-empty cell
+        self.kinds = array('B')          # KIND_* tag of each non-empty cell
+        self.slots = array('I')          # index into nums or strs
+        self.nums = array('d')
+        self.strs = []
+        self.source_rows = array('I')    # 1-based sheet row of each kept row
+
+    def __len__(self):
+        return len(self.row_ends)
+
+    def _format_id(self, fmt):
+        fmt_id = self._format_ids.get(fmt)
+        if fmt_id is None:
+            fmt_id = self._format_ids[fmt] = len(self.formats)
+            self.formats.append(fmt)
+        return fmt_id
+
+    def add_row(self, cells, source_row=0, keep=KEEP_TRUTHY):
+        """
+        Append one row of openpyxl cells; returns True if the row was kept.
+        Values are normalized like the extractors always did: dates to
+        'YYYY-MM-DD HH:MM:SS' strings, other non-JSON types to str().
+        """
+        cell_start = len(self.kinds)
+        num_start = len(self.nums)
+        str_start = len(self.strs)
+        format_start = len(self.cell_formats)
+        kept = False
+
+        # Bound methods hoisted out of the per-cell loop
+        format_ids = self._format_ids
+        append_format = self.cell_formats.append
+        append_col = self.cols.append
+        append_kind = self.kinds.append
+        append_slot = self.slots.append
+        nums = self.nums
+        strs = self.strs
+        keep_any = keep == KEEP_NOT_NONE
+        n_cols = self.n_cols
+
+        col = 0
+        for cell in cells:
+            if col >= n_cols:
+                break
+            if cell is None:
+                append_format(0)
+                col += 1
+                continue
+            fmt = cell.number_format
+            fmt_id = format_ids.get(fmt)
+            if fmt_id is None:
+                fmt_id = self._format_id(fmt) if fmt else 0
+            append_format(fmt_id)
+            value = cell.value
+            if value is not None:
+                if keep_any or value:
+                    kept = True
+                value_type = type(value)
+                if value_type is float:
+                    append_col(col)
+                    append_kind(KIND_FLOAT)
+                    append_slot(len(nums))
+                    nums.append(value)
+                elif value_type is int and -MAX_EXACT_INT < value < MAX_EXACT_INT:
+                    append_col(col)
+                    append_kind(KIND_INT)
+                    append_slot(len(nums))
+                    nums.append(value)
+                elif value_type is str:
+                    if value:
+                        append_col(col)
+                        append_kind(KIND_STR)
+                        append_slot(len(strs))
+                        strs.append(value)
+                else:
+                    append_col(col)
+                    self._append_other(value)
+            col += 1
+        # Short rows are padded so every row has n_cols format ids (fixed stride)
+        for _ in range(col, n_cols):
+            append_format(0)
+
+        if not kept:
+            del self.cell_formats[format_start:]
+            del self.cols[cell_start:]
+            del self.kinds[cell_start:]
+            del self.slots[cell_start:]
+            del nums[num_start:]
+            del strs[str_start:]
+            return False
+        self.row_ends.append(len(self.kinds))
+        self.row_widths.append(col)
+        self.source_rows.append(source_row)
+        return True
+
+    def _append_other(self, value):
+        """Bools, large ints, dates and anything else (the column is already appended)."""
+        if isinstance(value, bool):
+            self.kinds.append(KIND_BOOL)
+            self.slots.append(len(self.nums))
+            self.nums.append(1.0 if value else 0.0)
+            return
+        if isinstance(value, int) and -MAX_EXACT_INT < value < MAX_EXACT_INT:
+            self.kinds.append(KIND_INT)
+            self.slots.append(len(self.nums))
+            self.nums.append(value)
+            return
+        if isinstance(value, float):
+            # float subclasses (e.g. numpy.float64)
+            self.kinds.append(KIND_FLOAT)
+            self.slots.append(len(self.nums))
+            self.nums.append(value)
+            return
+        if isinstance(value, datetime):
+            value = value.strftime("%Y-%m-%d %H:%M:%S")
+        else:
+            value = str(value)
+        self.kinds.append(KIND_STR)
+        self.slots.append(len(self.strs))
+        self.strs.append(value)
+
+    def _decode(self, i):
+        kind = self.kinds[i]
+        slot = self.slots[i]
+        if kind == KIND_STR:
+            return self.strs[slot]
+        if kind == KIND_INT:
+            return int(self.nums[slot])
+        if kind == KIND_BOOL:
+            return self.nums[slot] != 0.0
+        return self.nums[slot]
+
+    def _row_span(self, row):
+        return (self.row_ends[row - 1] if row else 0), self.row_ends[row]
+
+    def value(self, row, col):
+        """Value of one cell ('' when empty)."""
+        start, end = self._row_span(row)
+        for i in range(start, end):
+            if self.cols[i] == col:
+                return self._decode(i)
+        return ''
+
+    def row_values(self, row):
+        """Values of one row as a list ('' for empty cells)."""
+        values = [''] * self.row_widths[row]
+        start, end = self._row_span(row)
+        for i in range(start, end):
+            values[self.cols[i]] = self._decode(i)
+        return values
+
+    def row_dicts(self, row):
+        """One row in the output format: [{"v": value, "f": format}, ...]."""
+        formats = self.formats
+        cell_formats = self.cell_formats
+        base = row * self.n_cols
+        cells = [{"v": "", "f": formats[cell_formats[base + c]]} for c in range(self.row_widths[row])]
+        start, end = self._row_span(row)
+        cols, kinds, slots, nums, strs = self.cols, self.kinds, self.slots, self.nums, self.strs
+        for i in range(start, end):
+            kind = kinds[i]
+            if kind == KIND_FLOAT:
+                value = nums[slots[i]]
+            elif kind == KIND_STR:
+                value = strs[slots[i]]
+            else:
+                value = self._decode(i)
+            cells[cols[i]]["v"] = value
+        return cells
+
+    def to_rows(self, rows=None):
+        """Build the output rows (all, or the given row indexes)."""
+        indexes = range(len(self)) if rows is None else rows
+        return [self.row_dicts(row) for row in indexes]
+
+    def nbytes(self):
+        """Approximate bytes held by the arrays and string list (excluding the strings)."""
+        return sum(a.itemsize * len(a) for a in (
+            self.cell_formats, self.row_ends, self.row_widths, self.cols, self.kinds, self.slots, self.nums, self.source_rows
+        )) + 8 * len(self.strs)
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Async JSON-RPC client for the NotebookLM MCP server.
+
+One McpClient keeps a single MCP session (the server child process over
+stdio, newline-delimited JSON-RPC) alive for many requests:
+
+    pipelining      requests are written as soon as they are made and matched
+                    to their responses by id, so slow queries do not hold up
+                    fast ones
+    backpressure    at most max_in_flight requests are outstanding; callers
+                    beyond that wait for a slot, and writes wait for the pipe
+                    to drain
+    timeouts        each request has a deadline; on timeout (or when the
+                    caller is cancelled) the server is sent
+                    notifications/cancelled and the caller gets McpTimeout
+    reconnect       if the child exits, outstanding requests fail with
+                    McpConnectionError and the next request respawns and
+                    re-initializes the session (with backoff); requests that
+                    failed that way are retried up to `retries` times
+    latency         a log-bucketed histogram per method, plus outcome counts
+
+Usage:
+    python scripts/mcp_client.py --list
+    python scripts/mcp_client.py --query "Summarize the 2024 liquidity"
+    python scripts/mcp_client.py --stub --bench 200 --concurrency 16
+    python scripts/mcp_client.py --stub --bench 50 --stub-args "--crash-after 20" --json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shlex
+import asyncio
+import argparse
+from bisect import bisect_left
+
+import nlt_config
+
+PROTOCOL_VERSION = '2024-11-05'
+CLIENT_INFO = {'name': 'nlt-dashboard', 'version': '1.0'}
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_RETRIES = 1
+RECONNECT_ATTEMPTS = 3
+RECONNECT_DELAY = 0.5
+# Milliseconds; the last bucket catches everything slower
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000, 120000)
+
+
+class McpError(RuntimeError):
+    """A JSON-RPC error response, or a tool result flagged isError."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+class McpTimeout(McpError, TimeoutError):
+    """The request passed its deadline and was cancelled on the server."""
+
+
+class McpConnectionError(McpError, ConnectionError):
+    """The server process exited or could not be started."""
+
+
+class LatencyHistogram:
+    """Counts of latencies per bucket (upper bounds in ms) with percentile estimates."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms):
+        self.counts[bisect_left(self.buckets, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile (the max for the overflow bucket)."""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'meanMs': round(self.total_ms / self.count, 2) if self.count else None,
+            'p50Ms': self.percentile(50),
+            'p90Ms': self.percentile(90),
+            'p99Ms': self.percentile(99),
+            'maxMs': round(self.max_ms, 2),
+            'buckets': {f"le{bound}": n for bound, n in zip(self.buckets, self.counts) if n},
+            'overflow': self.counts[-1],
+        }
+
+
+class McpClient:
+    """A long-lived, pipelined MCP session over a child process's stdio."""
+
+    def __init__(self, command=None, timeout=DEFAULT_TIMEOUT, max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+                 retries=DEFAULT_RETRIES):
+        self.command = command or [nlt_config.MCP_PYTHON, '-m', nlt_config.MCP_MODULE]
+        self.timeout = timeout
+        self.retries = retries
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._connect_lock = asyncio.Lock()
+        self._process = None
+        self._reader = None
+        self._pending = {}
+        self._next_id = 0
+        self.server_info = None
+        self.connects = 0
+        self.histograms = {}
+        self.outcomes = {'ok': 0, 'error': 0, 'timeout': 0, 'cancelled': 0, 'disconnected': 0, 'retried': 0}
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def connected(self):
+        return self._process is not None and self._process.returncode is None
+
+    async def connect(self):
+        """Start the server and run the initialize handshake, unless already connected."""
+        async with self._connect_lock:
+            if self.connected:
+                return
+            delay = RECONNECT_DELAY
+            for attempt in range(1, RECONNECT_ATTEMPTS + 1):
+                try:
+                    await self._start()
+                    return
+                except (OSError, McpError) as e:
+                    await self._stop()
+                    if attempt == RECONNECT_ATTEMPTS:
+                        raise McpConnectionError(f"Could not start the MCP server: {e}") from e
+                    await asyncio.sleep(delay)
+                    delay *= 2
+
+    async def _start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            *self.command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            limit=16 * 1024 * 1024)
+        self._reader = asyncio.ensure_future(self._read_loop(self._process))
+        self.connects += 1
+        self.server_info = await self._call('initialize', {
+            'protocolVersion': PROTOCOL_VERSION, 'capabilities': {}, 'clientInfo': CLIENT_INFO
+        }, self.timeout)
+        await self._send({'jsonrpc': '2.0', 'method': 'notifications/initialized', 'params': {}})
+
+    async def _read_loop(self, process):
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue  # log noise on stdout
+                future = self._pending.pop(message.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in message:
+                    error = message['error'] or {}
+                    future.set_exception(McpError(error.get('message', str(error)), error.get('code')))
+                else:
+                    future.set_result(message.get('result'))
+        finally:
+            # The child is gone: fail what is still waiting on it
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(McpConnectionError('MCP server exited'))
+            self._pending.clear()
+            if self._process is process:
+                self._process = None
+
+    async def _send(self, message):
+        process = self._process
+        if process is None:
+            raise McpConnectionError('Not connected')
+        try:
+            process.stdin.write(json.dumps(message).encode('utf-8') + b'\n')
+            await process.stdin.drain()
+        except (ConnectionError, BrokenPipeError) as e:
+            raise McpConnectionError(f"Write failed: {e}") from e
+
+    async def _call(self, method, params, timeout):
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method, 'params': params})
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            await self._cancel_on_server(request_id, 'timeout')
+            raise McpTimeout(f"{method} timed out after {timeout:g}s") from None
+        except asyncio.CancelledError:
+            await asyncio.shield(self._cancel_on_server(request_id, 'cancelled by client'))
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _cancel_on_server(self, request_id, reason):
+        if self.connected:
+            try:
+                await self._send({'jsonrpc': '2.0', 'method': 'notifications/cancelled',
+                                  'params': {'requestId': request_id, 'reason': reason}})
+            except McpConnectionError:
+                pass
+
+    async def request(self, method, params=None, timeout=None):
+        """Send one request and wait for its result (pipelined with other callers)."""
+        timeout = self.timeout if timeout is None else timeout
+        histogram = self.histograms.setdefault(method, LatencyHistogram())
+        async with self._slots:
+            attempt = 0
+            while True:
+                if not self.connected:
+                    await self.connect()
+                started = time.perf_counter()
+                try:
+                    result = await self._call(method, params or {}, timeout)
+                except McpTimeout:
+                    self.outcomes['timeout'] += 1
+                    raise
+                except McpConnectionError:
+                    self.outcomes['disconnected'] += 1
+                    if attempt >= self.retries:
+                        raise
+                    attempt += 1
+                    self.outcomes['retried'] += 1
+                    continue
+                except McpError:
+                    self.outcomes['error'] += 1
+                    raise
+                except asyncio.CancelledError:
+                    self.outcomes['cancelled'] += 1
+                    raise
+                histogram.record((time.perf_counter() - started) * 1000)
+                self.outcomes['ok'] += 1
+                return result
+
+    async def call_tool(self, name, arguments=None, timeout=None):
+        """Call an MCP tool and return the text of its first content block."""
+        result = await self.request('tools/call', {'name': name, 'arguments': arguments or {}}, timeout)
+        content = (result or {}).get('content') or []
+        text = content[0].get('text', '') if content else ''
+        if (result or {}).get('isError'):
+            raise McpError(text or f"{name} failed")
+        return text
+
+    async def close(self):
+        async with self._connect_lock:
+            await self._stop()
+
+    async def _stop(self):
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            process.stdin.close()
+            try:
+                await asyncio.wait_for(process.wait(), 2)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+
+    def stats(self):
+        return {
+            'connects': self.connects,
+            'outcomes': dict(self.outcomes),
+            'latency': {method: h.summary() for method, h in self.histograms.items()},
+        }
+
+
+def pick_notebook(text):
+    """The notebook id notebook_list's text points to, preferring titles with 'nlt' (as server/index.js)."""
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        parsed = None
+    notebooks = []
+    if isinstance(parsed, list):
+        notebooks = parsed
+    elif isinstance(parsed, dict):
+        notebooks = parsed.get('notebooks') or ([parsed] if parsed.get('id') else [])
+    if notebooks:
+        target = next((n for n in notebooks if 'nlt' in (n.get('title') or '').lower()), notebooks[0])
+        return target.get('id') or target.get('notebook_id')
+    match = (re.search(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', text, re.IGNORECASE)
+             or re.search(r'ID:\s*([^\s)]+)', text))
+    if not match:
+        return None
+    return match.group(1) if match.groups() else match.group(0)
+
+
+class NotebookSession:
+    """notebook_query against the dashboard's notebook over one McpClient."""
+
+    def __init__(self, client):
+        self.client = client
+        self.notebook_id = None
+
+    async def discover(self):
+        if self.notebook_id is None:
+            self.notebook_id = pick_notebook(await self.client.call_tool('notebook_list'))
+            if self.notebook_id is None:
+                raise McpError('Could not find a notebook in notebook_list')
+        return self.notebook_id
+
+    async def query(self, text, timeout=None):
+        notebook_id = await self.discover()
+        return await self.client.call_tool('notebook_query', {'notebook_id': notebook_id, 'query': text}, timeout)
+
+
+def stub_command(extra_args=''):
+    stub = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mcp_stub_server.py')
+    return [sys.executable, stub] + shlex.split(extra_args)
+
+
+async def run_bench(session, count, concurrency, timeout):
+    """count queries with at most `concurrency` callers at a time; returns (ok, failed, seconds)."""
+    gate = asyncio.Semaphore(concurrency)
+    failures = []
+
+    async def one(i):
+        async with gate:
+            try:
+                await session.query(f'Benchmark question {i}', timeout)
+            except McpError as e:
+                failures.append(str(e))
+
+    await session.discover()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return count - len(failures), failures, time.perf_counter() - started
+
+
+async def run(args):
+    command = stub_command(args.stub_args) if args.stub else None
+    async with McpClient(command, timeout=args.timeout, max_in_flight=args.max_in_flight) as client:
+        session = NotebookSession(client)
+        if args.list:
+            print(await client.call_tool('notebook_list'))
+        if args.query:
+            print(await session.query(args.query))
+        if args.bench:
+            ok, failures, seconds = await run_bench(session, args.bench, args.concurrency, args.timeout)
+            print(f"{ok}/{args.bench} queries in {seconds:.2f}s "
+                  f"({args.bench / seconds:.1f}/s, {args.concurrency} callers, {args.max_in_flight} in flight)")
+            for failure in sorted(set(failures)):
+                print(f"  failed: {failure}")
+        stats = client.stats()
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print(f"Session: {stats['connects']} connect(s), outcomes {stats['outcomes']}")
+        for method, summary in stats['latency'].items():
+            print(f"  {method:<12} n={summary['count']} mean={summary['meanMs']}ms "
+                  f"p50<={summary['p50Ms']}ms p90<={summary['p90Ms']}ms p99<={summary['p99Ms']}ms max={summary['maxMs']}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the NotebookLM MCP server over one pipelined session.')
+    parser.add_argument('--list', action='store_true', help='List the notebooks')
+    parser.add_argument('--query', default=None, help="Ask the dashboard's notebook a question")
+    parser.add_argument('--bench', type=int, default=0, help='Send this many concurrent queries and report latency')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent callers for --bench')
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT, help='Outstanding requests allowed')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Per-request timeout in seconds')
+    parser.add_argument('--stub', action='store_true', help='Talk to scripts/mcp_stub_server.py instead of NotebookLM')
+    parser.add_argument('--stub-args', default='', help="Arguments for the stub server, e.g. '--delay 0.1 --crash-after 20'")
+    parser.add_argument('--json', action='store_true', help='Print the session statistics as JSON')
+    args = parser.parse_args(argv)
+    if not (args.list or args.query or args.bench):
+        args.list = True
+    try:
+        asyncio.run(run(args))
+    except McpError as e:
+        print(f"MCP error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
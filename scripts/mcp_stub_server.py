@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the NotebookLM MCP server (notebooklm_tools.mcp.server).
+
+Speaks the same newline-delimited JSON-RPC over stdin/stdout and answers
+initialize, tools/list and the notebook_list / notebook_query tools, so
+mcp_client.py and the summary batch can be exercised without NotebookLM.
+Requests are handled concurrently and answered out of order when their
+delays differ; notifications/cancelled stops the matching request.
+
+Fault injection for the client's timeout and reconnect paths:
+    --delay / --jitter    seconds before each notebook_query answer
+    --hang-on TEXT        never answer queries containing TEXT
+    --crash-after N       exit after N tool calls (the client must reconnect)
+
+Usage:
+    python scripts/mcp_stub_server.py --delay 0.05 --jitter 0.05
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+import threading
+
+STUB_NOTEBOOKS = [
+    {'id': '00000000-0000-4000-8000-000000000001', 'title': 'NLTS-PR Financial Statements'},
+    {'id': '00000000-0000-4000-8000-000000000002', 'title': 'Scratch'},
+]
+
+
+class StubServer:
+    def __init__(self, delay=0.05, jitter=0.0, hang_on=None, crash_after=None):
+        self.delay = delay
+        self.jitter = jitter
+        self.hang_on = hang_on
+        self.crash_after = crash_after
+        self.tool_calls = 0
+        self.tasks = {}
+
+    def send(self, message):
+        sys.stdout.write(json.dumps(message) + '\n')
+        sys.stdout.flush()
+
+    def reply(self, request_id, result=None, error=None):
+        message = {'jsonrpc': '2.0', 'id': request_id}
+        if error is not None:
+            message['error'] = error
+        else:
+            message['result'] = result
+        self.send(message)
+
+    async def call_tool(self, name, arguments):
+        self.tool_calls += 1
+        if self.crash_after is not None and self.tool_calls > self.crash_after:
+            # Simulate the child dying mid-session
+            os._exit(3)
+        if name == 'notebook_list':
+            return {'content': [{'type': 'text', 'text': json.dumps({'notebooks': STUB_NOTEBOOKS})}]}
+        if name == 'notebook_query':
+            query = arguments.get('query', '')
+            if self.hang_on and self.hang_on in query:
+                await asyncio.Event().wait()
+            await asyncio.sleep(self.delay + random.uniform(0, self.jitter))
+            answer = f"Stub answer ({len(query)} chars) from {arguments.get('notebook_id')}"
+            return {'content': [{'type': 'text', 'text': json.dumps({'status': 'success', 'answer': answer})}]}
+        return {'content': [{'type': 'text', 'text': f'Unknown tool: {name}'}], 'isError': True}
+
+    async def handle(self, message):
+        request_id = message.get('id')
+        method = message.get('method')
+        params = message.get('params') or {}
+        try:
+            if method == 'initialize':
+                result = {'protocolVersion': params.get('protocolVersion', '2024-11-05'),
+                          'capabilities': {'tools': {}},
+                          'serverInfo': {'name': 'nlt-mcp-stub', 'version': '1.0'}}
+            elif method == 'tools/list':
+                result = {'tools': [{'name': 'notebook_list'}, {'name': 'notebook_query'}]}
+            elif method == 'tools/call':
+                result = await self.call_tool(params.get('name'), params.get('arguments') or {})
+            elif method == 'ping':
+                result = {}
+            else:
+                self.reply(request_id, error={'code': -32601, 'message': f'Method not found: {method}'})
+                return
+            self.reply(request_id, result)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.tasks.pop(request_id, None)
+
+    def dispatch(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            self.reply(None, error={'code': -32700, 'message': 'Parse error'})
+            return
+        if message.get('method') == 'notifications/cancelled':
+            task = self.tasks.get((message.get('params') or {}).get('requestId'))
+            if task:
+                task.cancel()
+            return
+        if 'id' not in message:
+            return  # other notifications (notifications/initialized)
+        self.tasks[message['id']] = asyncio.ensure_future(self.handle(message))
+
+
+async def serve(server):
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+
+    # A thread reads stdin so this works with any event loop (pipes on Windows too)
+    def read_stdin():
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, None)
+
+    threading.Thread(target=read_stdin, daemon=True).start()
+    while True:
+        line = await lines.get()
+        if line is None:
+            break
+        if line.strip():
+            server.dispatch(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stub NotebookLM MCP server (JSON-RPC over stdio).')
+    parser.add_argument('--delay', type=float, default=0.05, help='Seconds before each query answer')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random delay up to this many seconds')
+    parser.add_argument('--hang-on', default=None, help='Never answer queries containing this text')
+    parser.add_argument('--crash-after', type=int, default=None, help='Exit after this many tool calls')
+    args = parser.parse_args(argv)
+    asyncio.run(serve(StubServer(args.delay, args.jitter, args.hang_on, args.crash_after)))
+
+
+if __name__ == '__main__':
+    main()
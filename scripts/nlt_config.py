@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Shared configuration for the NLT-PR extractors.
+
+Every extractor reads its source folder and output locations from here instead
+of hard-coding them. The defaults match the workstation layout (D:\\NLTS-PR
+and this repository); NLTS_PR_DIR, NLT_DASHBOARD_ROOT and NLT_MCP_PYTHON
+override them.
+
+This module must stay import-light: nlt_extract imports it for every command,
+including --help.
+"""
+
+import os
+
+REPO_ROOT = os.environ.get('NLT_DASHBOARD_ROOT') or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NLTS_PR_DIR = os.environ.get('NLTS_PR_DIR', r'D:\NLTS-PR')
+COMPANY_NAME = os.environ.get('NLT_COMPANY_NAME', 'National Lift Truck Service of PR, Inc.')
+
+# NotebookLM MCP server (the same interpreter and module server/index.js spawns)
+MCP_PYTHON = os.environ.get('NLT_MCP_PYTHON', r'C:\Users\cpari\.gemini\antigravity\GoogleNotebookLM\.venv\Scripts\python.exe')
+MCP_MODULE = 'notebooklm_tools.mcp.server'
+
+# Source documents
+# Workbooks are named '<prefix> FS MM DD YYYY RevXXX-Y.xlsm'
+FS_WORKBOOK_PREFIX = 'NLTS-PR'
+
+# Dashboard outputs
+DATA_DIR = os.path.join(REPO_ROOT, 'src', 'data')
+PUBLIC_DATA_DIR = os.path.join(REPO_ROOT, 'public', 'data')
+PUBLIC_DOCS_DIR = os.path.join(REPO_ROOT, 'public', 'documents')
+STATEMENTS_JSON = os.path.join(DATA_DIR, 'financial_statements.json')
+STATEMENTS_FEED_DIR = os.path.join(PUBLIC_DATA_DIR, 'statements')
+COMPLIANCE_DOCS_JSON = os.path.join(PUBLIC_DATA_DIR, 'compliance_docs.json')
+
+# Outputs and state kept next to the source documents (read by server/index.js)
+RATIOS_JSON = os.path.join(NLTS_PR_DIR, 'dynamic_ratios.json')
+CONTEXT_PACKS_JSON = os.path.join(NLTS_PR_DIR, 'context_packs.json')
+RUN_STATE_DIR = os.path.join(NLTS_PR_DIR, '.runs')
+FILE_CATALOG_JSON = os.path.join(RUN_STATE_DIR, 'file_catalog.json')
+OCR_CACHE_DIR = os.path.join(NLTS_PR_DIR, '.ocr_cache')
+SUMMARY_CACHE_DIR = os.path.join(RUN_STATE_DIR, 'summaries')
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the NLT-PR extractors.
+
+    nlt-extract ratios [--force]           Ratios sheet -> dynamic_ratios.json
+    nlt-extract statements [--workers N]   BS/IS/CF + lead grids -> financial_statements.json
+    nlt-extract leadschedules [--workers N]
+    nlt-extract scan [--no-ocr]            Compliance documents -> compliance_docs.json
+    nlt-extract portfolio --portfolio F    All of the above for many clients, plus percentiles
+    nlt-extract summaries [--stub]         Executive summaries + analyses, concurrent and cached
+    nlt-extract packs [--budget N]         Token-budgeted chat context packs -> context_packs.json
+    nlt-extract publish                    Full publish run (scripts/publish_update.js)
+
+Paths come from nlt_config (NLTS_PR_DIR / NLT_DASHBOARD_ROOT override them).
+Only the chosen subcommand's module is imported, and the extractors import
+openpyxl, the OCR pool and the process pool when they first need them, so
+`nlt-extract <cmd> --help` and the cached paths start without loading them.
+Measure with: python scripts/bench_startup.py
+"""
+
+import os
+import sys
+import importlib
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPTS_DIR)
+
+# name: (directory, module, summary); modules expose main(argv=None)
+SUBCOMMANDS = {
+    'ratios': (os.path.join(REPO_DIR, 'server'), 'extract_dynamic_ratios',
+               'Extract the ratios from the latest FS workbook'),
+    'statements': (SCRIPTS_DIR, 'extract_financial_statements',
+                   'Extract BS/IS/CF and the lead grids from the latest FS workbook'),
+    'leadschedules': (SCRIPTS_DIR, 'extract_financials',
+                      'Extract the Leadschedules sections and account trees'),
+    'scan': (SCRIPTS_DIR, 'scan_compliance_docs',
+             'Scan the compliance documents (dates, OCR)'),
+    'portfolio': (SCRIPTS_DIR, 'portfolio',
+                  'Run the extractors for many clients (per-client outputs, percentiles)'),
+    'summaries': (SCRIPTS_DIR, 'summary_batch',
+                  'Generate the bilingual executive summaries and analyses (cached)'),
+    'packs': (SCRIPTS_DIR, 'context_packs',
+              'Precompile the chat context packs from statements, ratios and documents'),
+    'publish': (None, os.path.join('scripts', 'publish_update.js'),
+                'Run the full publish flow (server, sync, extraction)'),
+}
+
+
+def usage():
+    lines = ['usage: nlt-extract <command> [options]', '', 'commands:']
+    lines += [f"  {name:<15}{summary}" for name, (_, _, summary) in SUBCOMMANDS.items()]
+    lines += ['', "Run 'nlt-extract <command> --help' for the command's options."]
+    return '\n'.join(lines)
+
+
+def run_publish(script, argv):
+    import subprocess
+    return subprocess.call(['node', script] + argv, cwd=REPO_DIR)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    name, rest = argv[0], argv[1:]
+    if name not in SUBCOMMANDS:
+        print(f"nlt-extract: unknown command '{name}'\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    directory, module_name, _ = SUBCOMMANDS[name]
+    if directory is None:
+        return run_publish(module_name, rest)
+
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    sys.argv = [f'nlt-extract {name}'] + rest
+    module = importlib.import_module(module_name)
+    module.main(rest)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
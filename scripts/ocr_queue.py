@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Background OCR queue for scanned PDFs without a text layer.
+
+Files are keyed by the SHA-256 of their contents and the OCR text is cached
+permanently on disk, so every distinct scan is OCR'd exactly once and later
+compliance scans reuse the cached text at the cost of one hash.
+
+The local engine is poppler's pdftoppm (first page to PNG) followed by
+tesseract; both must be on PATH.
+"""
+
+import os
+import json
+import glob
+import shutil
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from publish_stage import hash_file
+
+OCR_LANGUAGES = 'eng+spa'
+OCR_DPI = 300
+OCR_TIMEOUT = 120
+OCR_MAX_CHARS = 2000
+
+
+def ocr_engine_available():
+    """True when pdftoppm and tesseract are both on PATH."""
+    return shutil.which('pdftoppm') is not None and shutil.which('tesseract') is not None
+
+
+def ocr_pdf_first_page(filepath, languages=OCR_LANGUAGES, timeout=OCR_TIMEOUT):
+    """Rasterize the first page with pdftoppm and OCR it with tesseract."""
+    with tempfile.TemporaryDirectory(prefix='nlts-ocr-') as tmp:
+        subprocess.run(
+            ['pdftoppm', '-f', '1', '-l', '1', '-r', str(OCR_DPI), '-gray', '-png',
+             filepath, os.path.join(tmp, 'page')],
+            capture_output=True,
+            timeout=timeout,
+            check=True
+        )
+        images = sorted(glob.glob(os.path.join(tmp, 'page*.png')))
+        if not images:
+            return ''
+        result = subprocess.run(
+            ['tesseract', images[0], 'stdout', '-l', languages],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            check=True
+        )
+        return result.stdout.lower()[:OCR_MAX_CHARS]
+
+
+class OcrQueue:
+    """
+    Bounded-concurrency OCR worker pool with a permanent content-hash cache.
+
+    lookup() answers from the cache, submit() schedules a file unless the same
+    content is already cached or in flight, and wait() drains the queue.
+    """
+
+    def __init__(self, cache_dir, max_workers=2, engine=ocr_pdf_first_page):
+        self.cache_dir = cache_dir
+        self.engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ocr')
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_path(self, content_hash):
+        return os.path.join(self.cache_dir, content_hash[:2], content_hash + '.json')
+
+    def lookup(self, content_hash):
+        """Cached OCR text for content_hash, or None if it has not been OCR'd yet."""
+        try:
+            with open(self._cache_path(content_hash), 'r', encoding='utf-8') as f:
+                return json.load(f)['text']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def submit(self, filepath, content_hash):
+        """Queue filepath for OCR; returns the Future shared by identical contents."""
+        with self._lock:
+            future = self._pending.get(content_hash)
+            if future is None:
+                future = self._executor.submit(self._run, filepath, content_hash)
+                self._pending[content_hash] = future
+            return future
+
+    def _run(self, filepath, content_hash):
+        try:
+            text = self.engine(filepath)
+        except Exception as e:
+            # Not cached: a missing engine or a timeout should be retried next scan
+            print(f"OCR failed for {os.path.basename(filepath)}: {e}")
+            with self._lock:
+                self.failed += 1
+            return None
+
+        path = self._cache_path(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'text': text,
+                'source': os.path.basename(filepath),
+                'ocrAt': datetime.now().isoformat() + 'Z'
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.completed += 1
+        return text
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return sum(1 for future in self._pending.values() if not future.done())
+
+    def wait(self):
+        """Block until every queued file is processed; returns {content_hash: text or None}."""
+        with self._lock:
+            futures = dict(self._pending)
+        return {content_hash: future.result() for content_hash, future in futures.items()}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Portfolio mode: run the extractors for many clients at once.
+
+Each client has its own source folder with the same FS workbook template
+(named '<prefix> FS MM DD YYYY RevXXX-Y.xlsm'). For every client the ratio,
+statement and compliance extractions are independent jobs on one process
+pool. Each job writes to the client's own output folder:
+
+    <output>/<client id>/dynamic_ratios.json
+    <output>/<client id>/financial_statements.json   (+ documents/, statements/)
+    <output>/<client id>/compliance_docs.json
+    <output>/<client id>/.runs/                      run ledgers and file catalog
+
+Every job is keyed in the client's run ledger by the fingerprint of its
+inputs, so a client whose workbook and documents are unchanged is skipped.
+Once all jobs finish, the ratios of all clients are merged into
+<output>/portfolio.json. For each ratio it records the portfolio percentiles
+and each client's percentile rank.
+
+A portfolio file lists the clients:
+
+    {
+      "outputDir": "D:\\Portfolio",
+      "clients": [
+        {"id": "nlts-pr", "name": "National Lift Truck Service of PR, Inc.",
+         "root": "D:\\NLTS-PR", "prefix": "NLTS-PR"}
+      ]
+    }
+
+Usage:
+    python scripts/portfolio.py --portfolio clients.json
+    python scripts/portfolio.py --client D:\\NLTS-PR --client E:\\Acme --output-dir D:\\Portfolio --tasks ratios
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from publish_stage import publish_json
+from run_ledger import RunLedger, input_fingerprint, code_fingerprint
+from file_catalog import FileCatalog
+from sheet_pool import default_workers
+import progress
+import extract_financial_statements
+import scan_compliance_docs
+import nlt_config
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server')
+sys.path.insert(0, SERVER_DIR)
+import extract_dynamic_ratios
+
+TASKS = ('ratios', 'statements', 'compliance')
+RATIO_CATEGORIES = ('solvencyRatios', 'safetyRatios', 'profitabilityRatios', 'assetManagementRatios',
+                    'leadingIndicators')
+PERCENTILES = (10, 25, 50, 75, 90)
+PORTFOLIO_JSON = 'portfolio.json'
+
+
+def client_id(root):
+    """Folder name as an id: 'D:\\NLTS-PR' -> 'nlts-pr'."""
+    name = os.path.basename(os.path.normpath(root))
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'client'
+
+
+def normalize_client(client):
+    """Fill in a client's id, name and workbook prefix from its root when missing."""
+    root = client['root']
+    cid = client.get('id') or client_id(root)
+    return {
+        'id': cid,
+        'name': client.get('name') or cid,
+        'root': root,
+        'prefix': client.get('prefix') or nlt_config.FS_WORKBOOK_PREFIX,
+    }
+
+
+def load_portfolio(path):
+    """(clients, outputDir or None) from a portfolio file."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [normalize_client(c) for c in data.get('clients', [])], data.get('outputDir')
+
+
+def client_output_dir(output_root, client):
+    return os.path.join(output_root, client['id'])
+
+
+# -- per-client jobs ----------------------------------------------------------
+
+def _ratios_job(client, out_dir, catalog_path):
+    filepath, file_date = extract_dynamic_ratios.find_latest_fs_file(client['root'], catalog_path, client['prefix'])
+    output = os.path.join(out_dir, 'dynamic_ratios.json')
+    fingerprint = input_fingerprint(
+        [filepath], extra=code_fingerprint(extract_dynamic_ratios.__file__) + client['name'])
+    return (fingerprint,
+            lambda: extract_dynamic_ratios.run_extraction(filepath, file_date, output, client['name']),
+            [output])
+
+
+def _statements_job(client, out_dir, catalog_path):
+    catalog = FileCatalog(client['root'], catalog_path, client['prefix'])
+    catalog.refresh()
+    catalog.save()
+    latest, pdf = catalog.latest_with_pdf()
+    if latest is None:
+        raise FileNotFoundError(f"No FS Excel files found in {client['root']}")
+    output = os.path.join(out_dir, 'financial_statements.json')
+
+    def run():
+        # Already one process per job, so the workbook's sheets are read sequentially
+        summary = extract_financial_statements.extract_financials(
+            workers=1, source_dir=client['root'], output_json=output,
+            docs_dir=os.path.join(out_dir, 'documents'), feed_dir=os.path.join(out_dir, 'statements'),
+            catalog_path=catalog_path, prefix=client['prefix'])
+        if summary is None:
+            raise RuntimeError(f"Statement extraction failed for {latest['filename']}")
+        return summary
+
+    inputs = [latest['filepath']] + ([pdf] if pdf else [])
+    return input_fingerprint(inputs, extra=code_fingerprint(extract_financial_statements.__file__)), run, [output]
+
+
+def _compliance_job(client, out_dir, catalog_path):
+    # Stat-only fingerprint of every candidate document; no file is read unless something changed
+    paths = sorted(entry.path for entry in scan_compliance_docs.iter_document_entries(client['root']))
+    output = os.path.join(out_dir, 'compliance_docs.json')
+    versions_output = os.path.join(out_dir, 'compliance_docs_versions.json')
+
+    def run():
+        result = scan_compliance_docs.serialize_result(
+            scan_compliance_docs.scan_documents(directory=client['root']))
+        versions = result.pop('versions')
+        publish_json(result, output)
+        publish_json(versions, versions_output)
+        return {
+            'totalFiles': result['totalFiles'],
+            'documents': {doc_type: len(records) for doc_type, records in result['documents'].items()},
+            'output': output
+        }
+
+    return input_fingerprint(paths, extra=code_fingerprint(scan_compliance_docs.__file__)), run, [output]
+
+
+TASK_JOBS = {'ratios': _ratios_job, 'statements': _statements_job, 'compliance': _compliance_job}
+
+
+def run_client_task(client, task, output_root, force=False):
+    """Run one extraction for one client (in a pool worker); never raises."""
+    out_dir = client_output_dir(output_root, client)
+    state_dir = os.path.join(out_dir, '.runs')
+    os.makedirs(state_dir, exist_ok=True)
+    start = time.perf_counter()
+    outcome = {'client': client['id'], 'task': task}
+    progress.set_context(client=client['id'], task=task)
+    try:
+        fingerprint, run, outputs = TASK_JOBS[task](client, out_dir, os.path.join(state_dir, 'file_catalog.json'))
+        result, how = RunLedger(state_dir, task).single_flight(fingerprint, run, outputs=outputs, force=force)
+        outcome.update(status='ok', how=how, result=result)
+    except Exception as e:
+        outcome.update(status='error', error=f"{type(e).__name__}: {e}")
+    outcome['seconds'] = round(time.perf_counter() - start, 3)
+    return outcome
+
+
+# -- cross-client comparison ----------------------------------------------------
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated q-th percentile (0-100) of sorted values."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def percentile_rank(value, sorted_values):
+    """Share of the portfolio below value, counting ties as half (0-100)."""
+    below = sum(1 for v in sorted_values if v < value)
+    equal = sum(1 for v in sorted_values if v == value)
+    return 100 * (below + 0.5 * equal) / len(sorted_values)
+
+
+def build_comparison(client_ratios):
+    """{ratio name: {category, count, percentiles, clients: {id: {value, status, percentileRank}}}}."""
+    table = {}
+    for cid, ratios in client_ratios.items():
+        for category in RATIO_CATEGORIES:
+            for ratio in ratios.get(category) or []:
+                value = ratio.get('current')
+                if not _is_number(value):
+                    continue
+                row = table.setdefault(ratio['name'].strip(), {'category': category, 'clients': {}})
+                row['clients'][cid] = {'value': value, 'status': ratio.get('status')}
+
+    for row in table.values():
+        values = sorted(entry['value'] for entry in row['clients'].values())
+        row['count'] = len(values)
+        row['percentiles'] = {f"p{q}": round(percentile(values, q), 4) for q in PERCENTILES}
+        for entry in row['clients'].values():
+            entry['percentileRank'] = round(percentile_rank(entry['value'], values), 1)
+    return table
+
+
+def load_client_ratios(output_root, clients):
+    ratios = {}
+    for client in clients:
+        path = os.path.join(client_output_dir(output_root, client), 'dynamic_ratios.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                ratios[client['id']] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return ratios
+
+
+def run_portfolio(clients, output_root, tasks=TASKS, workers=None, force=False):
+    """Run every (client, task) job on a process pool, then write portfolio.json."""
+    jobs = [(client, task) for client in clients for task in tasks]
+    workers = default_workers(len(jobs)) if workers is None else max(1, workers)
+    print(f"Portfolio: {len(clients)} client(s) x {len(tasks)} task(s) on {workers} worker(s)")
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_client_task, client, task, output_root, force) for client, task in jobs]
+        for future in as_completed(futures):
+            outcome = future.result()
+            outcomes.append(outcome)
+            progress.emit('job', **outcome)
+            detail = outcome.get('how') if outcome['status'] == 'ok' else outcome['error']
+            print(f"  [{outcome['status']}] {outcome['client']} {outcome['task']}: {detail} ({outcome['seconds']}s)")
+
+    by_client = {client['id']: {} for client in clients}
+    for outcome in outcomes:
+        by_client[outcome['client']][outcome['task']] = {k: v for k, v in outcome.items() if k not in ('client', 'task')}
+    comparison = build_comparison(load_client_ratios(output_root, clients))
+    portfolio = {
+        'generatedAt': datetime.now().isoformat(),
+        'clients': [dict(client, tasks=by_client[client['id']]) for client in clients],
+        'ratios': comparison
+    }
+    output = os.path.join(output_root, PORTFOLIO_JSON)
+    publish_json(portfolio, output, compress=False)
+    print(f"Cross-client comparison of {len(comparison)} ratio(s) written to {output}")
+    return portfolio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the extractors for a portfolio of clients.')
+    parser.add_argument('--portfolio', help='Portfolio JSON file listing the clients')
+    parser.add_argument('--client', action='append', default=[], metavar='ROOT',
+                        help='Client source folder (repeatable; id from the folder name)')
+    parser.add_argument('--output-dir', help='Root of the per-client outputs (default: the portfolio file\'s outputDir)')
+    parser.add_argument('--tasks', default=','.join(TASKS), help=f"Comma-separated subset of {', '.join(TASKS)}")
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per job, up to the CPU count)')
+    parser.add_argument('--force', action='store_true', help='Re-run jobs whose inputs are unchanged')
+    args = parser.parse_args(argv)
+
+    clients, output_root = ([], None)
+    if args.portfolio:
+        clients, output_root = load_portfolio(args.portfolio)
+    clients += [normalize_client({'root': root}) for root in args.client]
+    output_root = args.output_dir or output_root
+    if not clients:
+        parser.error('no clients: pass --portfolio or --client')
+    if not output_root:
+        parser.error('no output folder: pass --output-dir or set outputDir in the portfolio file')
+    ids = [client['id'] for client in clients]
+    duplicates = sorted({cid for cid in ids if ids.count(cid) > 1})
+    if duplicates:
+        parser.error(f"duplicate client id(s): {', '.join(duplicates)}")
+    tasks = [task.strip() for task in args.tasks.split(',') if task.strip()]
+    unknown = [task for task in tasks if task not in TASKS]
+    if unknown:
+        parser.error(f"unknown task(s): {', '.join(unknown)}")
+
+    portfolio = run_portfolio(clients, output_root, tasks, args.workers, args.force)
+    for name, row in list(portfolio['ratios'].items())[:10]:
+        p = row['percentiles']
+        print(f"  {name:<40} n={row['count']:<3} p25 {p['p25']:>10.4f}  median {p['p50']:>10.4f}  p75 {p['p75']:>10.4f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Structured progress events for the extractors.
+
+Each event is one JSON object per line (NDJSON) with its name, the seconds
+since the run started and its fields:
+
+    {"event": "workbook", "t": 0.012, "file": "NLTS-PR FS 12 31 2024 Rev156-3.xlsm"}
+    {"event": "category", "t": 0.840, "category": "solvencyRatios", "ratios": [...]}
+
+Events go to a dedicated stream, never to stdout, so the human-readable log is
+unchanged. The stream is chosen by the environment:
+
+    NLT_PROGRESS_FD     an inherited file descriptor (server/index.js passes fd 3)
+    NLT_PROGRESS_FILE   a path to append to ('-' for stderr)
+
+With neither set, emit() does nothing. If NLT_PROGRESS_FD cannot be opened a
+warning goes to stderr once and progress is off for the run; the extractor
+itself is unaffected.
+
+On Windows, Node passes stdio[3] to the child through the C runtime's
+inherited-handle table (STARTUPINFO lpReserved2), which the UCRT used by
+Python 3.5+ reads at startup. This has not been verified with the venv
+python.exe launcher, which starts the real interpreter as a second process;
+if fd 3 does not make it through, the stderr warning shows it and the
+server's stream still ends with its 'result' event.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+
+_lock = threading.Lock()
+_stream = None
+_opened = False
+_started = time.monotonic()
+_context = {}
+
+
+def _open_stream():
+    fd = os.environ.get('NLT_PROGRESS_FD')
+    if fd:
+        try:
+            return os.fdopen(int(fd), 'w', encoding='utf-8', buffering=1)
+        except (OSError, ValueError) as e:
+            print(f"[progress] NLT_PROGRESS_FD={fd} could not be opened ({e}); progress events are disabled",
+                  file=sys.stderr)
+            return None
+    path = os.environ.get('NLT_PROGRESS_FILE')
+    if path == '-':
+        return sys.stderr
+    if path:
+        return open(path, 'a', encoding='utf-8', buffering=1)
+    return None
+
+
+def enabled():
+    """True when a progress stream is configured."""
+    global _stream, _opened
+    if not _opened:
+        _stream = _open_stream()
+        _opened = True
+    return _stream is not None
+
+
+def set_context(**fields):
+    """Fields added to every later event from this process, e.g. the client of a portfolio job."""
+    _context.clear()
+    _context.update(fields)
+
+
+def emit(event, **fields):
+    """Write one progress event; a closed or broken stream disables further events."""
+    global _stream
+    if not enabled():
+        return
+    record = {'event': event, 't': round(time.monotonic() - _started, 3)}
+    record.update(_context)
+    record.update(fields)
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        try:
+            _stream.write(line + '\n')
+            _stream.flush()
+        except (OSError, ValueError):
+            _stream = None
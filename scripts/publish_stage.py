@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Publish stage shared by the Python extractors.
+
+Source documents (publish_file) are published under content-hashed filenames
+(e.g. audited_financials.1a2b3c4d5e6f.pdf) recorded in a manifest, plus the
+stable name the dashboard links to. A document whose source size and mtime
+match the manifest is skipped without reading it; otherwise its hash is
+compared first and only new content is materialized, as a reflink where the
+file system supports it and a copy otherwise. Published files never share an
+inode with the client's source, so editing a source in place cannot change a
+content-hashed file.
+
+JSON outputs (publish_json) are written as canonical JSON only when the data,
+minus volatile metadata like extractedAt, actually changed, with .gz/.br
+siblings and ETags recorded in the directory manifest for static serving.
+"""
+
+import os
+import json
+import hashlib
+import shutil
+
+MANIFEST_NAME = 'manifest.json'
+HASH_PREFIX_LEN = 12
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/xfs)
+FICLONE = 0x40049409
+
+
+def hash_file(filepath, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    """Write bytes to path through a temp file and rename."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(dest_dir):
+    try:
+        with open(os.path.join(dest_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(dest_dir, manifest):
+    """Write the manifest only if its contents changed; returns True if written."""
+    path = os.path.join(dest_dir, MANIFEST_NAME)
+    data = json.dumps(manifest, indent=2, sort_keys=True, ensure_ascii=False).encode('utf-8') + b'\n'
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    write_atomic(path, data)
+    return True
+
+
+def _try_reflink(src, dest):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dest):
+            os.remove(dest)
+        return False
+
+
+def materialize(src, dest):
+    """
+    Make dest hold the contents of src as cheaply as possible.
+    Returns the method used: 'reflink' or 'copy'. There is no hardlink step:
+    a hardlink would share the source's inode, so a source edited in place
+    would silently change the content-hashed published file.
+    """
+    if os.path.lexists(dest):
+        os.remove(dest)
+    if _try_reflink(src, dest):
+        return 'reflink'
+    shutil.copy2(src, dest)
+    return 'copy'
+
+
+def _link_alias(target, alias):
+    """Point the stable alias name at the hashed file (same directory, so a hardlink works)."""
+    if os.path.exists(alias) and os.path.samefile(target, alias):
+        return
+    tmp_alias = f"{alias}.{os.getpid()}.tmp"
+    try:
+        os.link(target, tmp_alias)
+    except OSError:
+        shutil.copy2(target, tmp_alias)
+    os.replace(tmp_alias, alias)
+
+
+def publish_file(src, dest_dir, logical_name, manifest):
+    """
+    Publish src into dest_dir as logical_name (the stable alias) and a hashed copy.
+    Updates manifest in place and returns (entry, changed); unchanged sources
+    cost one stat and no reads or writes.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    stats = os.stat(src)
+    entry = manifest.get(logical_name)
+    alias_path = os.path.join(dest_dir, logical_name)
+
+    # Files published by older runs as hardlinks to the source are re-materialized
+    relink = bool(entry) and entry.get('method') == 'hardlink'
+    if (entry and not relink and entry.get('sourceSize') == stats.st_size
+            and entry.get('sourceMtimeNs') == stats.st_mtime_ns
+            and os.path.exists(os.path.join(dest_dir, entry['file']))
+            and os.path.exists(alias_path)):
+        return entry, False
+
+    digest = hash_file(src)
+    stem, ext = os.path.splitext(logical_name)
+    hashed_name = f"{stem}.{digest[:HASH_PREFIX_LEN]}{ext}"
+    hashed_path = os.path.join(dest_dir, hashed_name)
+
+    content_changed = not entry or entry.get('sha256') != digest or not os.path.exists(hashed_path)
+    method = entry.get('method') if entry else None
+    if content_changed or relink:
+        if relink or not os.path.exists(hashed_path):
+            method = materialize(src, hashed_path)
+        _link_alias(hashed_path, alias_path)
+        # Drop the superseded hashed copy
+        if entry and entry.get('file') != hashed_name:
+            old_path = os.path.join(dest_dir, entry['file'])
+            if os.path.exists(old_path):
+                os.remove(old_path)
+    elif not os.path.exists(alias_path):
+        _link_alias(hashed_path, alias_path)
+
+    new_entry = {
+        'file': hashed_name,
+        'sha256': digest,
+        'size': stats.st_size,
+        'source': os.path.basename(src),
+        'sourceSize': stats.st_size,
+        'sourceMtimeNs': stats.st_mtime_ns,
+        'method': method,
+    }
+    manifest[logical_name] = new_entry
+    return new_entry, content_changed
+
+
+# ---------------------------------------------------------------------------
+# JSON data publishing
+# ---------------------------------------------------------------------------
+
+# Keys that change on every run without the data changing
+VOLATILE_KEYS = ('extractedAt', 'ExtractedAt', 'generatedAt')
+
+
+def canonical_json(data):
+    """
+    Deterministic JSON bytes. Key order is the extractor's insertion order
+    (fixed in code, and the dashboard renders sections in that order).
+    """
+    return json.dumps(data, indent=2, ensure_ascii=False, allow_nan=False).encode('utf-8') + b'\n'
+
+
+def split_volatile(data, volatile_keys=VOLATILE_KEYS):
+    """
+    Return (stable, volatile): data without volatile keys (searched through
+    nested dicts) and the removed values keyed by dotted path.
+    """
+    volatile = {}
+
+    def strip(node, prefix):
+        stable = {}
+        for key, value in node.items():
+            path = f"{prefix}{key}"
+            if key in volatile_keys:
+                volatile[path] = value
+            elif isinstance(value, dict):
+                stable[key] = strip(value, path + '.')
+            else:
+                stable[key] = value
+        return stable
+
+    if not isinstance(data, dict):
+        return data, volatile
+    return strip(data, ''), volatile
+
+
+def _write_compressed_siblings(path, payload):
+    """Write .gz (and .br when the brotli module is installed) next to path."""
+    import gzip
+    sizes = {}
+    gz = gzip.compress(payload, compresslevel=9, mtime=0)
+    write_atomic(path + '.gz', gz)
+    sizes['gzipSize'] = len(gz)
+    try:
+        import brotli
+    except ImportError:
+        return sizes
+    br = brotli.compress(payload, quality=11)
+    write_atomic(path + '.br', br)
+    sizes['brSize'] = len(br)
+    return sizes
+
+
+def publish_json(data, path, compress=True, volatile_keys=VOLATILE_KEYS):
+    """
+    Write data to path only if it changed, ignoring volatile metadata.
+    The comparison hashes canonical JSON without volatile_keys; unchanged data
+    leaves the file, its .gz/.br siblings and the directory manifest untouched
+    (so its extractedAt still records when the data last changed). Changed
+    data is written atomically and its ETag and volatile metadata are recorded
+    in the directory's manifest.json. Returns True if the file was rewritten.
+    """
+    dest_dir = os.path.dirname(path) or '.'
+    name = os.path.basename(path)
+    os.makedirs(dest_dir, exist_ok=True)
+
+    stable, volatile = split_volatile(data, volatile_keys)
+    content_hash = hashlib.sha256(canonical_json(stable)).hexdigest()
+
+    manifest = load_manifest(dest_dir)
+    entry = manifest.get(name)
+    if (entry and entry.get('contentHash') == content_hash and os.path.exists(path)
+            and (not compress or os.path.exists(path + '.gz'))):
+        return False
+
+    payload = canonical_json(data)
+    write_atomic(path, payload)
+    new_entry = {
+        'etag': '"' + hashlib.sha256(payload).hexdigest()[:20] + '"',
+        'contentHash': content_hash,
+        'size': len(payload),
+        'meta': volatile,
+    }
+    if compress:
+        new_entry.update(_write_compressed_siblings(path, payload))
+    manifest[name] = new_entry
+    save_manifest(dest_dir, manifest)
+    return True
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Single-flight coordination for extractor runs.
+
+Each extractor gets a lock file and a run ledger in a state directory. A run
+is keyed by the fingerprint of its inputs (source file sizes and mtimes plus
+the extractor's own code), so:
+
+- a caller whose fingerprint matches the last successful run reuses its
+  result without re-parsing the workbook;
+- a caller that finds the same fingerprint in flight waits for it and takes
+  its result instead of starting duplicate work;
+- a caller with a different fingerprint waits for the lock, so two runs never
+  write the same outputs at once.
+
+Lock files are created with O_EXCL, which works on Windows and POSIX alike.
+A lock left behind by a crashed or killed run is broken once its owner is
+gone or it is older than LOCK_STALE_SECONDS. Each lock carries a nonce: a
+stale lock is broken by renaming it aside and checking it is still the one
+judged stale, so two waiters cannot both break it and a holder only ever
+removes its own lock.
+"""
+
+import os
+import json
+import time
+import hashlib
+import uuid
+from datetime import datetime
+
+from publish_stage import hash_file, write_atomic
+
+LOCK_STALE_SECONDS = 600
+LOCK_WAIT_SECONDS = 300
+POLL_INTERVAL = 0.25
+
+# Win32 constants for _pid_alive
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_INVALID_PARAMETER = 87
+STILL_ACTIVE = 259
+
+
+def input_fingerprint(paths, extra=''):
+    """Fingerprint of the input files by name, size and mtime, plus extra."""
+    digest = hashlib.sha256(extra.encode('utf-8'))
+    for path in paths:
+        stats = os.stat(path)
+        digest.update(f"\0{os.path.basename(path)}\0{stats.st_size}\0{stats.st_mtime_ns}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def code_fingerprint(*paths):
+    """Content hash of the extractor's source files, so code changes invalidate the ledger."""
+    return '-'.join(hash_file(path)[:12] for path in paths)
+
+
+def _pid_alive(pid):
+    if not pid:
+        return True
+    if os.name == 'nt':
+        # os.kill(pid, 0) terminates the process on Windows; ask the kernel instead
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return kernel32.GetLastError() != ERROR_INVALID_PARAMETER  # no such process
+        try:
+            code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+                return True
+            return code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RunLedger:
+    """Lock file plus JSON ledger of the latest run for one extractor."""
+
+    def __init__(self, state_dir, name):
+        self.state_dir = state_dir
+        self.name = name
+        self.lock_path = os.path.join(state_dir, f"{name}.lock")
+        self.ledger_path = os.path.join(state_dir, f"{name}.ledger.json")
+        self.nonce = uuid.uuid4().hex
+        os.makedirs(state_dir, exist_ok=True)
+
+    def load(self):
+        try:
+            with open(self.ledger_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, ledger):
+        write_atomic(self.ledger_path, json.dumps(ledger, indent=2, ensure_ascii=False).encode('utf-8'))
+
+    def completed(self, fingerprint):
+        """The last successful run's entry if it matches fingerprint and its outputs still exist."""
+        entry = self.load().get('latest')
+        if not entry or entry.get('fingerprint') != fingerprint or entry.get('status') != 'ok':
+            return None
+        if not all(os.path.exists(path) for path in entry.get('outputs', [])):
+            return None
+        return entry
+
+    def _read_lock(self, path=None):
+        try:
+            with open(path or self.lock_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _try_lock(self, fingerprint):
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({
+                'pid': os.getpid(),
+                'nonce': self.nonce,
+                'fingerprint': fingerprint,
+                'startedAt': datetime.now().isoformat()
+            }, f)
+        return True
+
+    def _break_stale_lock(self):
+        holder = self._read_lock()
+        try:
+            age = time.time() - os.path.getmtime(self.lock_path)
+        except OSError:
+            return True
+        if age <= LOCK_STALE_SECONDS and not (holder and not _pid_alive(holder.get('pid'))):
+            return False
+
+        # Rename is atomic: only one waiter moves this lock aside
+        aside = f"{self.lock_path}.{self.nonce}.stale"
+        try:
+            os.rename(self.lock_path, aside)
+        except OSError:
+            return True  # another waiter broke it or the holder released it
+        moved = self._read_lock(aside)
+        if holder is not None and (moved or {}).get('nonce') != holder.get('nonce'):
+            # Another waiter broke the stale lock first and this is its fresh one: put it back
+            try:
+                os.link(aside, self.lock_path)
+            except OSError:
+                # A third process took the free lock path meanwhile. The moved lock's
+                # holder is still running, so it stays held: keep the file under the
+                # holder's nonce, where its _release() removes it
+                if moved is not None:
+                    try:
+                        os.replace(aside, self._held_path(moved.get('nonce')))
+                    except OSError:
+                        pass
+                return False
+            os.remove(aside)
+            return False
+        print(f"Breaking stale {self.name} lock (age {age:.0f}s, holder {holder})")
+        try:
+            os.remove(aside)
+        except OSError:
+            pass
+        return True
+
+    def _held_path(self, nonce):
+        return f"{self.lock_path}.{nonce}.held"
+
+    def _release(self):
+        holder = self._read_lock()
+        if holder is None or holder.get('nonce') != self.nonce:
+            # Our lock was moved aside by a stale-lock check; the path is free or someone else's
+            try:
+                os.remove(self._held_path(self.nonce))
+            except OSError:
+                pass
+            return
+        try:
+            os.remove(self.lock_path)
+        except OSError:
+            pass
+
+    def single_flight(self, fingerprint, run, outputs=(), force=False, wait=LOCK_WAIT_SECONDS):
+        """
+        Run run() at most once per fingerprint across processes.
+
+        run() returns a JSON-serializable result that is stored in the ledger
+        and handed to every caller with the same fingerprint. Returns
+        (result, how) where how is 'ran', 'joined' (waited for an identical
+        in-flight run) or 'cached' (matched the last completed run).
+        """
+        deadline = time.monotonic() + wait
+        joined = False
+        while True:
+            if not force:
+                entry = self.completed(fingerprint)
+                if entry:
+                    return entry['result'], ('joined' if joined else 'cached')
+            if self._try_lock(fingerprint):
+                break
+            holder = self._read_lock()
+            if holder and holder.get('fingerprint') == fingerprint and not joined:
+                joined = True
+                print(f"Identical {self.name} run in progress (pid {holder.get('pid')}), waiting for its result...")
+            if self._break_stale_lock():
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for the {self.name} lock held by {holder}")
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            # The previous holder may have finished this exact run while we waited
+            entry = None if force else self.completed(fingerprint)
+            if entry:
+                return entry['result'], 'joined'
+
+            started = datetime.now().isoformat()
+            try:
+                result = run()
+            except Exception as e:
+                ledger = self.load()
+                ledger['lastFailure'] = {
+                    'fingerprint': fingerprint,
+                    'startedAt': started,
+                    'finishedAt': datetime.now().isoformat(),
+                    'error': str(e)
+                }
+                self._save(ledger)
+                raise
+
+            ledger = self.load()
+            ledger['latest'] = {
+                'fingerprint': fingerprint,
+                'status': 'ok',
+                'pid': os.getpid(),
+                'startedAt': started,
+                'finishedAt': datetime.now().isoformat(),
+                'outputs': list(outputs),
+                'result': result
+            }
+            ledger.pop('lastFailure', None)
+            self._save(ledger)
+            return result, 'ran'
+        finally:
+            self._release()
@@ -5,14 +5,25 @@ Uses intelligent versioning and recency scoring to identify the most recent docu
 """
 
 import os
-import json
 import re
+import hashlib
+import time
+import zipfile
+import argparse
 import subprocess
+import xml.etree.ElementTree as ET
 from datetime import datetime
+from itertools import groupby
+from collections import OrderedDict
 from pathlib import Path
 
-NLTS_PR_DIR = r"D:\NLTS-PR"
-OUTPUT_PATH = r"c:\Users\cpari\.gemini\antigravity\NLT_PR_Dashboard\public\data\compliance_docs.json"
+from publish_stage import hash_file, publish_json
+from nlt_config import NLTS_PR_DIR, COMPLIANCE_DOCS_JSON, OCR_CACHE_DIR
+import progress
+
+OUTPUT_PATH = COMPLIANCE_DOCS_JSON
+# Older revisions of each document chain, fetched on demand by chainId
+VERSIONS_OUTPUT_PATH = os.path.splitext(OUTPUT_PATH)[0] + '_versions.json'
 
 # Document type patterns (same as in server/index.js)
 DOCUMENT_PATTERNS = {
@@ -45,6 +56,68 @@ DOCUMENT_PATTERNS = {
 }
 
 VALID_EXTENSIONS = ['.pdf', '.gsheet', '.xls', '.xlsx', '.xlsm']
+# Spreadsheets whose zip/XML parts can be sniffed for content (.xls is binary BIFF)
+SNIFFABLE_EXTENSIONS = ['.xlsx', '.xlsm']
+
+# Spreadsheet sniffing limits: rows read from the first sheet and wall time per file
+SNIFF_MAX_ROWS = 20
+SNIFF_TIME_BUDGET = 0.25
+SNIFF_MAX_CHARS = 2000
+
+XLSX_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+XLSX_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# docProps/core.xml elements worth reading: title, subject, keywords, description
+CORE_PROPERTY_TAGS = (
+    '{http://purl.org/dc/elements/1.1/}title',
+    '{http://purl.org/dc/elements/1.1/}subject',
+    '{http://schemas.openxmlformats.org/package/2006/metadata/core-properties}keywords',
+    '{http://purl.org/dc/elements/1.1/}description',
+)
+
+# Pieces stripped from a filename to get the base name shared by all revisions
+# of the same logical document (see normalize_base_name). Only revision markers
+# are removed; the period is kept so each fiscal period is its own chain.
+MONTH_NAMES = (
+    'january|february|march|april|may|june|july|august|september|october|november|december|'
+    'enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre'
+)
+REVISION_STRIP_PATTERNS = [
+    re.compile(r'\brev\d+(?:-\d+)?', re.IGNORECASE),            # Rev156-3, Rev156
+    re.compile(r'-\d{1,2}$'),                                     # trailing "-1", "-2"
+    re.compile(r'\bv\d+\b', re.IGNORECASE),                       # v2
+    re.compile(r'\bfinal\b', re.IGNORECASE),                       # final
+]
+# Date spellings, replaced by the recognized period in a canonical form so
+# '12 31 2024', '12-31-2024' and 'December 31, 2024' share a chain
+PERIOD_TEXT_PATTERNS = [
+    re.compile(r'\b\d{1,2}[\s\-/]\d{1,2}[\s\-/]20\d{2}\b'),       # 12 31 2024, 12-31-2024
+    re.compile(r'\b20\d{2}[\-/]\d{1,2}[\-/]\d{1,2}\b'),             # 2024-12-31
+    re.compile(r'\b(?:' + MONTH_NAMES + r')\b(?:\s+\d{1,2}\b)?', re.IGNORECASE),  # December 31, diciembre
+    re.compile(r'\b20\d{2}\b'),                                   # bare year
+]
+
+# Period-date recognizer: one compiled alternation finds every candidate date in
+# a single left-to-right pass. Alternatives are tried in this order at each
+# position, so a full date always wins over the bare year it contains.
+MONTH_NUMBERS = {name: i % 12 + 1 for i, name in enumerate(MONTH_NAMES.split('|'))}
+PERIOD_DATE_PATTERN = re.compile(
+    r'\b(?P<en_month>' + MONTH_NAMES + r')\.?\s+(?P<en_day>\d{1,2})(?:st|nd|rd|th)?,?\s+(?P<en_year>20\d{2})\b'
+    r'|\b(?P<es_day>\d{1,2})\s+de\s+(?P<es_month>' + MONTH_NAMES + r'),?\s+(?:del?\s+)?(?P<es_year>20\d{2})\b'
+    r'|(?<!\d)(?P<iso_year>20\d{2})[-/](?P<iso_month>\d{1,2})[-/](?P<iso_day>\d{1,2})(?!\d)'
+    r'|(?<!\d)(?P<num_month>\d{1,2})(?:\s+|[-/])(?P<num_day>\d{1,2})(?:\s+|[-/])(?P<num_year>20\d{2})(?!\d)'
+    r'|\b(?P<year>20\d{2})\b',
+    re.IGNORECASE,
+)
+DATE_KIND_GROUPS = {
+    'month': [('en_year', 'en_month', 'en_day'), ('es_year', 'es_month', 'es_day')],
+    'numeric': [('iso_year', 'iso_month', 'iso_day'), ('num_year', 'num_month', 'num_day')],
+}
+# Letters carry their reporting date in the opening paragraph of the content
+CONTENT_DATE_DOCUMENTS = ('Engagement Letter', 'Representation Letter')
+LETTER_HEAD_CHARS = 500
+PERIOD_CACHE_MAX = 4096
+_period_cache = OrderedDict()  # LRU: hits move to the end, the oldest is evicted
 
 
 def extract_pdf_content(filepath):
@@ -61,6 +134,134 @@ def extract_pdf_content(filepath):
         return Path(filepath).name.lower()
 
 
+class SniffBudgetExceeded(Exception):
+    """Raised inside sniffing helpers when the per-file time budget runs out."""
+
+
+def _check_deadline(deadline):
+    if time.perf_counter() > deadline:
+        raise SniffBudgetExceeded()
+
+
+def _iter_xml_text(zf, member, deadline, tags=None):
+    """Yield non-empty text nodes (only of the given tags, if any) of a zip member using streaming XML parsing."""
+    with zf.open(member) as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            _check_deadline(deadline)
+            if (tags is None or elem.tag in tags) and elem.text and elem.text.strip():
+                yield elem.text.strip()
+            elem.clear()
+
+
+def _first_sheet_path(zf, names):
+    """Resolve the zip path of the first worksheet via workbook.xml and its rels."""
+    default = 'xl/worksheets/sheet1.xml'
+    if 'xl/workbook.xml' not in names or 'xl/_rels/workbook.xml.rels' not in names:
+        return default if default in names else None
+
+    rel_id = None
+    with zf.open('xl/workbook.xml') as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            if elem.tag == XLSX_MAIN_NS + 'sheet':
+                rel_id = elem.get(XLSX_REL_NS + 'id')
+                break
+    if rel_id:
+        with zf.open('xl/_rels/workbook.xml.rels') as f:
+            for _, elem in ET.iterparse(f, events=('end',)):
+                if elem.tag == XLSX_PKG_REL_NS + 'Relationship' and elem.get('Id') == rel_id:
+                    target = elem.get('Target', '')
+                    path = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+                    if path in names:
+                        return path
+                    break
+    return default if default in names else None
+
+
+def _sniff_sheet_rows(zf, sheet_path, max_rows, deadline, values):
+    """
+    Stream the first max_rows rows of a worksheet into values, a list of cell
+    values where shared strings are kept as int indexes. Filled in place, so
+    the rows read before the budget runs out are kept.
+    """
+    rows = 0
+    with zf.open(sheet_path) as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            _check_deadline(deadline)
+            tag = elem.tag
+            if tag == XLSX_MAIN_NS + 'c':
+                cell_type = elem.get('t')
+                if cell_type == 's':
+                    v = elem.find(XLSX_MAIN_NS + 'v')
+                    if v is not None and v.text:
+                        values.append(int(v.text))
+                elif cell_type == 'inlineStr':
+                    values.append(''.join(t.text or '' for t in elem.iter(XLSX_MAIN_NS + 't')))
+                elif cell_type == 'str':
+                    v = elem.find(XLSX_MAIN_NS + 'v')
+                    if v is not None and v.text:
+                        values.append(v.text)
+            elif tag == XLSX_MAIN_NS + 'row':
+                elem.clear()
+                rows += 1
+                if rows >= max_rows:
+                    break
+
+
+def _read_shared_strings(zf, needed, deadline, strings):
+    """Read only the shared strings whose indexes are in needed into strings, stopping after the largest."""
+    last = max(needed)
+    index = 0
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, elem in ET.iterparse(f, events=('end',)):
+            if elem.tag != XLSX_MAIN_NS + 'si':
+                continue
+            _check_deadline(deadline)
+            if index in needed:
+                strings[index] = ''.join(t.text or '' for t in elem.iter(XLSX_MAIN_NS + 't'))
+            elem.clear()
+            index += 1
+            if index > last:
+                break
+
+
+def sniff_spreadsheet_content(filepath, max_rows=SNIFF_MAX_ROWS, budget=SNIFF_TIME_BUDGET):
+    """
+    Cheap text sample of an .xlsx/.xlsm file for classification.
+    Reads only the zip directory, docProps and the first max_rows rows of the
+    first sheet through streaming XML; never loads the workbook. Whatever was
+    collected when the time budget runs out is returned. Falls back to the
+    filename like extract_pdf_content.
+    """
+    deadline = time.perf_counter() + budget
+    parts = []
+    values = []
+    strings = {}
+    try:
+        with zipfile.ZipFile(filepath) as zf:
+            names = set(zf.namelist())
+            # Descriptive properties only: created/modified are save dates, not the period
+            if 'docProps/core.xml' in names:
+                parts.extend(_iter_xml_text(zf, 'docProps/core.xml', deadline, CORE_PROPERTY_TAGS))
+            if 'docProps/app.xml' in names:
+                parts.extend(_iter_xml_text(zf, 'docProps/app.xml', deadline))
+
+            sheet_path = _first_sheet_path(zf, names)
+            if sheet_path:
+                _sniff_sheet_rows(zf, sheet_path, max_rows, deadline, values)
+                needed = {v for v in values if isinstance(v, int)}
+                if needed and 'xl/sharedStrings.xml' in names:
+                    _read_shared_strings(zf, needed, deadline, strings)
+    except SniffBudgetExceeded:
+        pass
+    except (zipfile.BadZipFile, ET.ParseError, KeyError, ValueError, OSError):
+        pass
+    # Partly read rows count too; shared strings not resolved in time are dropped
+    parts.extend(strings.get(v, '') if isinstance(v, int) else v for v in values)
+
+    text = ' '.join(p for p in parts if p).lower()[:SNIFF_MAX_CHARS]
+    return text or Path(filepath).name.lower()
+
+
 def extract_version_number(filename):
     """Extract version number from filename suffix (e.g., '-1', '-2', 'Rev156-3')."""
     # Pattern 1: Simple suffix like "-1.pdf", "-2.pdf"
@@ -81,45 +282,107 @@ def extract_version_number(filename):
     return 0
 
 
-def extract_document_period_date(filename, content):
-    """Extract document period date from filename or content."""
-    search_text = filename + ' ' + content
-    
-    # Pattern 1: MM DD YYYY (space separated)
-    match = re.search(r'(\d{1,2})\s+(\d{1,2})\s+(20\d{2})', search_text)
-    if match:
-        month, day, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
-        try:
-            return datetime(year, month, day)
-        except ValueError:
-            pass
-    
-    # Pattern 2: MM-DD-YYYY or MM/DD/YYYY
-    match = re.search(r'(\d{1,2})[-/](\d{1,2})[-/](20\d{2})', search_text)
-    if match:
-        month, day, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
-        try:
-            return datetime(year, month, day)
-        except ValueError:
-            pass
-    
-    # Pattern 3: YYYY-MM-DD
-    match = re.search(r'(20\d{2})[-/](\d{1,2})[-/](\d{1,2})', search_text)
-    if match:
-        year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
-        try:
-            return datetime(year, month, day)
-        except ValueError:
-            pass
-    
-    # Pattern 4: Just the year
-    match = re.search(r'\b(20\d{2})\b', search_text)
-    if match:
-        return datetime(int(match.group(1)), 12, 31)
-    
+def normalize_base_name(filename):
+    """
+    Normalize a filename to the base name shared by all its revisions.
+    Strips the extension and revision markers and spells the period date the
+    same way, e.g. 'NLTS-PR FS 12 31 2024 Rev156-3.xlsm' -> 'nlts pr fs 2024-12-31'.
+    Different periods ('Income Tax 2023' / '2024') stay separate documents.
+    """
+    base = os.path.splitext(filename)[0]
+    # Dates first, so a trailing '-30' of '2024-06-30' is not taken for a revision
+    period = extract_document_period_date(base, '')
+    for pattern in PERIOD_TEXT_PATTERNS:
+        base = pattern.sub(' ', base)
+    for pattern in REVISION_STRIP_PATTERNS:
+        base = pattern.sub(' ', base.rstrip())
+    base = re.sub(r'[\s_\-.,()]+', ' ', base.lower()).strip()
+    return f"{base} {period:%Y-%m-%d}".strip() if period else base
+
+
+def group_version_chains(records):
+    """
+    Group revisions of the same logical document into version chains.
+    Sorts once by (base name, recency) so grouping is O(n log n); returns a list
+    of chains, each ordered newest first (chain[0] is the head).
+    """
+    keyed = [(normalize_base_name(record.filename), record) for record in records]
+    # Two stable sorts: newest first, then by base name
+    keyed.sort(key=lambda item: item[1].recency_key, reverse=True)
+    keyed.sort(key=lambda item: item[0])
+    chains = []
+    for base_name, items in groupby(keyed, key=lambda item: item[0]):
+        chain = [record for _, record in items]
+        chain_id = f"{chain[0].doc_type}::{base_name or chain[0].filename.lower()}"
+        for record in chain:
+            record.chain_id = chain_id
+        chain[0].older_versions = len(chain) - 1
+        chains.append(chain)
+    return chains
+
+
+def _candidate_date(match):
+    """(rank, datetime) for a PERIOD_DATE_PATTERN match: 0 month name, 1 numeric, 2 bare year."""
+    groups = match.groupdict()
+    if groups['year']:
+        return 2, datetime(int(groups['year']), 12, 31)
+    for rank, kind in enumerate(('month', 'numeric')):
+        for year, month, day in DATE_KIND_GROUPS[kind]:
+            if groups[year]:
+                month_value = groups[month]
+                month_number = MONTH_NUMBERS[month_value.lower()] if kind == 'month' else int(month_value)
+                try:
+                    return rank, datetime(int(groups[year]), month_number, int(groups[day]))
+                except ValueError:  # e.g. 13 45 2024: keep the year like a bare-year match
+                    return 2, datetime(int(groups[year]), 12, 31)
     return None
 
 
+def _rank_period_date(filename, content, letter):
+    search_text = filename + ' ' + content
+    head_start = len(filename) + 1
+    head_end = head_start + LETTER_HEAD_CHARS
+    full_date = head_numeric = year_only = None
+    for match in PERIOD_DATE_PATTERN.finditer(search_text):
+        candidate = _candidate_date(match)
+        if candidate is None:
+            continue
+        rank, date = candidate
+        if rank == 2:
+            year_only = year_only or date
+        elif not letter:
+            return date
+        elif head_start <= match.start() < head_end:
+            # Letter opening paragraph: a spelled-out date beats a numeric one
+            if rank == 0:
+                return date
+            head_numeric = head_numeric or date
+        else:
+            full_date = full_date or date
+            if match.start() >= head_end:
+                break
+    return head_numeric or full_date or year_only
+
+
+def extract_document_period_date(filename, content, doc_type=None):
+    """
+    Extract the document period date from filename or content in one pass.
+    The earliest full date (month-name, MM/DD/YYYY or ISO) wins, else Dec 31
+    of the first bare year. Letters (CONTENT_DATE_DOCUMENTS) prefer the date in
+    the opening paragraph of their content. Results are kept in an LRU memo keyed
+    by content hash.
+    """
+    letter = doc_type in CONTENT_DATE_DOCUMENTS
+    key = (letter, hashlib.sha256((filename + '\0' + content).encode('utf-8', 'surrogatepass')).digest())
+    if key in _period_cache:
+        _period_cache.move_to_end(key)
+        return _period_cache[key]
+    if len(_period_cache) >= PERIOD_CACHE_MAX:
+        _period_cache.popitem(last=False)
+    _period_cache[key] = _rank_period_date(filename, content, letter)
+    return _period_cache[key]
+
+
 def identify_document_type(content, filename, filepath):
     """Identify document type based on content and filename."""
     search_text = (content + ' ' + filename.lower()).lower()
@@ -136,110 +399,251 @@ def identify_document_type(content, filename, filepath):
     return 'Other Document'
 
 
-def calculate_recency_score(doc):
-    """Calculate composite recency score for intelligent sorting."""
+class DocumentRecord:
+    """
+    Compact scan result for one file. Keeps raw timestamps and the parsed
+    version/period; display strings are only built by to_dict() at write time.
+    """
+    __slots__ = ('filename', 'path', 'doc_type', 'mtime', 'ctime', 'size',
+                 'version', 'period', 'chain_id', 'older_versions')
+
+    def __init__(self, filename, path, doc_type, mtime, ctime, size, version, period):
+        self.filename = filename
+        self.path = path
+        self.doc_type = doc_type
+        self.mtime = mtime
+        self.ctime = ctime
+        self.size = size
+        self.version = version
+        self.period = period
+        self.chain_id = None
+        self.older_versions = None
+
+    @property
+    def recency_key(self):
+        """Sort key: (document period, version number, modification time)."""
+        return (self.period.toordinal() if self.period else 0, self.version, self.mtime)
+
+    def to_dict(self):
+        modified_at = datetime.fromtimestamp(self.mtime)
+        doc = {
+            'filename': self.filename,
+            'path': self.path,
+            'documentType': self.doc_type,
+            'modifiedAt': modified_at.isoformat() + 'Z',
+            'createdAt': datetime.fromtimestamp(self.ctime).isoformat() + 'Z',
+            'size': self.size,
+            'versionNumber': self.version,
+            'documentPeriodDate': self.period.isoformat() + 'Z' if self.period else None,
+            'documentPeriodFormatted': self.period.strftime('%B %d, %Y') if self.period else 'Unknown period',
+            'lastModifiedFormatted': modified_at.strftime('%b %d, %Y, %I:%M %p'),
+            'recencyScore': calculate_recency_score(self),
+            'chainId': self.chain_id
+        }
+        if self.older_versions is not None:
+            doc['olderVersionCount'] = self.older_versions
+        return doc
+
+
+def calculate_recency_score(record):
+    """
+    Legacy blended recency score, kept in the JSON for consumers of the
+    server's /api/compliance-docs format. Sorting uses DocumentRecord.recency_key.
+    """
     score = 0
     
     # 1. Document period date (weight: 1,000,000)
-    if doc.get('documentPeriodDate'):
-        period_date = datetime.fromisoformat(doc['documentPeriodDate'].replace('Z', '+00:00'))
-        score += period_date.timestamp() / 1000
+    if record.period:
+        score += record.period.timestamp() / 1000
     
     # 2. Version number (weight: 10,000)
-    score += (doc.get('versionNumber', 0)) * 10000
+    score += record.version * 10000
     
     # 3. File modification time (weight: 1)
-    if doc.get('modifiedAt'):
-        modified_date = datetime.fromisoformat(doc['modifiedAt'].replace('Z', '+00:00'))
-        score += modified_date.timestamp() / 1000000
+    score += record.mtime / 1000000
     
     return score
 
 
-def scan_documents():
-    """Scan NLTS-PR directory and generate compliance documents JSON."""
-    documents = []
+def iter_document_entries(directory):
+    """Yield os.DirEntry objects for candidate documents under directory (recursive)."""
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in VALID_EXTENSIONS:
+                        yield entry
+        except OSError:
+            continue
+
+
+def scan_documents(all_versions=False, directory=None, extract_text=None, sniff_spreadsheets=False,
+                   ocr_queue=None, wait_for_ocr=False):
+    """
+    Scan NLTS-PR directory (or directory) and collect DocumentRecords grouped by type.
+    extract_text replaces extract_pdf_content for PDFs, e.g. a stub in benchmarks.
+    With sniff_spreadsheets, .xlsx/.xlsm files are classified from a
+    sniff_spreadsheet_content() sample instead of the filename alone.
+    With an ocr_queue, PDFs with an empty text layer use cached OCR text or are
+    queued for background OCR; wait_for_ocr drains the queue and reclassifies
+    them in this scan instead of leaving the improvement to the next one.
+    Only the head of each version chain is listed under 'documents' unless
+    all_versions is set; older revisions are returned under 'versions' keyed
+    by chainId so they can be published separately and fetched on demand.
+    Use serialize_result() to turn the records into JSON-ready dicts.
+    """
+    directory = directory or NLTS_PR_DIR
+    extract_text = extract_text or extract_pdf_content
+    records = []
+    ocr_pending = []
     
-    for root, dirs, files in os.walk(NLTS_PR_DIR):
-        for filename in files:
-            ext = os.path.splitext(filename)[1].lower()
-            if ext not in VALID_EXTENSIONS:
-                continue
-            
-            filepath = os.path.join(root, filename)
-            stats = os.stat(filepath)
-            
-            # Extract content for classification
-            if ext == '.pdf':
-                content = extract_pdf_content(filepath)
-            else:
-                content = filename.lower()
-            
-            doc_type = identify_document_type(content, filename, filepath)
-            period_date = extract_document_period_date(filename, content)
-            version_number = extract_version_number(filename)
-            
-            # Format dates
-            modified_at = datetime.fromtimestamp(stats.st_mtime)
-            created_at = datetime.fromtimestamp(stats.st_ctime)
-            
-            doc = {
-                'filename': filename,
-                'path': filepath,
-                'documentType': doc_type,
-                'modifiedAt': modified_at.isoformat() + 'Z',
-                'createdAt': created_at.isoformat() + 'Z',
-                'size': stats.st_size,
-                'versionNumber': version_number,
-                'documentPeriodDate': period_date.isoformat() + 'Z' if period_date else None,
-                'documentPeriodFormatted': period_date.strftime('%B %d, %Y') if period_date else 'Unknown period',
-                'lastModifiedFormatted': modified_at.strftime('%b %d, %Y, %I:%M %p')
-            }
-            
-            doc['recencyScore'] = calculate_recency_score(doc)
-            documents.append(doc)
+    for entry in iter_document_entries(directory):
+        filename = entry.name
+        filepath = entry.path
+        stats = entry.stat()
+        
+        # Extract content for classification
+        ext = os.path.splitext(filename)[1].lower()
+        queued_hash = None
+        if ext == '.pdf':
+            content = extract_text(filepath)
+            if ocr_queue is not None and not content.strip():
+                # No text layer: scanned document
+                content_hash = hash_file(filepath)
+                cached = ocr_queue.lookup(content_hash)
+                if cached is not None:
+                    content = cached
+                else:
+                    ocr_queue.submit(filepath, content_hash)
+                    queued_hash = content_hash
+        elif sniff_spreadsheets and ext in SNIFFABLE_EXTENSIONS:
+            content = sniff_spreadsheet_content(filepath)
+        else:
+            content = filename.lower()
+        
+        doc_type = identify_document_type(content, filename, filepath)
+        record = DocumentRecord(
+            filename,
+            filepath,
+            doc_type,
+            stats.st_mtime,
+            stats.st_ctime,
+            stats.st_size,
+            extract_version_number(filename),
+            extract_document_period_date(filename, content, doc_type)
+        )
+        records.append(record)
+        if queued_hash:
+            ocr_pending.append((record, queued_hash))
+    
+    if ocr_pending:
+        print(f"Queued {len(ocr_pending)} scanned PDF(s) without a text layer for OCR")
+        if wait_for_ocr:
+            texts = ocr_queue.wait()
+            for record, content_hash in ocr_pending:
+                text = texts.get(content_hash)
+                if text:
+                    record.doc_type = identify_document_type(text, record.filename, record.path)
+                    record.period = extract_document_period_date(record.filename, text, record.doc_type)
     
     # Group by document type
     grouped = {}
-    for doc in documents:
-        doc_type = doc['documentType']
-        if doc_type not in grouped:
-            grouped[doc_type] = []
-        grouped[doc_type].append(doc)
+    for record in records:
+        grouped.setdefault(record.doc_type, []).append(record)
     
-    # Sort each group by recency score (highest first)
+    # Collapse revisions into version chains, then sort heads newest first
+    versions = {}
     for doc_type in grouped:
-        grouped[doc_type].sort(key=lambda x: x['recencyScore'], reverse=True)
+        chains = group_version_chains(grouped[doc_type])
+        if all_versions:
+            grouped[doc_type] = [record for chain in chains for record in chain]
+        else:
+            grouped[doc_type] = [chain[0] for chain in chains]
+            for chain in chains:
+                if len(chain) > 1:
+                    versions[chain[0].chain_id] = chain[1:]
+        grouped[doc_type].sort(key=lambda record: record.recency_key, reverse=True)
         
         # Log top document for each category
         if grouped[doc_type]:
             top = grouped[doc_type][0]
-            print(f"[{doc_type}] Top: {top['filename']} (v{top['versionNumber']}, {top['documentPeriodFormatted']}, score={top['recencyScore']:.0f})")
+            period = top.period.strftime('%B %d, %Y') if top.period else 'Unknown period'
+            print(f"[{doc_type}] Top: {top.filename} (v{top.version}, {period})")
+            progress.emit('documents', docType=doc_type, count=len(grouped[doc_type]), top=top.to_dict())
     
     result = {
         'success': True,
-        'directory': NLTS_PR_DIR,
-        'totalFiles': len(documents),
+        'directory': directory,
+        'totalFiles': len(records),
         'documentTypes': list(DOCUMENT_PATTERNS.keys()),
         'documents': grouped,
+        'versions': versions,
         'generatedAt': datetime.now().isoformat() + 'Z'
     }
     
     return result
 
 
-def main():
+def serialize_result(result):
+    """Convert the DocumentRecords in a scan_documents() result to dicts."""
+    serialized = dict(result)
+    serialized['documents'] = {
+        doc_type: [record.to_dict() for record in records]
+        for doc_type, records in result['documents'].items()
+    }
+    serialized['versions'] = {
+        chain_id: [record.to_dict() for record in records]
+        for chain_id, records in result['versions'].items()
+    }
+    return serialized
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scan NLTS-PR compliance documents.')
+    parser.add_argument('--all-versions', action='store_true',
+                        help='List every revision inline instead of only the head of each version chain')
+    parser.add_argument('--sniff-spreadsheets', action='store_true',
+                        help='Classify .xlsx/.xlsm files from docProps and their first rows, not just the filename')
+    parser.add_argument('--no-ocr', action='store_true', help='Do not OCR scanned PDFs without a text layer')
+    parser.add_argument('--ocr-workers', type=int, default=2, help='Concurrent OCR jobs (default: 2)')
+    parser.add_argument('--ocr-wait', action='store_true',
+                        help='Wait for OCR and use its text in this scan instead of the next one')
+    args = parser.parse_args(argv)
+
+    ocr_queue = None
+    if not args.no_ocr:
+        # Imported here: the OCR pool is not needed for --no-ocr or --help
+        from ocr_queue import OcrQueue, ocr_engine_available
+        if ocr_engine_available():
+            ocr_queue = OcrQueue(OCR_CACHE_DIR, max_workers=args.ocr_workers)
+        else:
+            print("OCR disabled: pdftoppm/tesseract not found on PATH")
+
     print("Scanning compliance documents...")
-    result = scan_documents()
+    result = serialize_result(scan_documents(all_versions=args.all_versions,
+                                             sniff_spreadsheets=args.sniff_spreadsheets,
+                                             ocr_queue=ocr_queue,
+                                             wait_for_ocr=args.ocr_wait))
+    versions = result.pop('versions')
     
     print(f"\nTotal files scanned: {result['totalFiles']}")
+    progress.emit('done', totalFiles=result['totalFiles'], output=OUTPUT_PATH,
+                  documents={doc_type: len(docs) for doc_type, docs in result['documents'].items()})
     print(f"Document types found: {list(result['documents'].keys())}")
     
-    # Write to output file
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(result, f, indent=2, ensure_ascii=False)
-    
-    print(f"\nOutput written to: {OUTPUT_PATH}")
+    # Write to output file (skipped when only generatedAt changed)
+    if publish_json(result, OUTPUT_PATH):
+        print(f"\nOutput written to: {OUTPUT_PATH}")
+    else:
+        print(f"\nOutput unchanged: {OUTPUT_PATH}")
+
+    # Older revisions go to a sidecar file so the main payload only carries chain heads
+    if publish_json(versions, VERSIONS_OUTPUT_PATH):
+        print(f"Older versions ({sum(len(v) for v in versions.values())}) written to: {VERSIONS_OUTPUT_PATH}")
     
     # Highlight Financial Statements
     if 'Financial Statements' in result['documents']:
@@ -247,9 +651,16 @@ def main():
         print(f"\n=== FINANCIAL STATEMENTS ({len(fs_docs)} found) ===")
         for i, doc in enumerate(fs_docs[:5]):  # Show top 5
             print(f"  {i+1}. {doc['filename']}")
-            print(f"     Period: {doc['documentPeriodFormatted']}, Version: {doc['versionNumber']}")
+            print(f"     Period: {doc['documentPeriodFormatted']}, Version: {doc['versionNumber']}, Older versions: {doc.get('olderVersionCount', 0)}")
             print(f"     Modified: {doc['lastModifiedFormatted']}")
 
+    # Let background OCR finish so the cache is warm for the next scan
+    if ocr_queue is not None:
+        if ocr_queue.pending_count:
+            print(f"\nWaiting for {ocr_queue.pending_count} OCR job(s) to finish...")
+        ocr_queue.shutdown(wait=True)
+        print(f"OCR: {ocr_queue.completed} cached, {ocr_queue.failed} failed ({OCR_CACHE_DIR})")
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+What-if and sensitivity engine over the extracted statements.
+
+The base position comes from financial_statements.json (BS/IS lines, via
+FinancialModel). A scenario is a set of shocks to it, like "receivables -10%"
+or "refinance $200K of current liabilities". Ratios are recomputed from the
+shocked figures and graded against the BENCHMARKS thresholds that
+determine_status uses for the workbook's ratios.
+
+Every scenario is a row of an (n, fields) NumPy array, so thousands of shock
+combinations are applied, recomputed and graded in a few array operations:
+
+    evaluate(shocks)        shocks: {driver: value or array}; arrays broadcast
+    surface(x, xs, y, ys)   2-D grid of two drivers -> ratio values and statuses
+    sensitivity(driver, lo, hi)
+                            driver values where each ratio crosses a threshold
+
+The balance sheet stays balanced: equity is assets minus liabilities, so a
+write-down of receivables or inventory flows through retained earnings, and
+refinancing only moves debt between current and long-term liabilities.
+
+Usage:
+    python scripts/scenario_engine.py --shock receivables_pct=-10 --shock refinance=200000
+    python scripts/scenario_engine.py --sensitivity revenue_pct:-50:50
+    python scripts/scenario_engine.py --surface receivables_pct:-30:30 refinance:0:500000 --output public/data/what_if_surface.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from financial_model import FinancialModel
+from statement_analytics import BASE_LINES as ANALYTICS_BASE_LINES
+import nlt_config
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server')
+sys.path.insert(0, SERVER_DIR)
+from extract_dynamic_ratios import BENCHMARKS
+
+# Statement lines behind each base figure: (statement, pattern over the
+# normalized line name). Names are matched exactly against these aliases,
+# never fuzzily, so a missing 'Revenue' cannot resolve to 'Cost of Revenue'.
+BASE_LINES = {
+    'cash': ('BS', re.compile(r'^cash( and (cash )?equivalents)?$')),
+    'receivables': ('BS', re.compile(r'^(accounts receivable|trade receivables)( trade| net)?$')),
+    'inventory': ('BS', re.compile(r'^inventor(y|ies)$')),
+    'current_assets': ('BS', re.compile(r'^total current assets$')),
+    'total_assets': ('BS', ANALYTICS_BASE_LINES['BS']),
+    'accounts_payable': ('BS', re.compile(r'^accounts payable( trade)?$')),
+    'current_liabilities': ('BS', re.compile(r'^total current liabilities$')),
+    'long_term_liabilities': ('BS', re.compile(r'^total long term liabilities$')),
+    'equity': ('BS', re.compile(r"^total (shareholders|stockholders) equity$")),
+    'retained_earnings': ('BS', re.compile(r'^retained earnings$')),
+    'revenue': ('IS', ANALYTICS_BASE_LINES['IS']),
+    'cost_of_revenue': ('IS', re.compile(r'^cost of (revenue|revenues|sales|goods sold)$')),
+    'operating_expenses': ('IS', re.compile(r'^total (general and administrative|operating) expenses$')),
+    'depreciation': ('IS', re.compile(r'^depreciation( and amortization)?$')),
+    'interest_expense': ('IS', re.compile(r'^interest expense$')),
+    'other_income': ('IS', re.compile(r'^other income$')),
+    'income_tax': ('IS', re.compile(r'^provision for income tax')),
+}
+# Figures every ratio depends on: load_base fails without them; the rest default to 0 with a warning
+REQUIRED_BASE = ('current_assets', 'total_assets', 'current_liabilities', 'equity', 'revenue')
+
+# Columns of the scenario matrix; subtotals are derived from these
+FIELDS = ('cash', 'receivables', 'inventory', 'other_current_assets', 'noncurrent_assets',
+          'accounts_payable', 'other_current_liabilities', 'long_term_liabilities', 'contributed_capital',
+          'revenue', 'cost_of_revenue', 'operating_expenses', 'depreciation', 'interest_expense', 'other_income')
+F = {name: i for i, name in enumerate(FIELDS)}
+
+# Shock drivers: percentage changes (-10 = -10%) or amounts
+DRIVERS = {
+    'cash_pct': 'Cash, % change',
+    'receivables_pct': 'Receivables written down or up, % (through equity)',
+    'collect_pct': 'Share of receivables collected into cash, %',
+    'inventory_pct': 'Inventory written down or up, % (through equity)',
+    'payables_pct': 'Accounts payable, % change (paid from or added to cash)',
+    'revenue_pct': 'Sales volume, % (revenue and cost of revenue move together)',
+    'price_pct': 'Price, % (revenue only)',
+    'cost_pct': 'Cost of revenue, % change',
+    'opex_pct': 'General and administrative expenses, % change',
+    'interest_pct': 'Interest expense, % change',
+    'refinance': 'Amount of current liabilities refinanced to long-term (capped at what is left)',
+    'new_debt': 'New long-term borrowing, received in cash',
+    'paydown': 'Cash used to pay down current liabilities (capped at what is left)',
+}
+
+STATUS_NAMES = ('good', 'warning', 'danger', 'neutral')
+GOOD, WARNING, DANGER, NEUTRAL = range(4)
+DAYS_PER_YEAR = 365
+
+
+def load_base(statements_json=None):
+    """
+    Base figures {name: amount} for the current year, from the extracted statements.
+    Raises ValueError if a REQUIRED_BASE line is missing; other missing lines
+    are 0 with a warning.
+    """
+    model = FinancialModel.from_json(statements_json or nlt_config.STATEMENTS_JSON)
+    base = {}
+    missing = []
+    for name, (statement, pattern) in BASE_LINES.items():
+        line = model.match(pattern, statement)
+        if line is None:
+            missing.append(name)
+        base[name] = line.current if line is not None else 0.0
+    required = [name for name in missing if name in REQUIRED_BASE]
+    if required:
+        raise ValueError(f"Base line(s) not found in the statements: {', '.join(required)}")
+    if missing:
+        print(f"Warning: base line(s) not found, taken as 0: {', '.join(missing)}", file=sys.stderr)
+    base['asOf'] = model.years[0]
+    return base
+
+
+class ScenarioEngine:
+    """Base position, ratio definitions and benchmark thresholds as arrays."""
+
+    def __init__(self, base, benchmarks=BENCHMARKS):
+        self.base = np.zeros(len(FIELDS))
+        row = self.base
+        row[F['cash']] = base['cash']
+        row[F['receivables']] = base['receivables']
+        row[F['inventory']] = base['inventory']
+        row[F['other_current_assets']] = base['current_assets'] - base['cash'] - base['receivables'] - base['inventory']
+        row[F['noncurrent_assets']] = base['total_assets'] - base['current_assets']
+        row[F['accounts_payable']] = base['accounts_payable']
+        row[F['other_current_liabilities']] = base['current_liabilities'] - base['accounts_payable']
+        row[F['long_term_liabilities']] = base['long_term_liabilities']
+        # Equity other than retained earnings; retained earnings absorb every shock
+        row[F['contributed_capital']] = base['equity'] - base['retained_earnings']
+        row[F['revenue']] = base['revenue']
+        row[F['cost_of_revenue']] = base['cost_of_revenue']
+        row[F['operating_expenses']] = base['operating_expenses']
+        row[F['depreciation']] = base['depreciation']
+        # Interest is negative on the IS (an expense); it is carried as a positive cost
+        row[F['interest_expense']] = abs(base['interest_expense'])
+        row[F['other_income']] = base['other_income']
+        self.base_equity = base['equity']
+        self.base_retained_earnings = base['retained_earnings']
+
+        pre_tax = (base['revenue'] - base['cost_of_revenue'] - base['operating_expenses']
+                   - abs(base['interest_expense']) + base['other_income'])
+        self.tax_rate = base['income_tax'] / pre_tax if pre_tax > 0 else 0.0
+
+        self.ratio_names = list(RATIOS)
+        self.benchmarks = [self._benchmark(name, benchmarks) for name in self.ratio_names]
+
+    @staticmethod
+    def _benchmark(ratio_name, benchmarks):
+        """(good, warning, higher_is_better) by determine_status's matching, or None for neutral."""
+        for key, bench in benchmarks.items():
+            if key in ratio_name:
+                if bench['good'] is None or bench['warning'] is None:
+                    return None
+                return bench['good'], bench['warning'], bench['higher_is_better']
+        return None
+
+    # -- shocks -------------------------------------------------------------
+
+    def apply(self, shocks):
+        """(n, fields) matrix of shocked positions; scalar shocks broadcast over array shocks."""
+        unknown = set(shocks) - set(DRIVERS)
+        if unknown:
+            raise ValueError(f"Unknown driver(s): {', '.join(sorted(unknown))}")
+        arrays = {name: np.atleast_1d(np.asarray(value, dtype=float)) for name, value in shocks.items()}
+        n = max((a.size for a in arrays.values()), default=1)
+        m = np.tile(self.base, (n, 1))
+
+        def shock(name):
+            return arrays[name] if name in arrays else 0.0
+
+        def scale(field, name):
+            m[:, F[field]] *= 1 + shock(name) / 100
+
+        collected = m[:, F['receivables']] * shock('collect_pct') / 100
+        m[:, F['receivables']] -= collected
+        m[:, F['cash']] += collected
+        scale('receivables', 'receivables_pct')
+        scale('inventory', 'inventory_pct')
+        scale('cash', 'cash_pct')
+
+        payables_change = m[:, F['accounts_payable']] * shock('payables_pct') / 100
+        m[:, F['accounts_payable']] += payables_change
+        m[:, F['cash']] += payables_change
+
+        m[:, F['revenue']] *= (1 + shock('revenue_pct') / 100) * (1 + shock('price_pct') / 100)
+        m[:, F['cost_of_revenue']] *= (1 + shock('revenue_pct') / 100) * (1 + shock('cost_pct') / 100)
+        scale('operating_expenses', 'opex_pct')
+        scale('interest_expense', 'interest_pct')
+
+        # Refinancing and paydown are capped at the current liabilities left to move
+        refinance = np.minimum(shock('refinance'), np.maximum(m[:, F['other_current_liabilities']], 0))
+        m[:, F['other_current_liabilities']] -= refinance
+        m[:, F['long_term_liabilities']] += refinance
+        m[:, F['long_term_liabilities']] += shock('new_debt')
+        paydown = np.minimum(shock('paydown'), np.maximum(m[:, F['other_current_liabilities']], 0))
+        m[:, F['cash']] += shock('new_debt') - paydown
+        m[:, F['other_current_liabilities']] -= paydown
+        return m
+
+    # -- ratios -------------------------------------------------------------
+
+    def figures(self, m):
+        """Subtotals of shocked positions, each an (n,) array."""
+        c = {name: m[:, i] for name, i in F.items()}
+        current_assets = c['cash'] + c['receivables'] + c['inventory'] + c['other_current_assets']
+        total_assets = current_assets + c['noncurrent_assets']
+        current_liabilities = c['accounts_payable'] + c['other_current_liabilities']
+        total_liabilities = current_liabilities + c['long_term_liabilities']
+        equity = total_assets - total_liabilities
+        gross_profit = c['revenue'] - c['cost_of_revenue']
+        operating_income = gross_profit - c['operating_expenses']
+        pre_tax = operating_income - c['interest_expense'] + c['other_income']
+        net_income = pre_tax - np.maximum(pre_tax, 0) * self.tax_rate
+        return {
+            **c,
+            'current_assets': current_assets,
+            'total_assets': total_assets,
+            'current_liabilities': current_liabilities,
+            'total_liabilities': total_liabilities,
+            'equity': equity,
+            'retained_earnings': self.base_retained_earnings + (equity - self.base_equity),
+            'working_capital': current_assets - current_liabilities,
+            'gross_profit': gross_profit,
+            'operating_income': operating_income,
+            'pre_tax': pre_tax,
+            'net_income': net_income,
+            'ebitda': operating_income + c['depreciation'],
+        }
+
+    def ratios(self, m):
+        """{ratio: (n,) values}; NaN where a denominator is zero."""
+        fig = self.figures(m)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return {name: np.where(np.isfinite(v := fn(fig)), v, np.nan) for name, fn in RATIOS.items()}
+
+    def statuses(self, values):
+        """{ratio: (n,) status codes} (GOOD/WARNING/DANGER/NEUTRAL), as determine_status grades them."""
+        graded = {}
+        for name, bench in zip(self.ratio_names, self.benchmarks):
+            v = values[name]
+            if bench is None:
+                graded[name] = np.full(v.shape, NEUTRAL, dtype=np.int8)
+                continue
+            good, warning, higher_is_better = bench
+            if higher_is_better:
+                codes = np.where(v >= good, GOOD, np.where(v >= warning, WARNING, DANGER))
+            else:
+                codes = np.where(v <= good, GOOD, np.where(v <= warning, WARNING, DANGER))
+            graded[name] = np.where(np.isnan(v), NEUTRAL, codes).astype(np.int8)
+        return graded
+
+    def evaluate(self, shocks):
+        """(ratio values, status codes) for every scenario in shocks."""
+        values = self.ratios(self.apply(shocks))
+        return values, self.statuses(values)
+
+    # -- surfaces -----------------------------------------------------------
+
+    def surface(self, x_driver, x_values, y_driver, y_values, fixed=None):
+        """
+        Ratios and statuses over the grid of two drivers (rows: y, columns: x),
+        with any other shocks held at fixed. Returns a JSON-ready dict.
+        """
+        x_values = np.asarray(x_values, dtype=float)
+        y_values = np.asarray(y_values, dtype=float)
+        xx, yy = np.meshgrid(x_values, y_values)
+        shocks = dict(fixed or {})
+        shocks[x_driver] = xx.ravel()
+        shocks[y_driver] = yy.ravel()
+        values, statuses = self.evaluate(shocks)
+        shape = xx.shape
+        return {
+            'x': {'driver': x_driver, 'values': x_values.tolist()},
+            'y': {'driver': y_driver, 'values': y_values.tolist()},
+            'fixed': fixed or {},
+            'statusNames': STATUS_NAMES,
+            'ratios': {
+                name: {
+                    'values': _json_grid(np.round(values[name].reshape(shape), 4)),
+                    'status': statuses[name].reshape(shape).tolist(),
+                }
+                for name in self.ratio_names
+            }
+        }
+
+    def sensitivity(self, driver, low, high, steps=2001, fixed=None):
+        """
+        {ratio: [{'at': driver value, 'from': status, 'to': status}]} where the
+        ratio's status changes as driver moves from low to high. Crossing
+        points are interpolated to the threshold between grid steps.
+        """
+        grid = np.linspace(low, high, steps)
+        shocks = dict(fixed or {})
+        shocks[driver] = grid
+        values, statuses = self.evaluate(shocks)
+        crossings = {}
+        for name, bench in zip(self.ratio_names, self.benchmarks):
+            codes = statuses[name]
+            changes = np.flatnonzero(codes[1:] != codes[:-1])
+            if not changes.size:
+                continue
+            v = values[name]
+            points = []
+            for i in changes:
+                at = grid[i + 1]
+                if bench is not None and np.isfinite(v[i]) and np.isfinite(v[i + 1]) and v[i] != v[i + 1]:
+                    good, warning, _ = bench
+                    threshold = good if GOOD in (codes[i], codes[i + 1]) else warning
+                    at = grid[i] + (threshold - v[i]) / (v[i + 1] - v[i]) * (grid[i + 1] - grid[i])
+                points.append({'at': round(float(at), 4), 'from': STATUS_NAMES[codes[i]],
+                               'to': STATUS_NAMES[codes[i + 1]]})
+            crossings[name] = points
+        return crossings
+
+
+def _json_grid(grid):
+    """Nested lists with NaN as None (JSON has no NaN)."""
+    return np.where(np.isnan(grid), None, grid).tolist()
+
+
+# Ratio formulas over ScenarioEngine.figures(); names follow the BENCHMARKS keys
+RATIOS = {
+    'current ratio': lambda f: f['current_assets'] / f['current_liabilities'],
+    'quick ratio': lambda f: (f['cash'] + f['receivables']) / f['current_liabilities'],
+    'debt to equity': lambda f: f['total_liabilities'] / f['equity'],
+    'debt ratio': lambda f: f['total_liabilities'] / f['total_assets'],
+    'gross profit margin': lambda f: f['gross_profit'] / f['revenue'],
+    'operating margin': lambda f: f['operating_income'] / f['revenue'],
+    'net profit margin before tax': lambda f: f['pre_tax'] / f['revenue'],
+    'net profit margin after tax': lambda f: f['net_income'] / f['revenue'],
+    'sales to assets': lambda f: f['revenue'] / f['total_assets'],
+    'return on assets': lambda f: f['net_income'] / f['total_assets'],
+    'return on equity': lambda f: f['net_income'] / f['equity'],
+    'inventory turnover (x)': lambda f: f['cost_of_revenue'] / f['inventory'],
+    'accounts receivable turnover (x)': lambda f: f['revenue'] / f['receivables'],
+    'collection period (days)': lambda f: f['receivables'] / f['revenue'] * DAYS_PER_YEAR,
+    'accounts payable (days)': lambda f: f['accounts_payable'] / f['cost_of_revenue'] * DAYS_PER_YEAR,
+    'interest coverage': lambda f: f['operating_income'] / f['interest_expense'],
+    'retained earnings to total assets': lambda f: f['retained_earnings'] / f['total_assets'],
+    'working capital to total assets': lambda f: f['working_capital'] / f['total_assets'],
+    'ebitda': lambda f: f['ebitda'],
+}
+
+
+def _parse_shock(text):
+    name, _, value = text.partition('=')
+    return name.strip(), float(value)
+
+
+def _parse_range(text):
+    """driver:low:high[:steps]"""
+    parts = text.split(':')
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError(f"Expected driver:low:high[:steps], got '{text}'")
+    steps = int(parts[3]) if len(parts) == 4 else None
+    return parts[0], float(parts[1]), float(parts[2]), steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='What-if scenarios over the extracted statements.')
+    parser.add_argument('--json', dest='json_path', default=nlt_config.STATEMENTS_JSON,
+                        help='financial_statements.json to load')
+    parser.add_argument('--shock', action='append', type=_parse_shock, default=[],
+                        help='driver=value, repeatable (see --drivers)')
+    parser.add_argument('--sensitivity', type=_parse_range, help='driver:low:high[:steps] threshold crossings')
+    parser.add_argument('--surface', nargs=2, type=_parse_range, metavar='driver:low:high[:steps]',
+                        help='Two drivers to grid (default 41 steps each)')
+    parser.add_argument('--output', help='Write the result as JSON to this path')
+    parser.add_argument('--drivers', action='store_true', help='List the shock drivers')
+    args = parser.parse_args(argv)
+
+    if args.drivers:
+        for name, description in DRIVERS.items():
+            print(f"  {name:<17}{description}")
+        return
+
+    engine = ScenarioEngine(load_base(args.json_path))
+    fixed = dict(args.shock)
+    start = time.perf_counter()
+
+    if args.surface:
+        (x, x_lo, x_hi, x_steps), (y, y_lo, y_hi, y_steps) = args.surface
+        result = engine.surface(x, np.linspace(x_lo, x_hi, x_steps or 41), y, np.linspace(y_lo, y_hi, y_steps or 41),
+                                fixed=fixed)
+        cells = len(result['x']['values']) * len(result['y']['values'])
+        print(f"Surface {x} x {y}: {cells:,} scenarios in {(time.perf_counter() - start) * 1000:.1f} ms")
+    elif args.sensitivity:
+        driver, low, high, steps = args.sensitivity
+        result = engine.sensitivity(driver, low, high, steps or 2001, fixed=fixed)
+        print(f"Sensitivity to {driver} [{low}, {high}] in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for name, points in result.items():
+            moves = ', '.join(f"{p['from']}->{p['to']} at {p['at']:g}" for p in points)
+            print(f"  {name:<36}{moves}")
+    else:
+        base_values, base_status = engine.evaluate({})
+        values, statuses = engine.evaluate(fixed)
+        shocks = ', '.join(f"{k}={v:g}" for k, v in fixed.items()) or 'none'
+        print(f"Scenario ({shocks}) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(f"{'ratio':<36}{'base':>14}{'scenario':>14}  status")
+        result = {}
+        for name in engine.ratio_names:
+            before, after = base_values[name][0], values[name][0]
+            was, now = STATUS_NAMES[base_status[name][0]], STATUS_NAMES[statuses[name][0]]
+            flag = f"{was} -> {now}" if was != now else now
+            print(f"{name:<36}{before:>14.4f}{after:>14.4f}  {flag}")
+            result[name] = {'base': None if np.isnan(before) else round(float(before), 4),
+                            'value': None if np.isnan(after) else round(float(after), 4),
+                            'baseStatus': was, 'status': now}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Per-sheet parallel extraction for the FS workbook.
+
+The workbook's sheets are independent, so each extraction job opens the
+workbook in openpyxl's read-only (streaming) mode, which parses only the
+sheet it touches, and the jobs run in a process pool. Results come back to
+the parent, which merges them in a fixed order, so the output does not depend
+on which worker finished first.
+
+Read-only worksheets do not expose row_dimensions, so hidden_rows() streams
+the sheet's XML for the <row hidden="1"> flags instead.
+"""
+
+import os
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+
+XLSX_MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+XLSX_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def default_workers(job_count):
+    """One worker per job, capped at the CPU count."""
+    return max(1, min(job_count, os.cpu_count() or 1))
+
+
+def open_sheet(path, sheet_name):
+    """
+    (workbook, worksheet) opened read-only, or (workbook, None) if the sheet is
+    missing. An exact name wins; otherwise the sheet name is matched case-insensitively.
+    """
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    if sheet_name not in wb.sheetnames:
+        sheet_name = next((name for name in wb.sheetnames if name.lower() == sheet_name.lower()), None)
+    return wb, (wb[sheet_name] if sheet_name else None)
+
+
+def _sheet_part(archive, sheet_name):
+    """Zip member holding sheet_name's XML, or None."""
+    with archive.open('xl/workbook.xml') as f:
+        workbook = ET.parse(f).getroot()
+    rel_id = None
+    for sheet in workbook.iter(f'{XLSX_MAIN_NS}sheet'):
+        if sheet.get('name') == sheet_name:
+            rel_id = sheet.get(f'{XLSX_REL_NS}id')
+            break
+    if rel_id is None:
+        return None
+    with archive.open('xl/_rels/workbook.xml.rels') as f:
+        rels = ET.parse(f).getroot()
+    for rel in rels.iter(f'{XLSX_PKG_REL_NS}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target', '')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    return None
+
+
+def hidden_rows(path, sheet_name):
+    """1-based indexes of the hidden rows of sheet_name, read by streaming its XML."""
+    hidden = set()
+    with zipfile.ZipFile(path) as archive:
+        part = _sheet_part(archive, sheet_name)
+        if part is None:
+            return hidden
+        with archive.open(part) as f:
+            for event, elem in ET.iterparse(f, events=('start', 'end')):
+                if elem.tag != f'{XLSX_MAIN_NS}row':
+                    continue
+                if event == 'start':
+                    if elem.get('hidden') in ('1', 'true') and elem.get('r'):
+                        hidden.add(int(elem.get('r')))
+                else:
+                    elem.clear()
+    return hidden
+
+
+def _run_job(job):
+    func, args = job
+    return func(*args)
+
+
+def run_sheet_jobs(jobs, workers=None, on_result=None):
+    """
+    Run {key: (func, args)} jobs, each in its own process when workers > 1.
+    func must be a module-level function (it is pickled to the worker).
+    on_result(key, result) is called in the parent as each job finishes.
+    Returns {key: result} in the jobs' order.
+    """
+    keys = list(jobs)
+    workers = default_workers(len(keys)) if workers is None else workers
+    results = {}
+    if workers <= 1 or len(keys) <= 1:
+        for key in keys:
+            results[key] = _run_job(jobs[key])
+            if on_result:
+                on_result(key, results[key])
+        return results
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=min(workers, len(keys))) as pool:
+        futures = {pool.submit(_run_job, jobs[key]): key for key in keys}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+            if on_result:
+                on_result(futures[future], results[futures[future]])
+    return {key: results[key] for key in keys}
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Statement analytics computed at extraction time.
+
+The dashboard used to derive year-over-year variances from the raw BS/IS/CF
+arrays on every render. annotate_statements() computes them once, for every
+line and period column together, and stores them next to each line item:
+
+    commonSize   % of the sheet's base line per period
+                 (BS: TOTAL ASSETS; IS and CF: Revenue)
+    change       amount change vs the next older period, keyed by the newer one
+    changePct    that change as % of the older period's absolute value
+
+plus, per sheet, in financials['Analytics']:
+
+    sectionTotals   sum of each section's detail lines per period, the same
+                    figures as FinancialModel.subtotals (financial_model's
+                    is_total_line decides which lines are totals)
+    margins         IS gross, operating, EBITDA, pretax and net margin per period
+
+A sheet is one lines x periods matrix: common-size is a row-vector division
+and changes are the difference of adjacent columns, computed with numpy when
+it is installed and per cell in plain Python otherwise. Ratios with a zero or
+missing denominator are None, and so is every non-finite input or result.
+"""
+
+import math
+import re
+
+from financial_model import is_total_line
+
+PERCENT_DECIMALS = 2
+AMOUNT_DECIMALS = 2
+
+BASE_LINES = {
+    'BS': re.compile(r'^total assets$', re.IGNORECASE),
+    'IS': re.compile(r'^(revenue|revenues|net sales|sales|ventas|ingresos)$', re.IGNORECASE),
+}
+BASE_LINES['CF'] = BASE_LINES['IS']  # cash flows are sized against revenue from the IS
+
+# margin: (IS line pattern, CF line pattern added to it or None)
+MARGIN_LINES = {
+    'grossMargin': (re.compile(r'^gross profit$', re.IGNORECASE), None),
+    'operatingMargin': (re.compile(r'^income from operations$|^operating income$', re.IGNORECASE), None),
+    'ebitdaMargin': (re.compile(r'^income from operations$|^operating income$', re.IGNORECASE),
+                     re.compile(r'^depreciation and amortization$', re.IGNORECASE)),
+    'pretaxMargin': (re.compile(r'^income before income tax', re.IGNORECASE), None),
+    'netMargin': (re.compile(r'^net income$', re.IGNORECASE), None),
+}
+
+
+def _is_number(value):
+    """A finite int or float: NaN and infinities are treated as missing (the output is strict JSON)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def period_columns(items):
+    """Year columns present on the lines, newest first."""
+    years = {key for item in items for key in item if key.isdigit() and len(key) == 4}
+    return sorted(years, reverse=True)
+
+
+def _find_line(items, pattern):
+    for i, item in enumerate(items):
+        if pattern.search((item.get('name') or '').strip()):
+            return i
+    return None
+
+
+def _round(value, decimals):
+    return round(value, decimals) if _is_number(value) else None
+
+
+def _matrix(items, periods):
+    return [[float(item[p]) if _is_number(item.get(p)) else None for p in periods] for item in items]
+
+
+def _compute(matrix, base_row):
+    """(common size, change, change %) matrices; None where undefined."""
+    try:
+        import numpy as np
+    except ImportError:  # optional: the same arithmetic per cell
+        np = None
+
+    if np is not None and matrix and matrix[0]:
+        values = np.array(matrix, dtype=float)  # None -> nan
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            if base_row is not None:
+                base = np.array(base_row, dtype=float)
+                common = values / np.where(base == 0, np.nan, base) * 100
+            else:
+                common = np.full(values.shape, np.nan)
+            change = values[:, :-1] - values[:, 1:]
+            older = np.abs(values[:, 1:])
+            change_pct = change / np.where(older == 0, np.nan, older) * 100
+        to_lists = lambda a: np.where(np.isfinite(a), a, None).tolist()
+        return to_lists(common), to_lists(change), to_lists(change_pct)
+
+    common, change, change_pct = [], [], []
+    for row in matrix:
+        common.append([
+            v / b * 100 if v is not None and base_row is not None and b not in (None, 0) else None
+            for v, b in zip(row, base_row or [None] * len(row))
+        ])
+        deltas = [new - old if new is not None and old is not None else None for new, old in zip(row, row[1:])]
+        change.append(deltas)
+        change_pct.append([
+            d / abs(old) * 100 if d is not None and old else None for d, old in zip(deltas, row[1:])
+        ])
+    return common, change, change_pct
+
+
+def _section_totals(items, matrix, periods):
+    totals = {}
+    for item, row in zip(items, matrix):
+        if is_total_line(str(item.get('name', '')).strip()):
+            continue
+        sums = totals.setdefault(item.get('section', 'General'), [0.0] * len(periods))
+        for j, value in enumerate(row):
+            if value is not None:
+                sums[j] += value
+    return {section: {p: _round(v, AMOUNT_DECIMALS) for p, v in zip(periods, sums)} for section, sums in totals.items()}
+
+
+def _margins(income, cash_flows, periods):
+    income_base = _find_line(income, BASE_LINES['IS'])
+    if income_base is None:
+        return {}
+    revenue = [income[income_base].get(p) for p in periods]
+    margins = {}
+    for name, (line, addback) in MARGIN_LINES.items():
+        i = _find_line(income, line)
+        if i is None:
+            continue
+        values = [income[i].get(p) for p in periods]
+        if addback is not None:
+            j = _find_line(cash_flows, addback)
+            if j is None:
+                continue
+            values = [v + a if _is_number(v) and _is_number(a) else None
+                      for v, a in zip(values, (cash_flows[j].get(p) for p in periods))]
+        margins[name] = {
+            p: _round(v / r * 100, PERCENT_DECIMALS) if _is_number(v) and _is_number(r) and r else None
+            for p, v, r in zip(periods, values, revenue)
+        }
+    return margins
+
+
+def annotate_statements(financials, sheets=('BS', 'IS', 'CF')):
+    """Add commonSize/change/changePct to every BS/IS/CF line and financials['Analytics']; returns the latter."""
+    income = financials.get('IS') or []
+    analytics = {}
+    for sheet in sheets:
+        items = financials.get(sheet) or []
+        periods = period_columns(items)
+        if not items or not periods:
+            continue
+        matrix = _matrix(items, periods)
+        base_items = income if sheet in ('IS', 'CF') else items
+        base_index = _find_line(base_items, BASE_LINES[sheet])
+        base_row = None
+        if base_index is not None:
+            base_row = [float(base_items[base_index][p]) if _is_number(base_items[base_index].get(p)) else None
+                        for p in periods]
+        common, change, change_pct = _compute(matrix, base_row)
+
+        for item, c_row, d_row, p_row in zip(items, common, change, change_pct):
+            item['commonSize'] = {p: _round(v, PERCENT_DECIMALS) for p, v in zip(periods, c_row)}
+            item['change'] = {p: _round(v, AMOUNT_DECIMALS) for p, v in zip(periods, d_row)}
+            item['changePct'] = {p: _round(v, PERCENT_DECIMALS) for p, v in zip(periods, p_row)}
+
+        analytics[sheet] = {
+            'periods': periods,
+            'base': base_items[base_index]['name'] if base_index is not None else None,
+            'sectionTotals': _section_totals(items, matrix, periods),
+        }
+    if 'IS' in analytics:
+        analytics['IS']['margins'] = _margins(income, financials.get('CF') or [], analytics['IS']['periods'])
+    financials['Analytics'] = analytics
+    return analytics
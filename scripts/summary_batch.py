@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Batch generator for the bilingual executive summaries and detailed analyses.
+
+The publish flow used to request executive_summary_{en,es}.json and
+detailed_analysis_{en,es}.json one after another, from scratch, on every run.
+This module builds every (section, language) variant concurrently with at
+most --concurrency requests in flight, and caches each answer on disk keyed
+by the SHA-256 of:
+
+    the ratio data (without extractedAt), the section, the language,
+    the prompt template and the backend name
+
+so unchanged ratios reuse the previous answers without a query, while editing
+a template or syncing new ratios regenerates only what they affect. The cache
+keeps the most recently used --max-entries answers (LRU).
+
+Backends:
+    ServerClient    POST /api/chat on the dashboard server (NotebookLM)
+    McpBackend      NotebookLM's MCP server directly, over one pipelined
+                    session (--backend mcp, see mcp_client.py)
+    StubClient      local canned answers with a simulated latency (--stub)
+
+Usage:
+    python scripts/summary_batch.py                       # server at localhost:3001
+    python scripts/summary_batch.py --backend mcp --concurrency 4
+    python scripts/summary_batch.py --stub --output-dir /tmp/out
+    python scripts/summary_batch.py --languages en --sections summary --force
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shlex
+import asyncio
+import hashlib
+import argparse
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime
+
+from publish_stage import canonical_json, publish_json, split_volatile, write_atomic
+import nlt_config
+import progress
+
+LANGUAGES = ('es', 'en')
+SECTIONS = ('summary', 'analysis')
+DEFAULT_API_URL = 'http://localhost:3001'
+DEFAULT_CONCURRENCY = 2
+DEFAULT_MAX_ENTRIES = 64
+REQUEST_TIMEOUT = 300
+
+# Same prompts as /api/executive-summary/generate and scripts/publish_update.js
+SUMMARY_TEMPLATES = {
+    'es': """[IDIOMA: ESPAÑOL] INSTRUCCIÓN CRÍTICA: TODA tu respuesta DEBE estar COMPLETAMENTE en ESPAÑOL. NO uses inglés bajo ninguna circunstancia.
+
+Genera un Resumen Ejecutivo profesional para los siguientes datos financieros. Incluye: 1) Hallazgos Clave, 2) Análisis de Liquidez, 3) Estructura de Capital, 4) Eficiencia Operativa, 5) Conclusiones y Recomendaciones.
+
+Datos: {context}""",
+    'en': """[LANGUAGE: ENGLISH] CRITICAL INSTRUCTION: Your ENTIRE response MUST be COMPLETELY in ENGLISH. DO NOT use Spanish under any circumstances.
+
+Generate a professional Executive Summary for the following financial data. Include: 1) Key Findings, 2) Liquidity Analysis, 3) Capital Structure, 4) Operational Efficiency, 5) Conclusions and Recommendations.
+
+Data: {context}""",
+}
+
+SUMMARY_CONTEXT = """
+Financial Ratios for {company} as of {asOf}:
+Solvency: {solvencyRatios}
+Safety: {safetyRatios}
+Profitability: {profitabilityRatios}
+Asset Management: {assetManagementRatios}
+"""
+
+ANALYSIS_INSTRUCTIONS = {
+    'es': 'IMPORTANTE: Responde COMPLETAMENTE en español. Todas las explicaciones, análisis e interpretaciones deben estar en español.\n\n',
+    'en': 'IMPORTANT: Respond COMPLETELY in English. All explanations, analysis, and interpretations must be in English.\n\n',
+}
+
+ANALYSIS_TEMPLATE = """COMPREHENSIVE FINANCIAL RATIO ANALYSIS REQUEST({workbook}):
+
+Based on the audited financial statements file "{workbook}", provide a complete financial ratio analysis.
+
+EXTRACT AND CALCULATE THE FOLLOWING RATIOS:
+
+1. LIQUIDITY RATIOS:
+- Current Ratio(Current Assets / Current Liabilities)
+- Quick Ratio((Current Assets - Inventory) / Current Liabilities)
+- Cash Ratio(Cash & Equivalents / Current Liabilities)
+- Working Capital(Current Assets - Current Liabilities)
+
+2. PROFITABILITY RATIOS:
+- Gross Profit Margin(Gross Profit / Revenue × 100)
+- Operating Profit Margin(Operating Income / Revenue × 100)
+- Net Profit Margin(Net Income / Revenue × 100)
+- Return on Assets(ROA)(Net Income / Total Assets × 100)
+- Return on Equity(ROE)(Net Income / Shareholders' Equity × 100)
+- EBITDA Margin(EBITDA / Revenue × 100)
+
+3. LEVERAGE / SOLVENCY RATIOS:
+- Debt-to-Equity Ratio(Total Liabilities / Shareholders' Equity)
+- Debt-to-Assets Ratio(Total Liabilities / Total Assets)
+- Interest Coverage Ratio(EBIT / Interest Expense)
+- Equity Multiplier(Total Assets / Shareholders' Equity)
+
+4. EFFICIENCY RATIOS:
+- Asset Turnover(Revenue / Average Total Assets)
+- Inventory Turnover(COGS / Average Inventory)
+- Days Sales Outstanding(Accounts Receivable / Revenue × 365)
+- Days Payable Outstanding(Accounts Payable / COGS × 365)
+- Accounts Receivable Turnover(Revenue / Average Accounts Receivable)
+
+5. CASH FLOW RATIOS:
+- Operating Cash Flow Ratio(Operating Cash Flow / Current Liabilities)
+- Free Cash Flow(Operating Cash Flow - Capital Expenditures)
+- Cash Flow to Debt Ratio(Operating Cash Flow / Total Debt)
+
+For EACH RATIO provide:
+- Calculated value for NLTS-PR
+- Industry benchmark
+- Variance percentage
+- Status (above/below/at)
+- Brief explanation
+
+Return a JSON object with this EXACT structure:
+{{
+    "companySnapshot": {{
+        "totalRevenue": number,
+        "netIncome": number,
+        "totalAssets": number,
+        "totalEquity": number,
+        "fiscalYear": "{fiscalYear}"
+    }},
+    "ratioCategories": [
+        {{
+            "category": "Liquidity Ratios",
+            "description": "...",
+            "ratios": [
+                {{
+                    "name": "Current Ratio",
+                    "formula": "...",
+                    "value": number,
+                    "industryBenchmark": number,
+                    "variance": number,
+                    "status": "above|below|at",
+                    "interpretation": "..."
+                }}
+            ]
+        }}
+    ],
+    "overallAnalysis": "..."
+}}"""
+
+
+def template_for(section, language):
+    """The raw template text of a variant (part of its cache key)."""
+    if section == 'summary':
+        return SUMMARY_TEMPLATES[language] + SUMMARY_CONTEXT
+    return ANALYSIS_INSTRUCTIONS[language] + ANALYSIS_TEMPLATE
+
+
+def build_prompt(ratios, section, language):
+    """Fill a variant's template from the ratio data."""
+    if section == 'summary':
+        if ratios:
+            context = SUMMARY_CONTEXT.format(
+                company=ratios.get('company'), asOf=ratios.get('asOf'),
+                **{key: json.dumps(ratios.get(key), ensure_ascii=False, separators=(',', ':'))
+                   for key in ('solvencyRatios', 'safetyRatios', 'profitabilityRatios', 'assetManagementRatios')})
+        else:
+            context = 'No ratio data available'
+        return SUMMARY_TEMPLATES[language].format(context=context)
+    source = (ratios or {}).get('source') or 'NLTS-PR FS 12 31 2024 Rev156-3.xlsm'
+    as_of = (ratios or {}).get('asOf') or ''
+    fiscal_year = as_of[-4:] if as_of[-4:].isdigit() else '2024'
+    return ANALYSIS_INSTRUCTIONS[language] + ANALYSIS_TEMPLATE.format(
+        workbook=os.path.splitext(source)[0], fiscalYear=fiscal_year)
+
+
+def variant_key(ratios, section, language, backend):
+    """Cache key: hash of the stable ratio data, section, language, template and backend."""
+    stable, _ = split_volatile(ratios or {})
+    digest = hashlib.sha256()
+    for part in (canonical_json(stable), section.encode(), language.encode(),
+                 template_for(section, language).encode('utf-8'), backend.encode()):
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+def unwrap_answer(text):
+    """NotebookLM sometimes wraps its answer in JSON ({answer|text|content})."""
+    if text.startswith('{'):
+        try:
+            parsed = json.loads(text)
+        except ValueError:
+            return text
+        if isinstance(parsed, dict):
+            for key in ('answer', 'text', 'content'):
+                if isinstance(parsed.get(key), str):
+                    return parsed[key]
+    return text
+
+
+def parse_analysis(text):
+    """The analysis JSON embedded in an answer, or the raw answer if none parses."""
+    text = unwrap_answer(text)
+    match = re.search(r'\{[\s\S]*"ratioCategories"[\s\S]*\}', text) or re.search(r'\{[\s\S]*\}', text)
+    if not match:
+        return {'rawAnswer': text}
+    try:
+        return json.loads(match.group(0))
+    except ValueError:
+        return {'rawAnswer': text, 'error': 'Parse failed'}
+
+
+class SummaryCache:
+    """LRU cache of generated answers, one JSON file per key plus an index."""
+
+    def __init__(self, directory=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.directory = directory or nlt_config.SUMMARY_CACHE_DIR
+        self.max_entries = max_entries
+        self.index_path = os.path.join(self.directory, 'index.json')
+        self.order = OrderedDict()  # key -> last use, least recent first
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for key, used in json.load(f):
+                    self.order[key] = used
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(self.index_path, json.dumps(list(self.order.items())).encode('utf-8'))
+
+    def get(self, key):
+        """The cached entry for key (marked most recently used) or None."""
+        if key not in self.order:
+            return None
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            del self.order[key]
+            self._save_index()
+            return None
+        self.order.pop(key)
+        self.order[key] = time.time()
+        self._save_index()
+        return entry
+
+    def put(self, key, entry):
+        """Store entry under key and evict the least recently used beyond max_entries."""
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(self._entry_path(key), json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        self.order.pop(key, None)
+        self.order[key] = time.time()
+        while len(self.order) > self.max_entries:
+            evicted, _ = self.order.popitem(last=False)
+            try:
+                os.remove(self._entry_path(evicted))
+            except OSError:
+                pass
+        self._save_index()
+
+
+class ServerClient:
+    """Queries NotebookLM through the dashboard server's /api/chat."""
+
+    name = 'notebooklm'
+
+    def __init__(self, api_url=DEFAULT_API_URL, timeout=REQUEST_TIMEOUT):
+        self.api_url = api_url.rstrip('/')
+        self.timeout = timeout
+
+    def _post(self, prompt):
+        request = urllib.request.Request(
+            self.api_url + '/api/chat',
+            data=json.dumps({'message': prompt, 'noCache': True}).encode('utf-8'),  # SummaryCache handles reuse
+            headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = json.loads(response.read().decode('utf-8'))
+        content = data.get('content')
+        if not content or content.startswith('Error:'):
+            raise RuntimeError(content or data.get('error') or 'Empty response')
+        return content
+
+    async def query(self, prompt):
+        return await asyncio.to_thread(self._post, prompt)
+
+
+class McpBackend:
+    """Queries NotebookLM over a long-lived MCP session, without the dashboard server."""
+
+    name = 'notebooklm'
+
+    def __init__(self, client):
+        from mcp_client import NotebookSession
+        self.session = NotebookSession(client)
+
+    async def query(self, prompt):
+        return await self.session.query(prompt)
+
+
+class StubClient:
+    """Local stand-in that answers after a fixed delay and records its peak concurrency."""
+
+    name = 'stub'
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    async def query(self, prompt):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        tag = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        if '"ratioCategories"' in prompt:
+            return json.dumps({'status': 'success', 'answer': json.dumps({
+                'companySnapshot': {}, 'ratioCategories': [], 'overallAnalysis': f'Stub analysis {tag}'})})
+        return f'Stub executive summary {tag}'
+
+
+async def generate_variant(client, cache, semaphore, ratios, section, language, force=False):
+    """One (section, language) answer, from the cache or the backend; never raises."""
+    key = variant_key(ratios, section, language, client.name)
+    started = time.perf_counter()
+    entry = None if force else cache.get(key)
+    cached = entry is not None
+    if entry is None:
+        try:
+            async with semaphore:
+                content = await client.query(build_prompt(ratios, section, language))
+        except Exception as e:
+            progress.emit('variant', section=section, language=language, ok=False, error=str(e))
+            return {'section': section, 'language': language, 'key': key, 'ok': False, 'error': str(e)}
+        entry = {'content': content, 'source': client.name, 'generatedAt': datetime.now().isoformat()}
+        cache.put(key, entry)
+    seconds = round(time.perf_counter() - started, 3)
+    progress.emit('variant', section=section, language=language, ok=True, cached=cached, seconds=seconds)
+    return {'section': section, 'language': language, 'key': key, 'ok': True,
+            'cached': cached, 'seconds': seconds, **entry}
+
+
+async def generate_all(ratios, client, cache, languages=LANGUAGES, sections=SECTIONS,
+                       concurrency=DEFAULT_CONCURRENCY, force=False):
+    """Every (section, language) variant, at most `concurrency` backend queries at a time."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    return await asyncio.gather(*(
+        generate_variant(client, cache, semaphore, ratios, section, language, force)
+        for section in sections for language in languages))
+
+
+def write_outputs(results, output_dir):
+    """Write the dashboard files for the successful variants; returns the names rewritten."""
+    written = []
+    for result in results:
+        if not result['ok']:
+            continue
+        language = result['language']
+        if result['section'] == 'summary':
+            documents = [(f'executive_summary_{language}.json', {
+                'success': True,
+                'generated': True,
+                'source': result['source'],
+                'language': language,
+                'content': unwrap_answer(result['content']),
+                'generatedAt': result['generatedAt'],
+            })]
+            # Default copy for 'es' (historical compatibility)
+            if language == 'es':
+                documents.append(('executive_summary.json', documents[0][1]))
+        else:
+            documents = [(f'detailed_analysis_{language}.json', parse_analysis(result['content']))]
+        for name, data in documents:
+            if publish_json(data, os.path.join(output_dir, name)):
+                written.append(name)
+    return written
+
+
+def load_ratios(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate the executive summaries and detailed analyses concurrently.')
+    parser.add_argument('--ratios', default=nlt_config.RATIOS_JSON, help='Ratio data (default: dynamic_ratios.json)')
+    parser.add_argument('--output-dir', default=None,
+                        help='Where to write the dashboard files (default: public/data; required with the stub backend)')
+    parser.add_argument('--languages', default=','.join(LANGUAGES), help='Comma-separated languages (es,en)')
+    parser.add_argument('--sections', default=','.join(SECTIONS), help='Comma-separated sections (summary,analysis)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Maximum requests in flight')
+    parser.add_argument('--cache-dir', default=None, help='Answer cache directory (default: .runs/summaries)')
+    parser.add_argument('--max-entries', type=int, default=DEFAULT_MAX_ENTRIES, help='Answers kept in the LRU cache')
+    parser.add_argument('--force', action='store_true', help='Ignore cached answers')
+    parser.add_argument('--api-url', default=DEFAULT_API_URL, help='Dashboard server for NotebookLM queries')
+    parser.add_argument('--backend', choices=('server', 'mcp', 'stub'), default='server',
+                        help='server: /api/chat; mcp: the NotebookLM MCP server directly; stub: local answers')
+    parser.add_argument('--mcp-command', default=None,
+                        help="MCP server command for --backend mcp, e.g. 'python scripts/mcp_stub_server.py'")
+    parser.add_argument('--stub', action='store_true', help='Shorthand for --backend stub')
+    parser.add_argument('--stub-latency', type=float, default=0.2, help='Stub answer delay in seconds')
+    args = parser.parse_args(argv)
+
+    languages = [l.strip() for l in args.languages.split(',') if l.strip()]
+    sections = [s.strip() for s in args.sections.split(',') if s.strip()]
+    unknown = [l for l in languages if l not in LANGUAGES] + [s for s in sections if s not in SECTIONS]
+    if unknown:
+        parser.error(f"unknown language or section: {', '.join(unknown)}")
+
+    ratios = load_ratios(args.ratios)
+    if ratios is None:
+        print(f"Warning: no ratio data at {args.ratios}; prompts will say so")
+    if args.stub:
+        args.backend = 'stub'
+    if args.backend == 'stub':
+        # Stub text must never replace the published summaries
+        if args.output_dir is None:
+            parser.error('--output-dir is required with the stub backend')
+        if os.path.abspath(args.output_dir) == os.path.abspath(nlt_config.PUBLIC_DATA_DIR):
+            parser.error(f'refusing to write stub output into {nlt_config.PUBLIC_DATA_DIR}')
+    args.output_dir = args.output_dir or nlt_config.PUBLIC_DATA_DIR
+    cache = SummaryCache(args.cache_dir, args.max_entries)
+
+    async def run():
+        if args.backend != 'mcp':
+            client = StubClient(args.stub_latency) if args.backend == 'stub' else ServerClient(args.api_url)
+            return client, await generate_all(ratios, client, cache, languages, sections, args.concurrency, args.force)
+        from mcp_client import McpClient
+        command = shlex.split(args.mcp_command) if args.mcp_command else None
+        async with McpClient(command, max_in_flight=max(1, args.concurrency)) as session:
+            client = McpBackend(session)
+            return client, await generate_all(ratios, client, cache, languages, sections, args.concurrency, args.force)
+
+    started = time.perf_counter()
+    client, results = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        label = f"{result['section']:<9} {result['language']}"
+        if result['ok']:
+            print(f"  {label}  {'cached' if result['cached'] else 'generated'} ({result['seconds']:.2f}s)")
+        else:
+            print(f"  {label}  FAILED: {result['error']}")
+    written = write_outputs(results, args.output_dir)
+    generated = sum(1 for r in results if r['ok'] and not r['cached'])
+    failed = sum(1 for r in results if not r['ok'])
+    print(f"{len(results)} variants in {elapsed:.2f}s: {generated} generated, "
+          f"{len(results) - generated - failed} cached, {failed} failed; "
+          f"{len(written)} files rewritten in {args.output_dir}")
+    if args.backend == 'stub':
+        print(f"Stub backend: {client.calls} queries, peak {client.peak} in flight (limit {args.concurrency})")
+    progress.emit('done', variants=len(results), generated=generated, failed=failed, written=written)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Leaf ranges and tie-out of build_account_tree() around accounts that have no detail lines."""
+
+from account_tree import build_account_tree
+
+HEADER = ['Row Labels', '', '', 'Current', 'Prior']
+
+
+def _tree(accounts):
+    """Pivot rows for 1 ASSETS > CURRENT ASSETS > accounts; (name, [(detail, current, prior)])."""
+    rows = [HEADER, [1, 'ASSETS', '', '', ''], ['', 'CURRENT ASSETS', '', '', '']]
+    current = prior = 0
+    for name, details in accounts:
+        rows.append(['', '', name, '', ''])
+        for detail, c, p in details:
+            rows.append(['', '', detail, c, p])
+        rows.append(['', '', f'{name} Total', sum(d[1] for d in details), sum(d[2] for d in details)])
+        current += sum(d[1] for d in details)
+        prior += sum(d[2] for d in details)
+    rows.append(['', 'CURRENT ASSETS Total', '', current, prior])
+    rows.append(['', 'ASSETS Total', '', current, prior])
+    rows.append(['', 'Grand Total', '', current, prior])
+    return build_account_tree(rows)
+
+
+def _check(tree, current, prior):
+    assert tree.root.totals == {'Current': current, 'Prior': prior}
+    assert tree.mismatches() == []
+    for node in tree.iter_nodes():
+        assert node.leaf_start <= node.leaf_end
+
+
+def test_empty_first_account():
+    tree = _tree([('Petty Cash', []), ('Cash', [('Bank', 100, 80)]), ('Receivables', [('Trade', 50, 40)])])
+    _check(tree, 150, 120)
+    petty = tree.root.children[0].children[0].children[0]
+    assert (petty.leaf_start, petty.leaf_end) == (0, 0)
+
+
+def test_empty_last_account():
+    tree = _tree([('Cash', [('Bank', 100, 80)]), ('Receivables', [('Trade', 50, 40)]), ('Petty Cash', [])])
+    _check(tree, 150, 120)
+    petty = tree.root.children[0].children[0].children[-1]
+    assert (petty.leaf_start, petty.leaf_end) == (2, 2)
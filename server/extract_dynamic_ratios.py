@@ -5,14 +5,21 @@ Automatically finds the latest NLTS-PR FS Excel file and extracts ratios.
 import warnings
 warnings.filterwarnings('ignore', category=UserWarning, module='openpyxl')
 
-import json
 import os
-import re
+import sys
+import json
+import argparse
 from datetime import datetime
-import openpyxl
 
-NLTS_PR_DIR = r'D:\NLTS-PR'
-OUTPUT_FILE = os.path.join(NLTS_PR_DIR, 'dynamic_ratios.json')
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+from publish_stage import publish_json
+from run_ledger import RunLedger, input_fingerprint, code_fingerprint, LOCK_WAIT_SECONDS
+from nlt_config import NLTS_PR_DIR, RATIOS_JSON, RUN_STATE_DIR, COMPANY_NAME
+from file_catalog import open_catalog
+import progress
+
+OUTPUT_FILE = RATIOS_JSON
 
 # Industry benchmarks for equipment rental/forklift service industry
 # Sources: ReadyRatios (2023), United Rentals, Equipment Rental Industry Data
@@ -65,7 +72,7 @@ BENCHMARKS = {
 }
 
 
-def find_latest_fs_file():
+def find_latest_fs_file(source_dir=None, catalog_path=None, prefix=None):
     """
     Find the most recent NLTS-PR FS Excel file.
     Selection criteria (in order of priority):
@@ -73,43 +80,11 @@ def find_latest_fs_file():
     2. Major revision number (Rev156 > Rev153)
     3. Minor revision number (Rev156-3 > Rev156-1)
     """
-    # Pattern: NLTS-PR FS MM DD YYYY RevXXX-Y.xlsm
-    pattern = re.compile(
-        r'NLTS-PR FS (\d{1,2}) (\d{1,2}) (\d{4}) Rev(\d+)-(\d+)\.xlsm$', 
-        re.IGNORECASE
-    )
-    
-    candidates = []
-    for filename in os.listdir(NLTS_PR_DIR):
-        match = pattern.match(filename)
-        if match:
-            month = int(match.group(1))
-            day = int(match.group(2))
-            year = int(match.group(3))
-            rev_major = int(match.group(4))
-            rev_minor = int(match.group(5))
-            
-            try:
-                file_date = datetime(year, month, day)
-                filepath = os.path.join(NLTS_PR_DIR, filename)
-                candidates.append({
-                    'date': file_date,
-                    'rev_major': rev_major,
-                    'rev_minor': rev_minor,
-                    'filepath': filepath,
-                    'filename': filename
-                })
-            except ValueError:
-                continue
-    
+    source_dir = source_dir or NLTS_PR_DIR
+    # Indexed by the shared catalog; only directories changed since the last run are listed
+    candidates = open_catalog(source_dir, catalog_path, prefix).workbooks()
     if not candidates:
-        raise FileNotFoundError("No NLTS-PR FS Excel files found in D:\\NLTS-PR")
-    
-    # Sort by: date DESC, rev_major DESC, rev_minor DESC
-    candidates.sort(
-        key=lambda x: (x['date'], x['rev_major'], x['rev_minor']), 
-        reverse=True
-    )
+        raise FileNotFoundError(f"No FS Excel files found in {source_dir}")
     
     latest = candidates[0]
     print(f"Found {len(candidates)} FS file(s):")
@@ -156,10 +131,36 @@ def determine_status(ratio_name, value):
     return 'neutral', None, None
 
 
-def extract_ratios_from_excel(filepath, file_date):
+MAIN_CATEGORIES = ('solvencyRatios', 'safetyRatios', 'profitabilityRatios', 'assetManagementRatios')
+
+
+def _unique_by_name(ratios):
+    """First entry of each ratio name (case-insensitive)."""
+    seen = set()
+    unique_list = []
+    for r in ratios:
+        name_key = r['name'].lower()
+        if name_key not in seen:
+            seen.add(name_key)
+            unique_list.append(r)
+    return unique_list
+
+
+def _emit_category(structured_ratios, category, emitted):
+    """Progress event with one finished category's ratios (deduplicated, as they will be saved)."""
+    emitted.add(category)
+    ratios = structured_ratios[category]
+    if category in MAIN_CATEGORIES:
+        ratios = _unique_by_name(ratios)
+    progress.emit('category', category=category, ratios=ratios)
+
+
+def extract_ratios_from_excel(filepath, file_date, company=COMPANY_NAME):
     """Extract ratios from the Ratios sheet of the Excel file."""
     print(f"Opening workbook: {filepath}")
-    wb = openpyxl.load_workbook(filepath, data_only=True)
+    import openpyxl
+    # Read-only streams just the Ratios sheet instead of parsing the whole workbook
+    wb = openpyxl.load_workbook(filepath, read_only=True, data_only=True)
     
     if 'Ratios' not in wb.sheetnames:
         raise ValueError("No 'Ratios' sheet found in workbook")
@@ -167,7 +168,7 @@ def extract_ratios_from_excel(filepath, file_date):
     ws = wb['Ratios']
     
     structured_ratios = {
-        'company': 'National Lift Truck Service of PR, Inc.',
+        'company': company,
         'asOf': file_date.strftime('%B %d, %Y'),
         'source': os.path.basename(filepath),
         'extractedAt': datetime.now().isoformat(),
@@ -179,6 +180,7 @@ def extract_ratios_from_excel(filepath, file_date):
     }
     
     current_category = 'solvencyRatios'
+    emitted = set()
     
     for row in ws.iter_rows(min_row=1, max_row=150, max_col=8, values_only=True):
         # Skip empty rows
@@ -198,6 +200,7 @@ def extract_ratios_from_excel(filepath, file_date):
         is_header_row = isinstance(col_a, str) or col_a is None or (isinstance(col_a, (int, float)) and col_a > 30)
         
         if is_header_row:
+            previous_category = current_category
             for val in [col_a, col_b]:
                 if isinstance(val, str):
                     upper = val.upper()
@@ -216,6 +219,9 @@ def extract_ratios_from_excel(filepath, file_date):
                     elif 'LEADING' in upper or 'FINANCIAL INDICATOR' in upper:
                         current_category = 'leadingIndicators'
                         break
+            # The previous section is complete: stream it before the rest of the sheet is read
+            if current_category != previous_category and previous_category in MAIN_CATEGORIES:
+                _emit_category(structured_ratios, previous_category, emitted)
         
         # Check if this is a ratio row (has numeric index in col_a)
         # Ratios in the Excel have format: [index, name, formula_hint, current_value, prior_value, ...]
@@ -331,15 +337,10 @@ def extract_ratios_from_excel(filepath, file_date):
     wb.close()
     
     # Remove duplicates by name within each category
-    for cat in ['solvencyRatios', 'safetyRatios', 'profitabilityRatios', 'assetManagementRatios']:
-        seen = set()
-        unique_list = []
-        for r in structured_ratios[cat]:
-            name_key = r['name'].lower()
-            if name_key not in seen:
-                seen.add(name_key)
-                unique_list.append(r)
-        structured_ratios[cat] = unique_list
+    for cat in MAIN_CATEGORIES:
+        structured_ratios[cat] = _unique_by_name(structured_ratios[cat])
+        if cat not in emitted:
+            _emit_category(structured_ratios, cat, emitted)
     
     # Special processing for leading indicators
     # 1. Filter out Z-Score subcomponents (start with '+' or '*')
@@ -368,18 +369,15 @@ def extract_ratios_from_excel(filepath, file_date):
             filtered_leading.append(r)
     
     structured_ratios['leadingIndicators'] = filtered_leading
+    _emit_category(structured_ratios, 'leadingIndicators', emitted)
     
     return structured_ratios
 
 
-def main():
-    print("=== NLT-PR Dynamic Ratio Extractor ===\n")
-    
-    # Find latest file
-    filepath, file_date = find_latest_fs_file()
-    
-    # Extract ratios
-    ratios = extract_ratios_from_excel(filepath, file_date)
+def run_extraction(filepath, file_date, output_file=None, company=COMPANY_NAME):
+    """Extract and publish ratios; returns the summary recorded in the run ledger."""
+    output_file = output_file or OUTPUT_FILE
+    ratios = extract_ratios_from_excel(filepath, file_date, company)
     
     # Count totals
     total_ratios = sum(len(ratios[cat]) for cat in ['solvencyRatios', 'safetyRatios', 'profitabilityRatios', 'assetManagementRatios'])
@@ -393,12 +391,57 @@ def main():
                 status_icon = '[OK]' if r['status'] == 'good' else ('[!]' if r['status'] == 'warning' else '[x]')
                 print(f"  {status_icon} {r['name']}: {r['current']} (prior: {r['prior']})")
     
-    # Save to JSON
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(ratios, f, indent=2, ensure_ascii=False)
+    # Save to JSON (atomic; skipped when only extractedAt changed)
+    if publish_json(ratios, output_file, compress=False):
+        print(f"\n[OK] Saved to {output_file}")
+    else:
+        print(f"\n[OK] Ratios unchanged, kept {output_file}")
+    
+    return {
+        'source': ratios['source'],
+        'asOf': ratios['asOf'],
+        'totalRatios': total_ratios,
+        'output': output_file
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract financial ratios from the latest NLTS-PR FS workbook')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-extract even if the workbook is unchanged since the last run')
+    parser.add_argument('--lock-wait', type=float, default=LOCK_WAIT_SECONDS,
+                        help='Seconds to wait for another run holding the lock (the server passes less than its own timeout)')
+    args = parser.parse_args(argv)
+
+    print("=== NLT-PR Dynamic Ratio Extractor ===\n")
+    
+    progress.emit('start', task='ratios')
+    try:
+        # Find latest file
+        filepath, file_date = find_latest_fs_file()
+        progress.emit('workbook', file=os.path.basename(filepath), asOf=file_date.strftime('%B %d, %Y'))
+        
+        # Concurrent syncs of the same workbook share one extraction
+        fingerprint = input_fingerprint([filepath], extra=code_fingerprint(os.path.abspath(__file__)))
+        ledger = RunLedger(RUN_STATE_DIR, 'dynamic_ratios')
+        summary, how = ledger.single_flight(
+            fingerprint,
+            lambda: run_extraction(filepath, file_date),
+            outputs=[OUTPUT_FILE],
+            force=args.force,
+            wait=args.lock_wait
+        )
+    except Exception as e:
+        progress.emit('error', message=str(e))
+        raise
+    progress.emit('done', how=how, **summary)
+    if how == 'cached':
+        print(f"[OK] {summary['source']} unchanged since the last run, kept {OUTPUT_FILE}")
+    elif how == 'joined':
+        print(f"[OK] Joined concurrent extraction of {summary['source']}, {summary['totalRatios']} ratios")
     
-    print(f"\n[OK] Saved to {OUTPUT_FILE}")
-    return ratios
+    with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 
 if __name__ == '__main__':
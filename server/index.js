@@ -7,6 +7,9 @@ import { fileURLToPath } from 'url';
 import fs from 'fs';
 import { promisify } from 'util';
 import { exec } from 'child_process';
+import readline from 'readline';
+import zlib from 'zlib';
+import crypto from 'crypto';
 
 console.log('Loading modules...');
 const __dirname = path.dirname(fileURLToPath(import.meta.url));
@@ -175,8 +178,178 @@ async function discoverNotebook() {
     }
 }
 
+// Context packs precompiled by scripts/context_packs.py (per-topic, token-budgeted)
+const CONTEXT_PACKS_MAX_TOKENS = 1200;
+let contextPacksCache = { mtimeMs: null, doc: null, patterns: null };
+
+function loadContextPacks(packsPath) {
+    let stat;
+    try {
+        stat = fs.statSync(packsPath);
+    } catch (e) {
+        contextPacksCache = { mtimeMs: null, doc: null, patterns: null };
+        return null;
+    }
+    if (contextPacksCache.mtimeMs !== stat.mtimeMs) {
+        try {
+            const doc = JSON.parse(fs.readFileSync(packsPath, 'utf8'));
+            const patterns = Object.fromEntries(
+                Object.entries(doc.packs || {}).map(([topic, pack]) => [topic, new RegExp(pack.pattern)])
+            );
+            contextPacksCache = { mtimeMs: stat.mtimeMs, doc, patterns };
+        } catch (e) {
+            console.error('Failed to load context packs:', e);
+            contextPacksCache = { mtimeMs: stat.mtimeMs, doc: null, patterns: null };
+        }
+    }
+    return contextPacksCache.doc ? contextPacksCache : null;
+}
+
+// Packs whose keywords occur in the question, in topic order, within the token budget
+function selectContextPacks(packs, question, maxTokens = CONTEXT_PACKS_MAX_TOKENS) {
+    const normalized = question.normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+    const selected = [];
+    let used = 0;
+    for (const [topic, pack] of Object.entries(packs.doc.packs)) {
+        if (packs.patterns[topic].test(normalized) && used + pack.tokens <= maxTokens) {
+            selected.push(topic);
+            used += pack.tokens;
+        }
+    }
+    return selected;
+}
+
+// Persistent answer cache for chat questions. Entries are keyed by the normalized
+// question (accents, punctuation and the "[Respond in ...]" prefix removed), the
+// language and whether context packs were included. The file records the data
+// version it was built for; when the extractors publish a new workbook revision
+// the version changes and every entry is dropped. Concurrent identical questions
+// share one notebook query.
+const CHAT_ANSWER_CACHE_MAX = 500;
+const CHAT_ANSWER_SAVE_DELAY_MS = 1000;
+let chatAnswers = null;  // { dataVersion, entries: { key: entry } }, loaded lazily
+let chatAnswersSaveTimer = null;
+const pendingAnswers = new Map();
+
+function chatAnswersPath() {
+    return path.join(NLTS_PR_DIR, '.runs', 'chat_answers.json');
+}
+
+// Extractor outputs are only rewritten when their content changes, so their mtimes track revisions
+function chatDataVersion() {
+    const fingerprint = fileFingerprint([
+        path.join(NLTS_PR_DIR, 'dynamic_ratios.json'),
+        path.join(__dirname, '..', 'src', 'data', 'financial_statements.json')
+    ]);
+    return crypto.createHash('sha1').update(fingerprint).digest('hex').slice(0, 16);
+}
+
+function normalizeChatQuestion(message) {
+    const languageTag = message.match(/^\s*\[(respond in english|responde en espa[nñ]ol)\]\s*/i);
+    const question = languageTag ? message.slice(languageTag[0].length) : message;
+    const normalized = question.normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase()
+        .replace(/[^a-z0-9%]+/g, ' ').trim();
+    let language = null;
+    if (languageTag) language = /english/i.test(languageTag[1]) ? 'en' : 'es';
+    return { normalized, language };
+}
+
+function loadChatAnswers(dataVersion) {
+    if (!chatAnswers) {
+        try {
+            chatAnswers = JSON.parse(fs.readFileSync(chatAnswersPath(), 'utf8'));
+            chatAnswers.entries = chatAnswers.entries || {};
+        } catch (e) {
+            chatAnswers = { dataVersion, entries: {} };
+        }
+    }
+    if (chatAnswers.dataVersion !== dataVersion) {
+        const dropped = Object.keys(chatAnswers.entries || {}).length;
+        if (dropped > 0) console.log(`Data version changed; dropping ${dropped} cached chat answers.`);
+        chatAnswers = { dataVersion, entries: {} };
+        scheduleChatAnswersSave();
+    }
+    return chatAnswers;
+}
+
+function scheduleChatAnswersSave() {
+    if (chatAnswersSaveTimer) return;
+    chatAnswersSaveTimer = setTimeout(() => {
+        chatAnswersSaveTimer = null;
+        const target = chatAnswersPath();
+        const tmpPath = `${target}.${process.pid}.tmp`;
+        try {
+            fs.mkdirSync(path.dirname(target), { recursive: true });
+            fs.writeFileSync(tmpPath, JSON.stringify(chatAnswers));
+            fs.renameSync(tmpPath, target);
+        } catch (e) {
+            console.error('Failed to save chat answer cache:', e.message);
+        }
+    }, CHAT_ANSWER_SAVE_DELAY_MS);
+}
+
+function storeChatAnswer(cache, key, entry) {
+    const keys = Object.keys(cache.entries);
+    if (keys.length >= CHAT_ANSWER_CACHE_MAX) {
+        // Evict the least recently used answer
+        const oldest = keys.reduce((a, b) => (cache.entries[a].usedAt <= cache.entries[b].usedAt ? a : b));
+        delete cache.entries[oldest];
+    }
+    cache.entries[key] = entry;
+    scheduleChatAnswersSave();
+}
+
 app.post('/api/chat', async (req, res) => {
-    const { message } = req.body;
+    const { includeContext = false, noCache = false } = req.body;
+    let { message } = req.body;
+    let contextTopics = [];
+    let dataVersion = null;
+
+    // Answer cache lookup: identical or normalized-equivalent questions for the current data
+    let cacheKey = null;
+    let answerCache = null;
+    if (!noCache && typeof message === 'string') {
+        const { normalized, language } = normalizeChatQuestion(message);
+        if (normalized) {
+            answerCache = loadChatAnswers(chatDataVersion());
+            const lang = req.body.language || language || 'auto';
+            cacheKey = crypto.createHash('sha1')
+                .update(`${lang}\n${includeContext ? 1 : 0}\n${normalized}`).digest('hex').slice(0, 20);
+            const entry = answerCache.entries[cacheKey];
+            if (entry) {
+                entry.hits++;
+                entry.usedAt = Date.now();
+                scheduleChatAnswersSave();
+                res.set('X-Cache', 'hit');
+                return res.json({
+                    role: 'system',
+                    content: entry.content,
+                    ...(includeContext ? { contextTopics: entry.contextTopics, dataVersion: entry.packsVersion } : {})
+                });
+            }
+            if (pendingAnswers.has(cacheKey)) {
+                try {
+                    const shared = await pendingAnswers.get(cacheKey);
+                    res.set('X-Cache', 'shared');
+                    return res.json(shared);
+                } catch (e) {
+                    return res.status(500).json({ error: e.message || String(e) });
+                }
+            }
+        }
+    }
+
+    if (includeContext && typeof message === 'string') {
+        const packs = loadContextPacks(path.join(NLTS_PR_DIR, 'context_packs.json'));
+        if (packs) {
+            contextTopics = selectContextPacks(packs, message);
+            dataVersion = packs.doc.dataVersion;
+            if (contextTopics.length > 0) {
+                const context = contextTopics.map(topic => packs.doc.packs[topic].text).join('\n\n');
+                message = `Financial context (data version ${dataVersion}):\n${context}\n\nQuestion: ${message}`;
+            }
+        }
+    }
 
     if (!activeNotebookId) {
         console.log('Chat request received but no notebook ID. Retrying discovery...');
@@ -190,7 +363,7 @@ app.post('/api/chat', async (req, res) => {
         });
     }
 
-    try {
+    const query = (async () => {
         const result = await sendRequest('tools/call', {
             name: "notebook_query",
             arguments: {
@@ -204,14 +377,37 @@ app.post('/api/chat', async (req, res) => {
             textResponse = result.content[0].text;
         }
 
-        res.json({
+        // Only real answers are cached; empty and error responses are retried next time
+        if (cacheKey && textResponse !== "No response content" && !textResponse.startsWith('Error:')) {
+            const now = Date.now();
+            storeChatAnswer(answerCache, cacheKey, {
+                question: req.body.message,
+                content: textResponse,
+                contextTopics,
+                packsVersion: dataVersion,
+                createdAt: new Date(now).toISOString(),
+                usedAt: now,
+                hits: 0
+            });
+        }
+
+        return {
             role: 'system',
-            content: textResponse
-        });
+            content: textResponse,
+            ...(includeContext ? { contextTopics, dataVersion } : {})
+        };
+    })();
 
+    if (cacheKey) pendingAnswers.set(cacheKey, query);
+    try {
+        const body = await query;
+        if (cacheKey) res.set('X-Cache', 'miss');
+        res.json(body);
     } catch (e) {
         console.error('Query failed:', e);
         res.status(500).json({ error: e.message || String(e) });
+    } finally {
+        if (cacheKey) pendingAnswers.delete(cacheKey);
     }
 });
 
@@ -312,7 +508,27 @@ function calculateRecencyScore(doc) {
 }
 
 // Function to extract text from first page of PDF using pdftotext (requires poppler)
+// Results are memoized per path, size and mtime, so a rescan only runs pdftotext on new or changed PDFs
+const pdfContentCache = new Map();
+
 async function extractPdfContent(filePath) {
+    let stats = null;
+    try {
+        stats = fs.statSync(filePath);
+    } catch (e) {
+        // Let pdftotext report the problem
+    }
+    const memoKey = stats ? `${stats.size}:${stats.mtimeMs}` : null;
+    const memo = pdfContentCache.get(filePath);
+    if (memo && memoKey && memo.key === memoKey) {
+        return memo.content;
+    }
+    const content = await extractPdfContentUncached(filePath);
+    if (memoKey) pdfContentCache.set(filePath, { key: memoKey, content });
+    return content;
+}
+
+async function extractPdfContentUncached(filePath) {
     try {
         // Try pdftotext first (from poppler-utils)
         const { stdout } = await execAsync(`pdftotext -f 1 -l 1 "${filePath}" -`, { timeout: 5000 });
@@ -362,6 +578,15 @@ function extractDocumentPeriodDate(filename, content) {
     return null; // No date found
 }
 
+// Month-name patterns for extractLetterContentDate, compiled once: [month index, English, Spanish]
+const MONTH_NAMES_EN = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december'];
+const MONTH_NAMES_ES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'];
+const LETTER_MONTH_PATTERNS = MONTH_NAMES_EN.map((name, i) => [
+    i,
+    new RegExp(name + '\\s+(\\d{1,2})[,]?\\s+(20\\d{2})', 'i'),
+    new RegExp('(\\d{1,2})\\s+de\\s+' + MONTH_NAMES_ES[i] + '[,]?\\s+(?:de\\s+)?(20\\d{2})', 'i')
+]);
+
 // Extract date from letter content (first paragraph) - for Engagement and Representation letters
 // These documents have their reporting date in the first paragraph of content, not in the filename
 function extractLetterContentDate(content) {
@@ -373,28 +598,23 @@ function extractLetterContentDate(content) {
     // Common date patterns in letter openings:
     // "January 15, 2024", "December 31, 2024", "15 de enero de 2024", etc.
 
-    // Pattern 1: Month Day, Year (January 15, 2024)
-    const monthNames = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october', 'november', 'december'];
-    const monthNamesEs = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre'];
-
-    for (let i = 0; i < monthNames.length; i++) {
+    // Pattern 1: Month Day, Year (January 15, 2024), compiled once in LETTER_MONTH_PATTERNS
+    for (const [month, regexEn, regexEs] of LETTER_MONTH_PATTERNS) {
         // English: "January 15, 2024" or "January 15 2024"
-        const regexEn = new RegExp(monthNames[i] + '\\s+(\\d{1,2})[,]?\\s+(20\\d{2})', 'i');
         let match = firstParagraph.match(regexEn);
         if (match) {
-            return new Date(parseInt(match[2]), i, parseInt(match[1]));
+            return new Date(parseInt(match[2]), month, parseInt(match[1]));
         }
 
         // Spanish: "15 de enero de 2024" or "15 de enero, 2024"
-        const regexEs = new RegExp('(\\d{1,2})\\s+de\\s+' + monthNamesEs[i] + '[,]?\\s+(?:de\\s+)?(20\\d{2})', 'i');
         match = firstParagraph.match(regexEs);
         if (match) {
-            return new Date(parseInt(match[2]), i, parseInt(match[1]));
+            return new Date(parseInt(match[2]), month, parseInt(match[1]));
         }
     }
 
     // Pattern 2: Numeric dates in first paragraph (MM/DD/YYYY, DD/MM/YYYY, YYYY-MM-DD)
-    const numericPattern = /(\\d{1,2})[\\/\\-](\\d{1,2})[\\/\\-](20\\d{2})|(20\\d{2})[\\/\\-](\\d{1,2})[\\/\\-](\\d{1,2})/;
+    const numericPattern = /(\d{1,2})[\/\-](\d{1,2})[\/\-](20\d{2})|(20\d{2})[\/\-](\d{1,2})[\/\-](\d{1,2})/;
     const numMatch = firstParagraph.match(numericPattern);
     if (numMatch) {
         if (numMatch[4]) {
@@ -440,121 +660,288 @@ function getFilesRecursively(dir) {
     return results;
 }
 
-app.get('/api/compliance-docs', async (req, res) => {
-    try {
-        // Recursively scan NLTS-PR directory
-        const allFiles = getFilesRecursively(NLTS_PR_DIR);
-
-        // Filter for relevant extensions
-        const validExtensions = ['.pdf', '.gsheet', '.xls', '.xlsx', '.xlsm'];
-        const files = allFiles.filter(filePath => {
-            const ext = path.extname(filePath).toLowerCase();
-            return validExtensions.includes(ext);
-        });
+// =============================================
+// RESPONSE CACHE
+// =============================================
 
-        const documents = [];
+// Parsed, serialized and gzipped responses kept in memory. Each entry records
+// a fingerprint of what it was built from (file mtimes, or the watcher
+// generation of the documents tree); a request whose fingerprint matches is
+// answered from memory, with ETag/304 and gzip when the client accepts it.
+// Concurrent misses for the same key share one build.
+const responseCache = new Map();
 
-        for (const filePath of files) {
-            const filename = path.basename(filePath);
+function fileFingerprint(filePaths) {
+    return filePaths.map(filePath => {
+        try {
             const stats = fs.statSync(filePath);
-            const ext = path.extname(filePath).toLowerCase();
+            return `${stats.mtimeMs}:${stats.size}`;
+        } catch (e) {
+            return 'missing';
+        }
+    }).join('|');
+}
 
-            // Extract content to identify document type
-            let content = "";
-            if (ext === '.pdf') {
-                content = await extractPdfContent(filePath);
-            } else {
-                // For spreadsheets, we rely on the filename for now
-                // (Future: could use 'xlsx' package to read text)
-                content = filename.toLowerCase();
+async function getCachedResponse(key, fingerprint, build) {
+    const entry = responseCache.get(key);
+    if (entry && entry.fingerprint === fingerprint) {
+        entry.hits++;
+        return { entry, hit: true };
+    }
+    if (entry && entry.building && entry.building.fingerprint === fingerprint) {
+        return { entry: await entry.building.promise, hit: false };
+    }
+
+    const promise = (async () => {
+        const body = Buffer.from(JSON.stringify(await build()));
+        return {
+            fingerprint,
+            body,
+            gzip: zlib.gzipSync(body),
+            etag: `"${crypto.createHash('sha1').update(body).digest('hex').slice(0, 20)}"`,
+            builtAt: new Date().toISOString(),
+            hits: 0,
+            building: null
+        };
+    })();
+    const placeholder = entry || { fingerprint: null, hits: 0 };
+    placeholder.building = { fingerprint, promise };
+    responseCache.set(key, placeholder);
+    try {
+        const built = await promise;
+        responseCache.set(key, built);
+        return { entry: built, hit: false };
+    } catch (e) {
+        if (entry && entry.body) {
+            entry.building = null;
+            responseCache.set(key, entry);
+        } else {
+            responseCache.delete(key);
+        }
+        throw e;
+    }
+}
+
+function sendCachedResponse(req, res, entry, hit) {
+    res.set('ETag', entry.etag);
+    res.set('Vary', 'Accept-Encoding');
+    res.set('X-Cache', hit ? 'hit' : 'miss');
+    if (req.headers['if-none-match'] === entry.etag) {
+        return res.status(304).end();
+    }
+    res.type('application/json');
+    if (/\bgzip\b/.test(req.headers['accept-encoding'] || '')) {
+        res.set('Content-Encoding', 'gzip');
+        return res.send(entry.gzip);
+    }
+    return res.send(entry.body);
+}
+
+// The documents tree is watched (recursive fs.watch on Windows/macOS and Node 20+ on Linux);
+// changes to documents or folders bump a generation. Without a watcher the fingerprint falls
+// back to a walk of the tree that stats every folder and compliance document (mtime and size,
+// so in-place edits are seen too). That walk is reused for MTIME_FINGERPRINT_TTL_MS, so without
+// a watcher a change can take up to that long to show in the compliance scan.
+const COMPLIANCE_EXTENSIONS = ['.pdf', '.gsheet', '.xls', '.xlsx', '.xlsm'];
+let documentsGeneration = 0;
+let documentsWatcher = null;
+const MTIME_FINGERPRINT_TTL_MS = 10000;
+let mtimeFingerprint = { value: null, at: 0 };
+
+function watchDocumentsTree() {
+    try {
+        documentsWatcher = fs.watch(NLTS_PR_DIR, { recursive: true }, (eventType, filename) => {
+            if (!filename) {
+                documentsGeneration++;
+                return;
             }
+            const name = String(filename);
+            if (name.split(/[\\/]/).some(part => part.startsWith('.'))) return;
+            const ext = path.extname(name).toLowerCase();
+            // Folders have no extension; extractor outputs (.json) do not affect the scan
+            if (ext === '' || COMPLIANCE_EXTENSIONS.includes(ext)) documentsGeneration++;
+        });
+        documentsWatcher.on('error', (err) => {
+            console.error('Documents watcher stopped:', err.message);
+            documentsWatcher = null;
+        });
+        console.log(`Watching ${NLTS_PR_DIR} for document changes.`);
+    } catch (e) {
+        documentsWatcher = null;
+        console.log(`Not watching ${NLTS_PR_DIR} (${e.message}); using file mtimes (up to ${MTIME_FINGERPRINT_TTL_MS / 1000}s stale).`);
+    }
+}
 
-            const docType = identifyDocumentType(content, filename);
-
-            // For letters (Engagement/Representation), extract date from content first paragraph
-            // For other documents, use filename-based date extraction
-            let periodDate;
-            if (CONTENT_DATE_DOCUMENTS.includes(docType)) {
-                // Letters: date is in the first paragraph of content
-                periodDate = extractLetterContentDate(content);
-                // Fallback to standard extraction if content parsing fails
-                if (!periodDate) {
-                    periodDate = extractDocumentPeriodDate(filename, content);
+function treeMtimes(dir) {
+    let fingerprint = '';
+    const pending = [dir];
+    while (pending.length > 0) {
+        const current = pending.pop();
+        try {
+            fingerprint += `${current}:${fs.statSync(current).mtimeMs};`;
+            for (const entry of fs.readdirSync(current, { withFileTypes: true })) {
+                if (entry.name.startsWith('.')) continue;
+                const entryPath = path.join(current, entry.name);
+                if (entry.isDirectory()) {
+                    pending.push(entryPath);
+                } else if (COMPLIANCE_EXTENSIONS.includes(path.extname(entry.name).toLowerCase())) {
+                    try {
+                        const stats = fs.statSync(entryPath);
+                        fingerprint += `${entryPath}:${stats.mtimeMs}:${stats.size};`;
+                    } catch (e) {
+                        fingerprint += `${entryPath}:missing;`;
+                    }
                 }
-            } else {
-                periodDate = extractDocumentPeriodDate(filename, content);
             }
+        } catch (e) {
+            fingerprint += `${current}:missing;`;
+        }
+    }
+    return crypto.createHash('sha1').update(fingerprint).digest('hex');
+}
 
-            // Special case logic for "Planillas" folder -> likely Tax Returns
-            let finalDocType = docType;
-            if (filePath.toLowerCase().includes('planillas') && finalDocType === 'Other Document') {
-                finalDocType = 'Tax Returns';
-            }
+function complianceFingerprint() {
+    if (documentsWatcher) return `watch:${documentsGeneration}`;
+    const now = Date.now();
+    if (mtimeFingerprint.value === null || now - mtimeFingerprint.at >= MTIME_FINGERPRINT_TTL_MS) {
+        mtimeFingerprint = { value: treeMtimes(NLTS_PR_DIR), at: now };
+    }
+    return `mtimes:${mtimeFingerprint.value}`;
+}
+
+// Lightweight readiness/health probe: no file system or child process work
+app.get('/api/health', (req, res) => {
+    res.json({
+        status: 'ok',
+        uptimeSeconds: Math.round(process.uptime()),
+        notebook: activeNotebookId ? 'connected' : 'not connected',
+        documentsWatcher: documentsWatcher !== null,
+        chatAnswers: chatAnswers ? { dataVersion: chatAnswers.dataVersion, entries: Object.keys(chatAnswers.entries).length } : null,
+        cache: Object.fromEntries([...responseCache.entries()]
+            .filter(([, entry]) => entry.body)
+            .map(([key, entry]) => [key, { builtAt: entry.builtAt, hits: entry.hits, bytes: entry.body.length, gzipBytes: entry.gzip.length }]))
+    });
+});
+
+async function scanComplianceDocs() {
+    // Recursively scan NLTS-PR directory
+    const allFiles = getFilesRecursively(NLTS_PR_DIR);
+
+    // Filter for relevant extensions
+    const validExtensions = COMPLIANCE_EXTENSIONS;
+    const files = allFiles.filter(filePath => {
+        const ext = path.extname(filePath).toLowerCase();
+        return validExtensions.includes(ext);
+    });
 
-            // Extract version number from filename (e.g., "-1" in "Financial Statement 2024-1.pdf")
-            const versionNumber = extractVersionNumber(filename);
-
-            const docObj = {
-                filename: filename,
-                path: filePath, // Full path might be needed or just relative
-                documentType: finalDocType,
-                modifiedAt: stats.mtime.toISOString(),
-                createdAt: stats.birthtime.toISOString(),
-                size: stats.size,
-                versionNumber: versionNumber, // NEW: version for intelligent sorting
-                documentPeriodDate: periodDate ? periodDate.toISOString() : null,
-                documentPeriodFormatted: periodDate ? periodDate.toLocaleDateString('en-US', {
-                    year: 'numeric',
-                    month: 'long',
-                    day: 'numeric'
-                }) : 'Unknown period',
-                lastModifiedFormatted: stats.mtime.toLocaleString('en-US', {
-                    year: 'numeric',
-                    month: 'short',
-                    day: 'numeric',
-                    hour: '2-digit',
-                    minute: '2-digit'
-                })
-            };
-
-            // Calculate composite recency score for intelligent sorting
-            docObj.recencyScore = calculateRecencyScore(docObj);
-
-            documents.push(docObj);
+    const documents = [];
+
+    for (const filePath of files) {
+        const filename = path.basename(filePath);
+        const stats = fs.statSync(filePath);
+        const ext = path.extname(filePath).toLowerCase();
+
+        // Extract content to identify document type
+        let content = "";
+        if (ext === '.pdf') {
+            content = await extractPdfContent(filePath);
+        } else {
+            // For spreadsheets, we rely on the filename for now
+            // (Future: could use 'xlsx' package to read text)
+            content = filename.toLowerCase();
         }
 
-        // Group by document type
-        const grouped = {};
-        for (const doc of documents) {
-            if (!grouped[doc.documentType]) {
-                grouped[doc.documentType] = [];
+        const docType = identifyDocumentType(content, filename);
+
+        // For letters (Engagement/Representation), extract date from content first paragraph
+        // For other documents, use filename-based date extraction
+        let periodDate;
+        if (CONTENT_DATE_DOCUMENTS.includes(docType)) {
+            // Letters: date is in the first paragraph of content
+            periodDate = extractLetterContentDate(content);
+            // Fallback to standard extraction if content parsing fails
+            if (!periodDate) {
+                periodDate = extractDocumentPeriodDate(filename, content);
             }
-            grouped[doc.documentType].push(doc);
+        } else {
+            periodDate = extractDocumentPeriodDate(filename, content);
         }
 
-        // Sort each group using intelligent recency scoring
-        // This considers: 1) document period, 2) version number, 3) modification date
-        for (const type of Object.keys(grouped)) {
-            grouped[type].sort((a, b) => {
-                // Higher recency score = more recent = should come first
-                return b.recencyScore - a.recencyScore;
-            });
+        // Special case logic for "Planillas" folder -> likely Tax Returns
+        let finalDocType = docType;
+        if (filePath.toLowerCase().includes('planillas') && finalDocType === 'Other Document') {
+            finalDocType = 'Tax Returns';
+        }
 
-            // Log the top document for each category for debugging
-            if (grouped[type].length > 0) {
-                const top = grouped[type][0];
-                console.log(`[${type}] Top document: ${top.filename} (v${top.versionNumber}, period: ${top.documentPeriodFormatted}, score: ${top.recencyScore.toFixed(0)})`);
-            }
+        // Extract version number from filename (e.g., "-1" in "Financial Statement 2024-1.pdf")
+        const versionNumber = extractVersionNumber(filename);
+
+        const docObj = {
+            filename: filename,
+            path: filePath, // Full path might be needed or just relative
+            documentType: finalDocType,
+            modifiedAt: stats.mtime.toISOString(),
+            createdAt: stats.birthtime.toISOString(),
+            size: stats.size,
+            versionNumber: versionNumber, // NEW: version for intelligent sorting
+            documentPeriodDate: periodDate ? periodDate.toISOString() : null,
+            documentPeriodFormatted: periodDate ? periodDate.toLocaleDateString('en-US', {
+                year: 'numeric',
+                month: 'long',
+                day: 'numeric'
+            }) : 'Unknown period',
+            lastModifiedFormatted: stats.mtime.toLocaleString('en-US', {
+                year: 'numeric',
+                month: 'short',
+                day: 'numeric',
+                hour: '2-digit',
+                minute: '2-digit'
+            })
+        };
+
+        // Calculate composite recency score for intelligent sorting
+        docObj.recencyScore = calculateRecencyScore(docObj);
+
+        documents.push(docObj);
+    }
+
+    // Group by document type
+    const grouped = {};
+    for (const doc of documents) {
+        if (!grouped[doc.documentType]) {
+            grouped[doc.documentType] = [];
         }
+        grouped[doc.documentType].push(doc);
+    }
 
-        res.json({
-            success: true,
-            directory: NLTS_PR_DIR,
-            totalFiles: documents.length,
-            documentTypes: Object.keys(DOCUMENT_PATTERNS),
-            documents: grouped
+    // Sort each group using intelligent recency scoring
+    // This considers: 1) document period, 2) version number, 3) modification date
+    for (const type of Object.keys(grouped)) {
+        grouped[type].sort((a, b) => {
+            // Higher recency score = more recent = should come first
+            return b.recencyScore - a.recencyScore;
         });
 
+        // Log the top document for each category for debugging
+        if (grouped[type].length > 0) {
+            const top = grouped[type][0];
+            console.log(`[${type}] Top document: ${top.filename} (v${top.versionNumber}, period: ${top.documentPeriodFormatted}, score: ${top.recencyScore.toFixed(0)})`);
+        }
+    }
+
+    return {
+        success: true,
+        directory: NLTS_PR_DIR,
+        totalFiles: documents.length,
+        documentTypes: Object.keys(DOCUMENT_PATTERNS),
+        documents: grouped
+    };
+}
+
+app.get('/api/compliance-docs', async (req, res) => {
+    try {
+        const { entry, hit } = await getCachedResponse('compliance-docs', complianceFingerprint(), scanComplianceDocs);
+        sendCachedResponse(req, res, entry, hit);
     } catch (e) {
         console.error('Failed to scan compliance docs:', e);
         res.status(500).json({ error: e.message || String(e) });
@@ -566,39 +953,131 @@ app.get('/api/compliance-docs', async (req, res) => {
 // =============================================
 
 // Sync ratios - dynamically extract from latest Excel file
-app.get('/api/financial-ratios/sync', async (req, res) => {
-    console.log('Syncing financial ratios from Excel...');
+// Concurrent sync requests share one extraction; the Python side also holds a
+// lock file and run ledger so other processes (publish_update.js, CLI runs)
+// attach to an in-flight run instead of parsing the workbook again.
+// The extractor writes NDJSON progress events (workbook selected, each ratio
+// category as soon as it is read) to fd 3; they are kept on the run so
+// /api/financial-ratios/sync/stream can replay and relay them as SSE.
+// The extractor's lock wait stays below the timeout, so a run queued behind a
+// wedged one fails on its own instead of being killed; a killed run's lock
+// file is removed here because the child gets no chance to release it.
+const RATIOS_SYNC_TIMEOUT_MS = 120000;
+const RATIOS_LOCK_WAIT_SECONDS = 90;
+const RATIOS_LOCK_PATH = path.join(NLTS_PR_DIR, '.runs', 'dynamic_ratios.lock');
+let ratiosSyncInFlight = null;
+
+function releaseKilledRatiosLock(childPid) {
+    let holder;
     try {
-        // Run Python extraction script with stderr suppressed (warnings from openpyxl)
-        const pythonScript = path.join(__dirname, 'extract_dynamic_ratios.py');
-
-        let stdout, stderr;
+        holder = JSON.parse(fs.readFileSync(RATIOS_LOCK_PATH, 'utf8'));
+    } catch (e) {
+        return;
+    }
+    // The holder is the killed child (or, behind the Windows launcher, its interpreter, now gone too)
+    let holderAlive = false;
+    try {
+        process.kill(holder.pid, 0);
+        holderAlive = true;
+    } catch (e) {
+        holderAlive = e.code === 'EPERM';
+    }
+    if (holder.pid === childPid || !holderAlive) {
         try {
-            const result = await execAsync(`"${PYTHON_PATH}" "${pythonScript}" 2>&1`, { timeout: 120000 });
-            stdout = result.stdout;
-            stderr = result.stderr;
-        } catch (cmdError) {
-            // Even if command "fails" due to stderr, check if the file was created
-            console.log('Python command completed with warnings:', cmdError.message);
-            stdout = cmdError.stdout || '';
-            stderr = cmdError.stderr || '';
-        }
+            fs.unlinkSync(RATIOS_LOCK_PATH);
+            console.log(`Removed ratio extraction lock left by killed pid ${holder.pid}`);
+        } catch (e) { }
+    }
+}
 
-        console.log('Python extraction output:', stdout);
-        if (stderr) console.log('Python stderr:', stderr);
+function startRatiosSync() {
+    const pythonScript = path.join(__dirname, 'extract_dynamic_ratios.py');
+    const run = { events: [], listeners: new Set(), promise: null };
 
-        // Read the generated JSON - this is the real success indicator
-        const ratiosPath = path.join(NLTS_PR_DIR, 'dynamic_ratios.json');
-        if (!fs.existsSync(ratiosPath)) {
-            throw new Error('Ratios file was not generated. Check if Excel file exists in D:\\NLTS-PR');
-        }
+    const publish = (event) => {
+        run.events.push(event);
+        for (const listener of run.listeners) listener(event);
+    };
+
+    run.promise = new Promise((resolve, reject) => {
+        const child = spawn(PYTHON_PATH, [pythonScript, '--lock-wait', String(RATIOS_LOCK_WAIT_SECONDS)], {
+            stdio: ['ignore', 'pipe', 'pipe', 'pipe'],
+            env: { ...process.env, NLT_PROGRESS_FD: '3', PYTHONUNBUFFERED: '1' }
+        });
+        let output = '';
+        child.stdout.on('data', (data) => { output += data; });
+        child.stderr.on('data', (data) => { output += data; });
 
-        const ratiosData = JSON.parse(fs.readFileSync(ratiosPath, 'utf8'));
+        readline.createInterface({ input: child.stdio[3] }).on('line', (line) => {
+            if (!line.trim()) return;
+            try {
+                publish(JSON.parse(line));
+            } catch (e) {
+                console.warn('Ignoring malformed progress line:', line);
+            }
+        });
+
+        let killed = false;
+        const timer = setTimeout(() => {
+            console.warn(`Ratio extraction exceeded ${RATIOS_SYNC_TIMEOUT_MS / 1000}s, stopping it`);
+            killed = true;
+            if (process.platform === 'win32') {
+                // The venv python.exe is a launcher; /T also stops the interpreter it started
+                exec(`taskkill /PID ${child.pid} /T /F`, () => { });
+            } else {
+                child.kill();
+            }
+        }, RATIOS_SYNC_TIMEOUT_MS);
+
+        child.on('error', (err) => {
+            clearTimeout(timer);
+            reject(err);
+        });
+        child.on('close', (code) => {
+            clearTimeout(timer);
+            if (killed) releaseKilledRatiosLock(child.pid);
+            console.log('Python extraction output:', output);
+            if (code !== 0) console.log(`Python extraction exited with code ${code}`);
+
+            // Read the generated JSON - this is the real success indicator
+            const ratiosPath = path.join(NLTS_PR_DIR, 'dynamic_ratios.json');
+            if (!fs.existsSync(ratiosPath)) {
+                reject(new Error('Ratios file was not generated. Check if Excel file exists in D:\\NLTS-PR'));
+                return;
+            }
+            try {
+                resolve(JSON.parse(fs.readFileSync(ratiosPath, 'utf8')));
+            } catch (e) {
+                reject(e);
+            }
+        });
+    });
+    return run;
+}
+
+function joinRatiosSync() {
+    const joined = ratiosSyncInFlight !== null;
+    if (!ratiosSyncInFlight) {
+        const run = startRatiosSync();
+        ratiosSyncInFlight = run;
+        run.promise.catch(() => {}).finally(() => {
+            if (ratiosSyncInFlight === run) ratiosSyncInFlight = null;
+        });
+    }
+    return { run: ratiosSyncInFlight, joined };
+}
+
+app.get('/api/financial-ratios/sync', async (req, res) => {
+    const { run, joined } = joinRatiosSync();
+    console.log(joined ? 'Ratio sync already running, attaching to it...' : 'Syncing financial ratios from Excel...');
+    try {
+        const ratiosData = await run.promise;
 
         res.json({
             success: true,
             message: 'Ratios synced from ' + ratiosData.source,
             extractedAt: ratiosData.extractedAt,
+            joined,
             data: ratiosData
         });
 
@@ -611,6 +1090,48 @@ app.get('/api/financial-ratios/sync', async (req, res) => {
     }
 });
 
+// Same sync as Server-Sent Events: 'progress' with each extractor event as it
+// happens (earlier ones replayed to late joiners), then 'result' with the full
+// ratios or 'failed' with the error.
+app.get('/api/financial-ratios/sync/stream', (req, res) => {
+    const { run, joined } = joinRatiosSync();
+    console.log(joined ? 'Ratio sync stream attaching to running sync...' : 'Streaming financial ratio sync...');
+
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive'
+    });
+    const send = (event, data) => {
+        res.write(`event: ${event}\ndata: ${JSON.stringify(data)}\n\n`);
+    };
+    // One SSE event type; data.event names the step ('workbook', 'category', 'done', ...)
+    const relay = (progress) => send('progress', progress);
+
+    send('sync', { joined });
+    run.events.forEach(relay);
+    run.listeners.add(relay);
+
+    let closed = false;
+    req.on('close', () => {
+        closed = true;
+        run.listeners.delete(relay);
+    });
+
+    run.promise
+        .then((ratiosData) => {
+            if (!closed) send('result', { success: true, joined, data: ratiosData });
+        })
+        .catch((e) => {
+            console.error('Failed to sync ratios:', e);
+            if (!closed) send('failed', { success: false, error: e.message || String(e) });
+        })
+        .finally(() => {
+            run.listeners.delete(relay);
+            if (!closed) res.end();
+        });
+});
+
 // Generate AI Executive Summary using NotebookLM
 app.post('/api/executive-summary/generate', async (req, res) => {
     console.log('Generating AI Executive Summary...');
@@ -774,18 +1295,18 @@ function generateFallbackSummary(ratiosData, language) {
 }
 
 // Financial Ratios endpoint - now reads from dynamic extraction or falls back to cache
-app.get('/api/financial-ratios', (req, res) => {
+app.get('/api/financial-ratios', async (req, res) => {
     // Try to read dynamic ratios first
     const dynamicRatiosPath = path.join(NLTS_PR_DIR, 'dynamic_ratios.json');
 
-    if (fs.existsSync(dynamicRatiosPath)) {
+    const fingerprint = fileFingerprint([dynamicRatiosPath]);
+    if (fingerprint !== 'missing') {
         try {
-            const dynamicData = JSON.parse(fs.readFileSync(dynamicRatiosPath, 'utf8'));
-            console.log('Returning dynamic ratios from file');
-            return res.json({
-                success: true,
-                data: dynamicData
+            const { entry, hit } = await getCachedResponse('financial-ratios', fingerprint, () => {
+                console.log('Loading dynamic ratios from file');
+                return { success: true, data: JSON.parse(fs.readFileSync(dynamicRatiosPath, 'utf8')) };
             });
+            return sendCachedResponse(req, res, entry, hit);
         } catch (e) {
             console.error('Failed to read dynamic ratios, falling back to hardcoded:', e.message);
         }
@@ -1080,6 +1601,7 @@ app.get('/api/financial-ratios', (req, res) => {
 
 console.log(`Starting express server on ${PORT}...`);
 startProcess();
+watchDocumentsTree();
 
 app.listen(PORT, () => {
     console.log(`Proxy server running on http://localhost:${PORT}`);
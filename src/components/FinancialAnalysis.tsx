@@ -192,6 +192,7 @@ export default function FinancialAnalysis() {
     const [loading, setLoading] = useState(false);
     const [financialData, setFinancialData] = useState<any>(null);
     const [lastSync, setLastSync] = useState<string | null>(null);
+    const [syncError, setSyncError] = useState<string | null>(null);
     const [fsRatios, setFsRatios] = useState<any>(null);
     const [executiveSummary, setExecutiveSummary] = useState<string | null>(null);
     const [summaryLoading, setSummaryLoading] = useState(false);
@@ -246,10 +247,40 @@ export default function FinancialAnalysis() {
             let syncData;
 
             try {
-                // Try live backend first
-                const syncResponse = await fetch(`${API_BASE_URL}/api/financial-ratios/sync`);
-                if (!syncResponse.ok) throw new Error('Backend unavailable');
-                syncData = await syncResponse.json();
+                // Try live backend first, streaming each ratio category as the extractor finishes it.
+                // Only an unavailable stream falls back to /sync; a reported failure is shown as is.
+                let streamStarted = false;
+                syncData = await new Promise<any>((resolve, reject) => {
+                    if (isProduction || typeof EventSource === 'undefined') {
+                        reject(new Error('Streaming unavailable'));
+                        return;
+                    }
+                    const source = new EventSource(`${API_BASE_URL}/api/financial-ratios/sync/stream`);
+                    source.addEventListener('progress', (e) => {
+                        streamStarted = true;
+                        const progress = JSON.parse((e as MessageEvent).data);
+                        if (progress.event === 'category' && progress.category) {
+                            setFsRatios((prev: any) => ({ ...(prev || {}), [progress.category]: progress.ratios }));
+                        }
+                    });
+                    source.addEventListener('result', (e) => {
+                        source.close();
+                        resolve(JSON.parse((e as MessageEvent).data));
+                    });
+                    source.addEventListener('failed', (e) => {
+                        source.close();
+                        resolve({ success: false, error: JSON.parse((e as MessageEvent).data).error || 'Sync failed' });
+                    });
+                    source.onerror = () => {
+                        source.close();
+                        reject(new Error(streamStarted ? 'Sync stream interrupted' : 'Backend unavailable'));
+                    };
+                }).catch(async (err) => {
+                    if (streamStarted) throw err;
+                    const syncResponse = await fetch(`${API_BASE_URL}/api/financial-ratios/sync`);
+                    if (!syncResponse.ok && syncResponse.status !== 500) throw new Error('Backend unavailable');
+                    return syncResponse.json();
+                });
             } catch (err) {
                 console.warn('Backend failed, falling back to static data for Ratios');
                 // Fallback to static
@@ -258,6 +289,7 @@ export default function FinancialAnalysis() {
                 syncData = { success: true, data };
             }
 
+            setSyncError(syncData.success ? null : syncData.error || 'Sync failed');
             if (syncData.success && syncData.data) {
                 setFsRatios(syncData.data);
                 console.log('Ratios loaded from:', syncData.data.source || 'Static File');
@@ -368,6 +400,7 @@ export default function FinancialAnalysis() {
                     <p>{t('financial.subtitle')}</p>
                     <div style={{ fontSize: '0.75rem', color: 'var(--text-secondary)', marginTop: '0.5rem', display: 'flex', alignItems: 'center', gap: '12px' }}>
                         {lastSync ? `${t('financial.lastSync')}: ${lastSync}` : t('financial.notSynced')}
+                        {syncError && <span style={{ color: '#ef4444' }} title={syncError}>⚠️ {syncError}</span>}
                         <button
                             onClick={fetchFinancialData}
                             disabled={loading}
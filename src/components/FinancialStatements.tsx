@@ -20,6 +20,10 @@ interface LineItem {
     row_hidden?: boolean;
     format?: string;
     indent?: number;
+    // Precomputed by the extractor (scripts/statement_analytics.py), keyed by period
+    commonSize?: Record<string, number | null>;
+    change?: Record<string, number | null>;
+    changePct?: Record<string, number | null>;
 }
 
 interface CellData {
@@ -42,6 +46,12 @@ interface FinancialData {
     Lead?: CellData[][];
     LeadSections?: Record<string, LeadSection>;
     TaxLeadSections?: Record<string, LeadSection>;
+    Analytics?: Record<string, {
+        periods: string[];
+        base: string | null;
+        sectionTotals: Record<string, Record<string, number>>;
+        margins?: Record<string, Record<string, number | null>>;
+    }>;
     Metadata: {
         SourceFile: string;
         PdfAvailable: boolean;
@@ -164,9 +174,13 @@ export default function FinancialStatements() {
 
                                 {/* Items */}
                                 {sectionItems.map((item, idx) => {
-                                    const variance = item['2023'] !== 0
-                                        ? ((item['2024'] - item['2023']) / Math.abs(item['2023'])) * 100
-                                        : 0;
+                                    // Extracted data carries the variance; older files fall back to computing it
+                                    const variance = item.changePct
+                                        ? (item.changePct['2024'] ?? 0)
+                                        : item['2023'] !== 0
+                                            ? ((item['2024'] - item['2023']) / Math.abs(item['2023'])) * 100
+                                            : 0;
+                                    const commonSize = item.commonSize?.['2024'];
 
                                     const taxMapping = Object.keys(TAX_MAP).find(k => item.name.includes(k));
                                     const isTotal = item.name.toLowerCase().includes('total');
@@ -198,7 +212,10 @@ export default function FinancialStatements() {
                                                     </span>
                                                 )}
                                             </td>
-                                            <td className={cn('fs-td fs-td--amount', isTotal && 'fs-td--amount-total')}>
+                                            <td
+                                                className={cn('fs-td fs-td--amount', isTotal && 'fs-td--amount-total')}
+                                                title={commonSize != null ? `${commonSize.toFixed(1)}%` : undefined}
+                                            >
                                                 {formatValue(item['2024'], item.format)}
                                             </td>
                                             <td className="fs-td fs-td--prior">
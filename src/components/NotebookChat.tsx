@@ -72,7 +72,7 @@ export default function NotebookChat() {
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ message: langInstruction + input })
+                body: JSON.stringify({ message: langInstruction + input, language })
             });
 
             const data = await response.json();